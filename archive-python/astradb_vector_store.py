@@ -13,6 +13,11 @@ from astrapy.exceptions import InsertManyException
 import openai
 from datetime import datetime
 
+try:
+    from .embedding_utils import BatchedEmbedder, EmbedFunction, get_shared_embedding_cache
+except ImportError:
+    from embedding_utils import BatchedEmbedder, EmbedFunction, get_shared_embedding_cache
+
 @dataclass
 class VectorDocument:
     """Document structure for AstraDB vector storage"""
@@ -30,7 +35,10 @@ class AstraDBVectorStore:
     def __init__(self, 
                  agent_type: str,
                  collection_name: str = None,
-                 embedding_model: str = "text-embedding-3-small"):
+                 embedding_model: str = "text-embedding-3-small",
+                 embedding_batch_size: int = 100,
+                 embedding_function: Optional[EmbedFunction] = None,
+                 use_embedding_cache: bool = True):
         """
         Initialize AstraDB vector store
         
@@ -38,6 +46,9 @@ class AstraDBVectorStore:
             agent_type: Type of agent (compliance, formulation, etc.)
             collection_name: Custom collection name (optional)
             embedding_model: OpenAI embedding model to use
+            embedding_batch_size: Maximum texts per embedding API call
+            embedding_function: Custom batch embedding function (defaults to OpenAI)
+            use_embedding_cache: Consult the shared on-disk embedding cache
         """
         self.agent_type = agent_type
         self.embedding_model = embedding_model
@@ -51,6 +62,12 @@ class AstraDBVectorStore:
         
         # Initialize OpenAI client for embeddings
         self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.embedder = BatchedEmbedder(
+            embedding_function or self._embed_batch,
+            batch_size=embedding_batch_size,
+            cache=get_shared_embedding_cache() if use_embedding_cache else None,
+            model_name=embedding_model
+        )
         
         # Create or get collection
         self.collection = self._get_or_create_collection()
@@ -71,13 +88,21 @@ class AstraDBVectorStore:
             )
             return collection
     
-    def _generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding using OpenAI API"""
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of texts using OpenAI API"""
         response = self.openai_client.embeddings.create(
-            input=text,
+            input=texts,
             model=self.embedding_model
         )
-        return response.data[0].embedding
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    
+    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings in batches, skipping already embedded content"""
+        return self.embedder.embed(texts)
+    
+    def _generate_embedding(self, text: str) -> List[float]:
+        """Generate embedding for a single text"""
+        return self.embedder.embed_one(text)
     
     def add_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
         """
@@ -92,13 +117,13 @@ class AstraDBVectorStore:
         vector_docs = []
         document_ids = []
         
-        for doc in documents:
+        # Generate embeddings in batches
+        embeddings = self._generate_embeddings([doc['content'] for doc in documents])
+        
+        for doc, embedding in zip(documents, embeddings):
             doc_id = str(uuid.uuid4())
             document_ids.append(doc_id)
             
-            # Generate embedding
-            embedding = self._generate_embedding(doc['content'])
-            
             # Create vector document
             vector_doc = VectorDocument(
                 id=doc_id,
@@ -234,6 +259,7 @@ class AstraDBVectorStore:
             "total_documents": total_docs,
             "metadata_categories": list(metadata_categories),
             "embedding_model": self.embedding_model,
+            "embedding_stats": self.embedder.get_statistics(),
             "vector_dimension": 1536,
             "last_updated": datetime.now().isoformat()
         }
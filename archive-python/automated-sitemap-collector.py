@@ -9,7 +9,6 @@ website sitemaps with integration to xml-sitemaps.com functionality.
 import requests
 import json
 import os
-import time
 from datetime import datetime
 from typing import Dict, List, Optional
 import xml.etree.ElementTree as ET
@@ -17,6 +16,8 @@ from urllib.parse import urlparse, urljoin, quote
 import subprocess
 import re
 
+from crawl_engine import fetch_urls
+
 class AutomatedSitemapCollector:
     """Automated sitemap collection and processing system"""
     
@@ -166,40 +167,40 @@ class AutomatedSitemapCollector:
         key_sections = site_info['key_sections']
         
         urls = []
-        
-        for section in key_sections:
-            section_url = urljoin(base_url, f"/{section}")
-            try:
-                print(f"  Crawling section: {section_url}")
-                response = requests.get(section_url, timeout=20)
-                if response.status_code == 200:
-                    # Extract links from HTML content
-                    html_content = response.text
-                    
-                    # Simple regex to find href links
-                    link_matches = re.findall(r'href=[\'"]([^\'"]+)[\'"]', html_content, re.IGNORECASE)
-                    
-                    for link in link_matches:
-                        # Convert relative URLs to absolute
-                        if link.startswith('/'):
-                            full_url = urljoin(base_url, link)
-                        elif link.startswith('http'):
-                            # Only include URLs from the same domain
-                            if urlparse(link).netloc == urlparse(base_url).netloc:
-                                full_url = link
-                            else:
-                                continue
-                        else:
-                            full_url = urljoin(section_url, link)
-                        
-                        # Filter for regulatory content
-                        if self.is_regulatory_content(full_url):
-                            urls.append(full_url)
+        section_urls = [urljoin(base_url, f"/{section}") for section in key_sections]
+        for section_url in section_urls:
+            print(f"  Crawling section: {section_url}")
+        
+        # Sections share a host, so the engine spaces the requests politely
+        pages = fetch_urls(section_urls, per_host_delay=1.0, timeout=20)
+        
+        for section_url, page in pages.items():
+            if page.error:
+                print(f"  Error crawling {section_url}: {page.error}")
+                continue
+            if page.status == 200:
+                # Extract links from HTML content
+                html_content = page.text()
                 
-                time.sleep(1)  # Be respectful to servers
+                # Simple regex to find href links
+                link_matches = re.findall(r'href=[\'"]([^\'"]+)[\'"]', html_content, re.IGNORECASE)
                 
-            except requests.RequestException as e:
-                print(f"  Error crawling {section}: {e}")
+                for link in link_matches:
+                    # Convert relative URLs to absolute
+                    if link.startswith('/'):
+                        full_url = urljoin(base_url, link)
+                    elif link.startswith('http'):
+                        # Only include URLs from the same domain
+                        if urlparse(link).netloc == urlparse(base_url).netloc:
+                            full_url = link
+                        else:
+                            continue
+                    else:
+                        full_url = urljoin(section_url, link)
+                    
+                    # Filter for regulatory content
+                    if self.is_regulatory_content(full_url):
+                        urls.append(full_url)
         
         print(f"  Discovered {len(urls)} URLs from key sections")
         return list(set(urls))  # Remove duplicates
@@ -221,15 +222,12 @@ class AutomatedSitemapCollector:
         ]
         
         urls = []
-        for pattern in patterns:
-            test_url = urljoin(base_url, pattern)
-            try:
-                response = requests.head(test_url, timeout=10)
-                if response.status_code == 200:
-                    urls.append(test_url)
-                    print(f"  Found regulatory section: {test_url}")
-            except requests.RequestException:
-                pass  # URL doesn't exist, continue
+        test_urls = [urljoin(base_url, pattern) for pattern in patterns]
+        responses = fetch_urls(test_urls, method='HEAD', per_host_delay=0.5, max_retries=0, timeout=10)
+        for test_url, response in responses.items():
+            if response.status == 200:  # Missing or unreachable URLs are skipped
+                urls.append(test_url)
+                print(f"  Found regulatory section: {test_url}")
         
         return urls
     
@@ -0,0 +1,210 @@
+"""
+Persistent BM25 Inverted Index for Regulatory Text Search
+
+Stores postings (term, document ID, term frequency) in SQLite so keyword
+search is ranked with BM25 and served without re-reading source documents.
+Documents belong to a group (e.g. a state) that can be replaced as a unit.
+"""
+import re
+import json
+import math
+import heapq
+import sqlite3
+import threading
+from pathlib import Path
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, skipping one- and two-letter words"""
+    return [word for word in TOKEN_PATTERN.findall(text.lower()) if len(word) > 2]
+
+
+def highlight_snippet(text: str, query: str, width: int = 200,
+                      marker: Tuple[str, str] = ("**", "**")) -> Tuple[str, int]:
+    """
+    Snippet of text around the first query term, with query terms highlighted
+
+    Returns:
+        (snippet, position of the first match in text or -1)
+    """
+    terms = set(tokenize(query))
+    matches = [m for m in TOKEN_PATTERN.finditer(text) if m.group().lower() in terms]
+    position = matches[0].start() if matches else -1
+
+    start = max(0, position - width // 2) if matches else 0
+    # Don't cut words at the snippet edges
+    if start > 0 and text.find(' ', start, position) != -1:
+        start = text.find(' ', start, position) + 1
+    end = min(len(text), start + width)
+    if end < len(text) and text.rfind(' ', start, end) > max(position, start):
+        end = text.rfind(' ', start, end)
+    pieces = []
+    cursor = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        pieces.append(text[cursor:match.start()])
+        pieces.append(f"{marker[0]}{match.group()}{marker[1]}")
+        cursor = match.end()
+    pieces.append(text[cursor:end])
+
+    snippet = "".join(pieces).replace("\n", " ")
+    return ("..." if start > 0 else "") + snippet + ("..." if end < len(text) else ""), position
+
+
+class BM25Index:
+    """SQLite-backed inverted index with BM25 ranking"""
+
+    def __init__(self, db_path: str, k1: float = 1.5, b: float = 0.75):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                group_key TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_documents_group ON documents(group_key);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+        ''')
+        self.conn.commit()
+
+    def replace_group(self, group_key: str, documents: Iterable[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """
+        Replace all documents in a group
+
+        Args:
+            group_key: Group the documents belong to (e.g. state key)
+            documents: (doc_id, text to index, payload returned with results) tuples
+
+        Returns:
+            Number of documents indexed
+        """
+        doc_rows = []
+        posting_rows = []
+
+        for doc_id, text, payload in documents:
+            term_counts = Counter(tokenize(text))
+            doc_rows.append((doc_id, group_key, sum(term_counts.values()), json.dumps(payload, ensure_ascii=False)))
+            posting_rows.extend((term, doc_id, tf) for term, tf in term_counts.items())
+
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM postings WHERE doc_id IN (SELECT doc_id FROM documents WHERE group_key = ?)",
+                    (group_key,)
+                )
+                self.conn.execute("DELETE FROM documents WHERE group_key = ?", (group_key,))
+                # Drop postings of documents that move in from another group
+                self.conn.executemany("DELETE FROM postings WHERE doc_id = ?", [(row[0],) for row in doc_rows])
+                self.conn.executemany("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)", doc_rows)
+                self.conn.executemany("INSERT OR REPLACE INTO postings VALUES (?, ?, ?)", posting_rows)
+
+        return len(doc_rows)
+
+    def remove_group(self, group_key: str):
+        """Remove all documents in a group"""
+        self.replace_group(group_key, [])
+
+    def clear(self):
+        """Remove all documents"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM postings")
+                self.conn.execute("DELETE FROM documents")
+
+    def search(self, query: str, limit: int = 10, group_key: Optional[str] = None,
+               group_prefix: Optional[str] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Rank documents for a query with BM25
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of results
+            group_key: Optional group to restrict results to
+            group_prefix: Optional group key prefix to restrict results to
+
+        Returns:
+            (doc_id, score, payload) tuples, best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self.lock:
+            total_docs, avg_length = self.conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM documents"
+            ).fetchone()
+            if not total_docs:
+                return []
+            avg_length = avg_length or 1.0
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                doc_freq = self.conn.execute(
+                    "SELECT COUNT(*) FROM postings WHERE term = ?", (term,)
+                ).fetchone()[0]
+                if not doc_freq:
+                    continue
+
+                idf = math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+                sql = ("SELECT p.doc_id, p.tf, d.length FROM postings p "
+                       "JOIN documents d ON d.doc_id = p.doc_id WHERE p.term = ?")
+                params: List[Any] = [term]
+                if group_key is not None:
+                    sql += " AND d.group_key = ?"
+                    params.append(group_key)
+                if group_prefix is not None:
+                    sql += " AND substr(d.group_key, 1, ?) = ?"
+                    params.extend([len(group_prefix), group_prefix])
+
+                for doc_id, tf, length in self.conn.execute(sql, params):
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            if not top:
+                return []
+
+            placeholders = ",".join("?" * len(top))
+            payloads = dict(self.conn.execute(
+                f"SELECT doc_id, payload FROM documents WHERE doc_id IN ({placeholders})",
+                [doc_id for doc_id, _ in top]
+            ))
+
+        return [(doc_id, score, json.loads(payloads[doc_id])) for doc_id, score in top]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get index size statistics"""
+        with self.lock:
+            total_docs = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            total_terms = self.conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+            groups = self.conn.execute("SELECT COUNT(DISTINCT group_key) FROM documents").fetchone()[0]
+        return {
+            "index_path": str(self.db_path),
+            "total_documents": total_docs,
+            "unique_terms": total_terms,
+            "groups": groups
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self.lock:
+            self.conn.close()
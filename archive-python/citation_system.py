@@ -16,6 +16,8 @@ from collections import defaultdict
 import hashlib
 from dataclasses import dataclass, asdict
 
+from bm25_index import BM25Index
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -222,13 +224,17 @@ class CitationSystem:
         
         self.parser = RegulatoryParser()
         
+        # Persistent BM25 inverted index for keyword search
+        self.search_index_file = self.citations_dir / "citation_search_index.db"
+        self.search_index = BM25Index(str(self.search_index_file))
+        
         # Citation database
         self.citation_database = {
             "created_at": datetime.now().isoformat(),
             "total_citations": 0,
             "states": {},
             "citation_index": {},  # For fast lookup
-            "search_index": {}     # For full-text search
+            "search_index_file": str(self.search_index_file)  # For full-text search
         }
 
     def process_state_citations(self, state_key: str) -> Dict:
@@ -312,7 +318,7 @@ class CitationSystem:
             }
         
         # Update search index
-        self._update_search_index(unique_citations)
+        self._update_search_index(state_key, unique_citations)
         
         logger.info(f"Created {len(unique_citations)} citations for {state_key}")
         return state_citation_data
@@ -352,23 +358,18 @@ class CitationSystem:
         
         return unique_citations
 
-    def _update_search_index(self, citations: List[RegulatoryCitation]):
-        """Update search index with new citations"""
+    def _update_search_index(self, state_key: str, citations: List[RegulatoryCitation]):
+        """Replace a state's citations in the persistent search index"""
+        documents = []
         for citation in citations:
-            # Index by keywords
-            text_content = citation.text_content.lower()
-            words = re.findall(r'\b\w+\b', text_content)
-            
-            for word in words:
-                if len(word) > 3:  # Skip short words
-                    if word not in self.citation_database["search_index"]:
-                        self.citation_database["search_index"][word] = []
-                    
-                    self.citation_database["search_index"][word].append({
-                        "citation_id": citation.hash_id,
-                        "state": citation.state,
-                        "relevance": text_content.count(word)
-                    })
+            citation_string = citation.get_citation_string()
+            documents.append((
+                citation.hash_id,
+                f"{citation_string} {citation.text_content}",
+                {"citation": asdict(citation), "citation_string": citation_string}
+            ))
+        
+        self.search_index.replace_group(state_key, documents)
 
     def create_llm_citation_prompt(self, state_key: Optional[str] = None) -> str:
         """Create a prompt for LLMs that includes citation instructions"""
@@ -424,48 +425,16 @@ Remember: Every regulatory statement must include a specific citation. This enab
         logger.info(f"Searching citations for: '{query}'" + 
                    (f" in {state_key}" if state_key else ""))
         
+        # Ranked BM25 search over the persisted index (no per-state file reads)
         results = []
-        query_words = re.findall(r'\b\w+\b', query.lower())
-        
-        # Search in index
-        for word in query_words:
-            if word in self.citation_database["search_index"]:
-                for match in self.citation_database["search_index"][word]:
-                    if not state_key or match["state"] == state_key:
-                        citation_id = match["citation_id"]
-                        
-                        # Get full citation info
-                        if citation_id in self.citation_database["citation_index"]:
-                            citation_info = self.citation_database["citation_index"][citation_id]
-                            
-                            # Load full citation from state file
-                            state_file = self.citations_dir / f"{match['state']}_citations.json"
-                            if state_file.exists():
-                                with open(state_file, 'r') as f:
-                                    state_data = json.load(f)
-                                
-                                # Find matching citation
-                                for citation in state_data["citations"]:
-                                    if citation["hash_id"] == citation_id:
-                                        results.append({
-                                            "citation": citation,
-                                            "relevance": match["relevance"],
-                                            "citation_string": citation_info["citation_string"]
-                                        })
-                                        break
-        
-        # Sort by relevance and deduplicate
-        results = sorted(results, key=lambda x: x["relevance"], reverse=True)
-        seen_ids = set()
-        unique_results = []
-        
-        for result in results:
-            citation_id = result["citation"]["hash_id"]
-            if citation_id not in seen_ids:
-                seen_ids.add(citation_id)
-                unique_results.append(result)
-        
-        return unique_results[:limit]
+        for _, score, payload in self.search_index.search(query, limit=limit, group_key=state_key):
+            results.append({
+                "citation": payload["citation"],
+                "relevance": score,
+                "citation_string": payload["citation_string"]
+            })
+        
+        return results
 
     def process_all_states(self) -> Dict:
         """Process citations for all states"""
@@ -477,8 +446,9 @@ Remember: Every regulatory statement must include a specific citation. This enab
             "total_citations": 0,
             "states": {},
             "citation_index": {},
-            "search_index": {}
+            "search_index_file": str(self.search_index_file)
         }
+        self.search_index.clear()
         
         # Get all state directories
         state_dirs = [d for d in self.states_dir.iterdir() if d.is_dir()]
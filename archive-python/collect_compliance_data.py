@@ -21,9 +21,14 @@ import mimetypes
 import re
 from typing import Dict, List, Set, Optional
 import time
+from types import SimpleNamespace
 from concurrent.futures import ThreadPoolExecutor
 import threading
 
+from crawl_engine import CrawlEngine, CrawlFrontier, DisallowedByRobots, FetchError
+from file_hashing import update_from_file
+from http_validators import HTTPValidatorStore, conditional_get
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,9 +40,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CONTENT_RANGE_PATTERN = re.compile(r'bytes (\d+)-\d+/(\d+|\*)')
+
+class DownloadTooLarge(Exception):
+    """Raised when a download exceeds the configured maximum size"""
+
 class ComplianceDataCollector:
-    def __init__(self, base_dir: str = "compliance_data"):
+    def __init__(self, base_dir: str = "compliance_data", resume: bool = False,
+                 max_in_flight: int = 20):
         self.base_dir = Path(base_dir)
+        self.resume = resume  # Continue each state's saved crawl frontier
         self.states_dir = self.base_dir / "states"
         self.states_dir.mkdir(parents=True, exist_ok=True)
         
@@ -55,16 +67,32 @@ class ComplianceDataCollector:
         }
         
         # Rate limiting
-        self.request_delay = 2.0  # 2 seconds between requests
-        self.max_concurrent = 5   # Maximum concurrent requests
+        self.request_delay = 0.5  # Minimum seconds between requests to one host
+        self.max_concurrent = max_in_flight  # Maximum in-flight requests across all states
         self.session_timeout = 30 # Request timeout in seconds
+        self.max_links_per_page = 50
+        
+        # Streaming downloads
+        self.download_chunk_size = 64 * 1024
+        self.max_download_bytes = 500 * 1024 * 1024  # Larger files are skipped
+        
+        # Shared fetcher (one session and connection pool for all states):
+        # global budget, per-host politeness, robots.txt, retries
+        self.engine = CrawlEngine(
+            max_concurrency=self.max_concurrent,
+            per_host_delay=self.request_delay,
+            timeout=self.session_timeout
+        )
         
         # File tracking
         self.downloaded_files = set()
         self.visited_urls = set()
         self.failed_urls = set()
         
-        # Thread-safe counters
+        # ETag/Last-Modified per page so unchanged pages are not re-downloaded
+        self.validators = HTTPValidatorStore(self.base_dir / "http_validators.db")
+        
+        # Thread-safe counters (totals across states; per-state counts live in each state status)
         self.lock = threading.Lock()
         self.page_count = 0
         self.pdf_count = 0
@@ -117,95 +145,242 @@ class ComplianceDataCollector:
         filename = filename[:100]  # Limit length
         return filename
 
+    def _count(self, counters: Optional[Dict], key: str):
+        """Increment a per-state status counter, if one is being tracked"""
+        if counters is not None:
+            with self.lock:
+                counters[key] += 1
+
+    @staticmethod
+    def _if_range_validator(headers) -> Optional[str]:
+        """Validator usable in If-Range: a strong ETag, else Last-Modified"""
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return headers.get('Last-Modified')
+
     async def download_file(self, session: aiohttp.ClientSession, url: str, 
-                          filepath: Path, file_type: str = "html") -> bool:
-        """Download a file asynchronously"""
+                          filepath: Path, file_type: str = "html",
+                          counters: Optional[Dict] = None) -> bool:
+        """
+        Stream a file to disk (counters: state status to update)
+        
+        The body is written in chunks to <file>.part while being hashed, then
+        renamed into place, so memory stays flat regardless of file size. A
+        .part file left by an interrupted download is resumed with a Range
+        request when the server supports it. The ETag/Last-Modified of the
+        partial download is kept next to it and sent as If-Range, so a file
+        that changed on the server is fetched whole instead of appended to.
+        
+        Returns False for files that are skipped (robots.txt, too large);
+        raises FetchError when the download fails.
+        """
+        part_path = filepath.with_name(filepath.name + '.part')
+        validator_path = filepath.with_name(filepath.name + '.part.validator')
+        
+        async def send(session):
+            # Create directory if it doesn't exist
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            validator = validator_path.read_text() if offset and validator_path.exists() else None
+            if validator:
+                headers = {'Range': f'bytes={offset}-', 'If-Range': validator}
+            else:
+                # Without a validator a partial file cannot be safely resumed
+                headers, offset = {}, 0
+            
+            # Bound connect and per-read stalls, not the whole (possibly large) transfer
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.session_timeout,
+                                            sock_read=self.session_timeout)
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                if response.status == 416:
+                    # Partial file no longer matches the resource: start over
+                    part_path.unlink(missing_ok=True)
+                    validator_path.unlink(missing_ok=True)
+                    return response
+                if response.status not in (200, 206):
+                    return response
+                
+                range_match = CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+                resumed = response.status == 206 and bool(range_match) and int(range_match.group(1)) == offset
+                if response.status == 206 and not resumed:
+                    # Unexpected range: discard the partial file and fetch it whole
+                    part_path.unlink(missing_ok=True)
+                    validator_path.unlink(missing_ok=True)
+                    return SimpleNamespace(status=416, headers=response.headers)
+                if not resumed:
+                    # Full body (a 200 answers an If-Range mismatch too): truncate and start over
+                    offset = 0
+                    new_validator = self._if_range_validator(response.headers)
+                    if new_validator:
+                        validator_path.write_text(new_validator)
+                    else:
+                        validator_path.unlink(missing_ok=True)
+                
+                expected_size = offset + response.content_length if response.content_length is not None else None
+                if expected_size is not None and expected_size > self.max_download_bytes:
+                    raise DownloadTooLarge(f"{expected_size} bytes")
+                
+                hasher = hashlib.sha256()
+                if resumed:
+                    update_from_file(hasher, part_path, self.download_chunk_size)
+                size = offset
+                with open(part_path, 'ab' if resumed else 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.download_chunk_size):
+                        size += len(chunk)
+                        if size > self.max_download_bytes:
+                            raise DownloadTooLarge(f"more than {self.max_download_bytes} bytes")
+                        hasher.update(chunk)
+                        f.write(chunk)
+                
+                # Atomic: readers never see a half-written file
+                os.replace(part_path, filepath)
+                validator_path.unlink(missing_ok=True)
+                return SimpleNamespace(status=200, headers=response.headers, size=size,
+                                       sha256=hasher.hexdigest(), resumed=resumed)
+        
         try:
             logger.info(f"Downloading {file_type}: {url}")
             
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.session_timeout)) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    
-                    # Create directory if it doesn't exist
-                    filepath.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    # Write file
-                    with open(filepath, 'wb') as f:
-                        f.write(content)
-                    
-                    # Update counters
-                    with self.lock:
-                        if file_type == "pdf":
-                            self.pdf_count += 1
-                        else:
-                            self.page_count += 1
-                    
-                    logger.info(f"Successfully downloaded: {filepath}")
-                    return True
-                else:
-                    logger.warning(f"Failed to download {url}: HTTP {response.status}")
-                    return False
+            response = await self.engine.request(url, send)
+            if response.status == 416:
+                response = await self.engine.request(url, send)
+            
+            if response.status == 200:
+                # Update counters
+                with self.lock:
+                    if file_type == "pdf":
+                        self.pdf_count += 1
+                    else:
+                        self.page_count += 1
+                self._count(counters, "pdfs_collected" if file_type == "pdf" else "pages_collected")
+                if counters is not None:
+                    counters.setdefault("file_hashes", {})[filepath.name] = response.sha256
+                
+                logger.info(f"Successfully downloaded: {filepath} ({response.size} bytes"
+                           f"{', resumed' if response.resumed else ''}, sha256 {response.sha256[:12]})")
+                return True
+            raise FetchError(f"Failed to download {url}: HTTP {response.status}")
         
+        except DisallowedByRobots:
+            logger.info(f"Skipping {url}: disallowed by robots.txt")
+            return False
+        except DownloadTooLarge as e:
+            logger.warning(f"Skipping {url}: exceeds maximum download size ({e})")
+            part_path.unlink(missing_ok=True)
+            validator_path.unlink(missing_ok=True)
+            return False
+        except FetchError:
+            raise
         except Exception as e:
-            logger.error(f"Error downloading {url}: {str(e)}")
-            with self.lock:
-                self.error_count += 1
+            raise FetchError(f"Error downloading {url}: {str(e)}") from e
+
+    async def download_pdf(self, session: aiohttp.ClientSession, pdf_url: str, state_dir: Path,
+                           counters: Optional[Dict] = None) -> bool:
+        """Download a linked PDF into the state's pdfs directory (once per URL)"""
+        if pdf_url in self.downloaded_files:
             return False
+        
+        pdf_filename = self.sanitize_filename(os.path.basename(pdf_url))
+        if not pdf_filename.endswith('.pdf'):
+            pdf_filename += '.pdf'
+        
+        pdf_path = state_dir / "pdfs" / pdf_filename
+        
+        if await self.download_file(session, pdf_url, pdf_path, "pdf", counters):
+            self.downloaded_files.add(pdf_url)
+            return True
+        return False
+
+    def _load_saved_links(self, metadata_path: Path) -> Optional[List[str]]:
+        """Links recorded by a previous scrape of a page, or None if unavailable"""
+        try:
+            with open(metadata_path, 'r') as f:
+                return json.load(f).get("links")
+        except (OSError, ValueError):
+            return None
 
     async def scrape_page(self, session: aiohttp.ClientSession, url: str, 
-                         state_dir: Path, depth: int = 0) -> List[str]:
-        """Scrape a single page and return found links"""
+                         state_dir: Path, depth: int = 0,
+                         counters: Optional[Dict] = None) -> List[str]:
+        """Scrape a single page and return found links (raises FetchError if it cannot be fetched)"""
         if depth > 3 or url in self.visited_urls:  # Limit recursion depth
             return []
         
         self.visited_urls.add(url)
         
+        url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
+        metadata_path = state_dir / "processed" / f"{url_hash}_metadata.json"
+        
         try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.session_timeout)) as response:
-                if response.status != 200:
-                    return []
-                
-                content = await response.text()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Save HTML content
-                url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-                filename = f"{url_hash}_{self.sanitize_filename(soup.title.string if soup.title else 'page')}.html"
-                html_path = state_dir / "regulations" / filename
-                
-                with open(html_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                
-                # Extract metadata
-                metadata = {
-                    "url": url,
-                    "title": soup.title.string if soup.title else "",
-                    "scraped_at": datetime.now().isoformat(),
-                    "depth": depth,
-                    "file_path": str(html_path)
-                }
-                
-                # Save metadata
-                metadata_path = state_dir / "processed" / f"{url_hash}_metadata.json"
-                with open(metadata_path, 'w') as f:
-                    json.dump(metadata, f, indent=2)
-                
-                # Find all links
-                links = []
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    absolute_url = urljoin(url, href)
-                    
-                    if self.is_valid_url(absolute_url, url):
-                        links.append(absolute_url)
+            # Unchanged pages reuse the links saved with their metadata
+            previous_links = self._load_saved_links(metadata_path)
+            response = await self.engine.request(url, lambda session: conditional_get(
+                session, url, self.validators,
+                conditional=previous_links is not None,
+                timeout=aiohttp.ClientTimeout(total=self.session_timeout)
+            ))
+            
+            if not response.changed:
+                logger.info(f"Unchanged {url} (HTTP {response.status}): reusing {len(previous_links)} links")
+                self.validators.commit(response)
+                return previous_links
+            
+            if response.status != 200:
+                raise FetchError(f"Failed to fetch {url}: HTTP {response.status}")
+            
+            content = response.text()
+            soup = BeautifulSoup(content, 'html.parser')
+            
+            # Save HTML content
+            filename = f"{url_hash}_{self.sanitize_filename(soup.title.string if soup.title else 'page')}.html"
+            html_path = state_dir / "regulations" / filename
+            
+            with open(html_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            
+            # Find all links
+            links = []
+            for link in soup.find_all('a', href=True):
+                href = link['href']
+                absolute_url = urljoin(url, href)
                 
-                logger.info(f"Scraped {url}: found {len(links)} links")
-                return links
+                if self.is_valid_url(absolute_url, url):
+                    links.append(absolute_url)
+            
+            # Extract metadata
+            metadata = {
+                "url": url,
+                "title": soup.title.string if soup.title else "",
+                "scraped_at": datetime.now().isoformat(),
+                "depth": depth,
+                "file_path": str(html_path),
+                "content_hash": response.content_hash,
+                "links": links
+            }
+            
+            # Save metadata
+            with open(metadata_path, 'w') as f:
+                json.dump(metadata, f, indent=2)
+            
+            # The page and its links are saved: later fetches may treat it as unchanged
+            self.validators.commit(response)
+            
+            with self.lock:
+                self.page_count += 1
+            self._count(counters, "pages_collected")
+            
+            logger.info(f"Scraped {url}: found {len(links)} links")
+            return links
         
-        except Exception as e:
-            logger.error(f"Error scraping {url}: {str(e)}")
+        except DisallowedByRobots:
+            logger.info(f"Skipping {url}: disallowed by robots.txt")
             return []
+        except FetchError:
+            raise
+        except Exception as e:
+            raise FetchError(f"Error scraping {url}: {str(e)}") from e
 
     async def collect_state_data(self, state_key: str, state_data: Dict) -> Dict:
         """Collect all compliance data for a single state"""
@@ -234,68 +409,50 @@ class ComplianceDataCollector:
         # Remove duplicates
         urls_to_process = list(set(urls_to_process))
         
-        async with aiohttp.ClientSession() as session:
-            # Process each URL
-            for url in urls_to_process:
-                try:
-                    logger.info(f"Processing URL: {url}")
-                    
-                    # Scrape the page and get links
-                    links = await self.scrape_page(session, url, state_dir)
-                    
-                    # Process PDFs immediately
-                    pdf_links = [link for link in links if self.is_pdf_url(link)]
-                    for pdf_url in pdf_links:
-                        if pdf_url not in self.downloaded_files:
-                            pdf_filename = self.sanitize_filename(os.path.basename(pdf_url))
-                            if not pdf_filename.endswith('.pdf'):
-                                pdf_filename += '.pdf'
-                            
-                            pdf_path = state_dir / "pdfs" / pdf_filename
-                            
-                            if await self.download_file(session, pdf_url, pdf_path, "pdf"):
-                                self.downloaded_files.add(pdf_url)
-                    
-                    # Process regular links (depth-first traversal)
-                    semaphore = asyncio.Semaphore(self.max_concurrent)
-                    
-                    async def process_link(link):
-                        async with semaphore:
-                            await asyncio.sleep(self.request_delay)
-                            return await self.scrape_page(session, link, state_dir, depth=1)
-                    
-                    # Process links in batches
-                    regular_links = [link for link in links if not self.is_pdf_url(link)]
-                    tasks = [process_link(link) for link in regular_links[:50]]  # Limit to 50 links per page
-                    
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-                    
-                    # Process second-level links for PDFs
-                    for result in results:
-                        if isinstance(result, list):
-                            second_level_pdfs = [link for link in result if self.is_pdf_url(link)]
-                            for pdf_url in second_level_pdfs:
-                                if pdf_url not in self.downloaded_files:
-                                    pdf_filename = self.sanitize_filename(os.path.basename(pdf_url))
-                                    if not pdf_filename.endswith('.pdf'):
-                                        pdf_filename += '.pdf'
-                                    
-                                    pdf_path = state_dir / "pdfs" / pdf_filename
-                                    
-                                    if await self.download_file(session, pdf_url, pdf_path, "pdf"):
-                                        self.downloaded_files.add(pdf_url)
-                    
-                    state_status["urls_processed"].append(url)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing {url}: {str(e)}")
-                    state_status["errors"] += 1
+        # Persisted frontier: an interrupted crawl resumes with --resume
+        frontier = CrawlFrontier(state_dir / "logs" / "frontier.db")
+        if not self.resume:
+            frontier.reset()
+        else:
+            retried = frontier.retry_failed()
+            if retried:
+                logger.info(f"Retrying {retried} failed URLs for {state_key}")
+        frontier.add_many(urls_to_process, depth=0)
+        
+        session = await self.engine.get_session()
+        
+        # Fetch failures raise, so the frontier records the entry as failed
+        # and --resume retries it
+        async def process_entry(entry):
+            if entry.data.get("type") == "pdf":
+                await self.download_pdf(session, entry.url, state_dir, state_status)
+                return []
+            
+            logger.info(f"Processing URL: {entry.url}")
+            links = await self.scrape_page(session, entry.url, state_dir, depth=entry.depth,
+                                           counters=state_status)
+            if entry.depth == 0:
+                state_status["urls_processed"].append(entry.url)
+            
+            # PDFs are downloaded from every page; regular links are followed one level deep
+            pdf_links = [(link, {"type": "pdf"}) for link in links if self.is_pdf_url(link)]
+            if entry.depth >= 1:
+                return pdf_links
+            
+            regular_links = [link for link in links if not self.is_pdf_url(link)]
+            return pdf_links + regular_links[:self.max_links_per_page]
+        
+        try:
+            crawl_stats = await self.engine.crawl(frontier, process_entry)
+            state_status["errors"] += crawl_stats["failed"]
+            with self.lock:
+                self.error_count += crawl_stats["failed"]
+        finally:
+            frontier.close()
         
         # Finalize state status
         state_status["completed_at"] = datetime.now().isoformat()
         state_status["status"] = "completed"
-        state_status["pages_collected"] = self.page_count
-        state_status["pdfs_collected"] = self.pdf_count
         
         # Save state metadata
         metadata_path = state_dir / "metadata.json"
@@ -303,77 +460,65 @@ class ComplianceDataCollector:
             json.dump(state_status, f, indent=2)
         
         logger.info(f"Completed collection for {state_data['state_name']}: "
-                   f"{self.page_count} pages, {self.pdf_count} PDFs")
+                   f"{state_status['pages_collected']} pages, {state_status['pdfs_collected']} PDFs")
         
         return state_status
 
-    async def collect_all_states(self):
-        """Collect compliance data for all states"""
+    async def _collect_and_record_state(self, state_key: str, state_data: Dict):
+        """Collect one state and fold its results into the collection status"""
+        try:
+            state_status = await self.collect_state_data(state_key, state_data)
+            self.collection_status["states"][state_key] = state_status
+            
+            # Update global counters
+            self.collection_status["total_pages"] += state_status["pages_collected"]
+            self.collection_status["total_pdfs"] += state_status["pdfs_collected"]
+            self.collection_status["total_errors"] += state_status["errors"]
+            
+            # Save progress
+            await self.save_collection_status()
+            
+        except Exception as e:
+            logger.error(f"Failed to collect data for {state_key}: {str(e)}")
+            self.collection_status["states"][state_key] = {
+                "status": "failed",
+                "error": str(e)
+            }
+
+    async def collect_all_states(self, concurrent: bool = True, max_parallel_states: Optional[int] = None):
+        """
+        Collect compliance data for all states
+        
+        Args:
+            concurrent: Crawl states at the same time over the shared session; the
+                engine's in-flight cap and per-host limits keep this polite
+            max_parallel_states: Optional cap on states crawled at once
+        """
         logger.info("Starting comprehensive compliance data collection")
         
         states = self.state_sources['cannabis_legal_states']
         
-        # Prioritize adult-use states
-        adult_use_states = {k: v for k, v in states.items() if v['status'] == 'legal_adult_use'}
-        medical_states = {k: v for k, v in states.items() if v['status'] == 'medical_only'}
-        
-        # Process adult-use states first
-        for state_key, state_data in adult_use_states.items():
-            try:
-                # Reset counters for each state
-                self.page_count = 0
-                self.pdf_count = 0
-                self.error_count = 0
-                
-                state_status = await self.collect_state_data(state_key, state_data)
-                self.collection_status["states"][state_key] = state_status
-                
-                # Update global counters
-                self.collection_status["total_pages"] += state_status["pages_collected"]
-                self.collection_status["total_pdfs"] += state_status["pdfs_collected"]
-                self.collection_status["total_errors"] += state_status["errors"]
-                
-                # Save progress
-                await self.save_collection_status()
-                
-                # Brief pause between states
-                await asyncio.sleep(5)
-                
-            except Exception as e:
-                logger.error(f"Failed to collect data for {state_key}: {str(e)}")
-                self.collection_status["states"][state_key] = {
-                    "status": "failed",
-                    "error": str(e)
-                }
-        
-        # Process medical states
-        for state_key, state_data in medical_states.items():
-            try:
-                # Reset counters for each state
-                self.page_count = 0
-                self.pdf_count = 0
-                self.error_count = 0
-                
-                state_status = await self.collect_state_data(state_key, state_data)
-                self.collection_status["states"][state_key] = state_status
-                
-                # Update global counters
-                self.collection_status["total_pages"] += state_status["pages_collected"]
-                self.collection_status["total_pdfs"] += state_status["pdfs_collected"]
-                self.collection_status["total_errors"] += state_status["errors"]
-                
-                # Save progress
-                await self.save_collection_status()
+        # Prioritize adult-use states (started first, or processed first when sequential)
+        adult_use_states = [(k, v) for k, v in states.items() if v['status'] == 'legal_adult_use']
+        medical_states = [(k, v) for k, v in states.items() if v['status'] == 'medical_only']
+        ordered_states = adult_use_states + medical_states
+        
+        try:
+            if concurrent:
+                semaphore = asyncio.Semaphore(max_parallel_states or max(len(ordered_states), 1))
                 
-                # Brief pause between states
-                await asyncio.sleep(5)
+                async def collect_bounded(state_key, state_data):
+                    async with semaphore:
+                        await self._collect_and_record_state(state_key, state_data)
                 
-            except Exception as e:
-                logger.error(f"Failed to collect data for {state_key}: {str(e)}")
-                self.collection_status["states"][state_key] = {
-                    "status": "failed",
-                    "error": str(e)
-                }
+                logger.info(f"Collecting {len(ordered_states)} states concurrently "
+                           f"(max {self.max_concurrent} requests in flight)")
+                await asyncio.gather(*(collect_bounded(k, v) for k, v in ordered_states))
+            else:
+                for state_key, state_data in ordered_states:
+                    await self._collect_and_record_state(state_key, state_data)
+        finally:
+            await self.engine.close()
         
         # Final status update
         self.collection_status["completed_at"] = datetime.now().isoformat()
@@ -397,7 +542,10 @@ class ComplianceDataCollector:
             return
         
         state_data = self.state_sources['cannabis_legal_states'][state_key]
-        state_status = await self.collect_state_data(state_key, state_data)
+        try:
+            state_status = await self.collect_state_data(state_key, state_data)
+        finally:
+            await self.engine.close()
         
         self.collection_status["states"][state_key] = state_status
         await self.save_collection_status()
@@ -409,19 +557,26 @@ def main():
     parser = argparse.ArgumentParser(description="Collect cannabis compliance data")
     parser.add_argument('--state', help='Collect data for specific state only')
     parser.add_argument('--all', action='store_true', help='Collect data for all states')
-    parser.add_argument('--resume', action='store_true', help='Resume previous collection')
+    parser.add_argument('--resume', action='store_true', help='Resume previous collection (failed URLs are retried)')
+    parser.add_argument('--sequential', action='store_true', help='Collect states one at a time')
+    parser.add_argument('--max-in-flight', type=int, default=20,
+                        help='Maximum concurrent requests across all states')
+    parser.add_argument('--max-parallel-states', type=int, help='Maximum states crawled at once')
     
     args = parser.parse_args()
     
     # Change to compliance_data directory
     os.chdir(Path(__file__).parent.parent)
     
-    collector = ComplianceDataCollector()
+    collector = ComplianceDataCollector(resume=args.resume, max_in_flight=args.max_in_flight)
     
     if args.state:
         asyncio.run(collector.collect_single_state(args.state))
     elif args.all:
-        asyncio.run(collector.collect_all_states())
+        asyncio.run(collector.collect_all_states(
+            concurrent=not args.sequential,
+            max_parallel_states=args.max_parallel_states
+        ))
     else:
         print("Please specify --state <state_name> or --all")
         print("Available states:")
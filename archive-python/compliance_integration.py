@@ -14,6 +14,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent))
@@ -22,6 +23,7 @@ from citation_system import CitationSystem
 from vectorize_compliance import ComplianceVectorizer
 from wget_mirror import WgetMirror
 from data_validator import ComplianceDataValidator
+from hybrid_retrieval import reciprocal_rank_fusion, apply_token_budget, estimate_tokens
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +32,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Characters of citation text included per citation in the LLM prompt
+PROMPT_CONTENT_CHARS = 300
+
 class ComplianceIntegration:
     """Main integration class for compliance data system"""
     
@@ -42,6 +47,9 @@ class ComplianceIntegration:
         self.mirror = WgetMirror(base_dir)
         self.validator = ComplianceDataValidator(base_dir)
         
+        # Vector and keyword searches run concurrently for hybrid retrieval
+        self.search_executor = ThreadPoolExecutor(max_workers=2)
+        
         # Integration status
         self.integration_status = {
             "initialized_at": datetime.now().isoformat(),
@@ -54,8 +62,18 @@ class ComplianceIntegration:
             "ready_for_queries": False
         }
 
+    def close(self):
+        """Shut down the hybrid search worker threads"""
+        self.search_executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ComplianceIntegration":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def get_regulatory_answer(self, query: str, state: Optional[str] = None, 
-                            top_k: int = 5) -> Dict[str, Any]:
+                            top_k: int = 5, token_budget: int = 2000) -> Dict[str, Any]:
         """
         Get comprehensive regulatory answer with citations and vector search
         
@@ -65,68 +83,16 @@ class ComplianceIntegration:
                    (f" for state: {state}" if state else ""))
         
         try:
-            # Step 1: Vector search for relevant citations
-            similar_citations = self.vectorizer.search_similar_citations(
-                query, k=top_k * 2, state_filter=state
-            )
-            
-            # Step 2: Filter high-relevance citations
-            high_relevance_citations = [
-                citation for citation in similar_citations 
-                if citation["relevance"] in ["high", "medium"]
-            ][:top_k]
-            
-            # Step 3: Get additional context from citation system
-            keyword_results = self.citation_system.search_citations(
-                query, state, limit=top_k
-            )
-            
-            # Step 4: Combine and deduplicate results
-            all_citations = []
-            seen_citation_ids = set()
+            hybrid_results = self.hybrid_search(query, state, top_k=top_k, token_budget=token_budget)
+            all_citations = hybrid_results["citations"]
             
-            # Add vector search results first (higher priority)
-            for citation in high_relevance_citations:
-                if citation["citation_id"] not in seen_citation_ids:
-                    all_citations.append({
-                        "source": "vector_search",
-                        "similarity_score": citation["similarity_score"],
-                        "citation_string": citation["citation_string"],
-                        "state": citation["state"],
-                        "section": citation["section"],
-                        "document_type": citation["document_type"],
-                        "text_content": citation["text_content"],
-                        "relevance": citation["relevance"]
-                    })
-                    seen_citation_ids.add(citation["citation_id"])
-            
-            # Add keyword search results
-            for result in keyword_results:
-                citation = result["citation"]
-                if citation["hash_id"] not in seen_citation_ids:
-                    all_citations.append({
-                        "source": "keyword_search",
-                        "similarity_score": None,
-                        "citation_string": result["citation_string"],
-                        "state": citation["state"],
-                        "section": citation["section"],
-                        "document_type": citation["document_type"],
-                        "text_content": citation["text_content"],
-                        "relevance": "keyword_match"
-                    })
-                    seen_citation_ids.add(citation["hash_id"])
-            
-            # Step 5: Format response
+            # Format response
             response = {
                 "query": query,
                 "state_filter": state,
                 "total_citations": len(all_citations),
                 "citations": all_citations,
-                "search_metadata": {
-                    "vector_results": len(high_relevance_citations),
-                    "keyword_results": len(keyword_results),
-                    "combined_results": len(all_citations)
-                },
+                "search_metadata": hybrid_results["search_metadata"],
                 "llm_prompt": self._create_llm_prompt(query, all_citations),
                 "processed_at": datetime.now().isoformat()
             }
@@ -144,6 +110,97 @@ class ComplianceIntegration:
                 "processed_at": datetime.now().isoformat()
             }
 
+    def hybrid_search(self, query: str, state: Optional[str] = None,
+                      top_k: int = 5, token_budget: int = 2000) -> Dict[str, Any]:
+        """
+        Run vector and keyword search concurrently and fuse them with reciprocal rank fusion
+        
+        Results are deduplicated by citation ID and capped at top_k citations
+        and at token_budget estimated prompt tokens.
+        """
+        # Step 1: Vector and keyword searches in parallel
+        vector_future = self.search_executor.submit(
+            self.vectorizer.search_similar_citations, query, top_k * 2, state
+        )
+        keyword_future = self.search_executor.submit(
+            self.citation_system.search_citations, query, state, top_k * 2
+        )
+        similar_citations = vector_future.result()
+        keyword_results = keyword_future.result()
+        
+        # Step 2: Filter high-relevance vector citations
+        high_relevance_citations = [
+            citation for citation in similar_citations 
+            if citation["relevance"] in ["high", "medium"]
+        ]
+        
+        # Step 3: Normalize both result types to the citation format used in prompts
+        vector_citations = [
+            {
+                "citation_id": citation["citation_id"],
+                "source": "vector_search",
+                "similarity_score": citation["similarity_score"],
+                "citation_string": citation["citation_string"],
+                "state": citation["state"],
+                "section": citation["section"],
+                "document_type": citation["document_type"],
+                "text_content": citation["text_content"],
+                "relevance": citation["relevance"]
+            }
+            for citation in high_relevance_citations
+        ]
+        keyword_citations = [
+            {
+                "citation_id": result["citation"]["hash_id"],
+                "source": "keyword_search",
+                "similarity_score": None,
+                "citation_string": result["citation_string"],
+                "state": result["citation"]["state"],
+                "section": result["citation"]["section"],
+                "document_type": result["citation"]["document_type"],
+                "text_content": result["citation"]["text_content"],
+                "relevance": "keyword_match"
+            }
+            for result in keyword_results
+        ]
+        
+        # Step 4: Reciprocal rank fusion, deduplicated by citation ID
+        fused = reciprocal_rank_fusion(
+            {"vector_search": vector_citations, "keyword_search": keyword_citations},
+            id_key=lambda citation: citation["citation_id"]
+        )
+        
+        ranked_citations = []
+        for entry in fused:
+            citation = dict(entry["item"])
+            if len(entry["sources"]) > 1:
+                citation["source"] = "hybrid"
+            citation["fusion_score"] = entry["fusion_score"]
+            ranked_citations.append(citation)
+        
+        # Step 5: Cap at top_k and the prompt token budget
+        all_citations = apply_token_budget(
+            ranked_citations, self._citation_prompt_text, token_budget, max_items=top_k
+        )
+        
+        return {
+            "citations": all_citations,
+            "search_metadata": {
+                "vector_results": len(vector_citations),
+                "keyword_results": len(keyword_citations),
+                "fused_results": len(ranked_citations),
+                "combined_results": len(all_citations),
+                "fusion_method": "reciprocal_rank_fusion",
+                "estimated_context_tokens": sum(
+                    estimate_tokens(self._citation_prompt_text(citation)) for citation in all_citations
+                )
+            }
+        }
+
+    def _citation_prompt_text(self, citation: Dict) -> str:
+        """Citation text as it appears in the LLM prompt (used for token budgeting)"""
+        return f"{citation['citation_string']} {citation['text_content'][:PROMPT_CONTENT_CHARS]}"
+
     def _create_llm_prompt(self, query: str, citations: List[Dict]) -> str:
         """Create LLM prompt with citations and instructions"""
         
@@ -159,7 +216,7 @@ RELEVANT CITATIONS FOUND ({len(citations)} total):
 {i}. {citation['citation_string']}
    Source: {citation['source']} | Relevance: {citation['relevance']}
    {citation['state'].upper()} {citation['document_type']} - Section {citation['section']}
-   Content: {citation['text_content'][:300]}...
+   Content: {citation['text_content'][:PROMPT_CONTENT_CHARS]}...
    
 """
         
@@ -397,26 +454,25 @@ def main():
     # Change to compliance_data directory
     os.chdir(Path(__file__).parent.parent)
     
-    integration = ComplianceIntegration()
-    
-    if args.check_readiness:
-        readiness = integration.check_system_readiness()
-        print(json.dumps(readiness, indent=2))
-    elif args.query:
-        response = integration.get_regulatory_answer(args.query, args.state)
-        print(json.dumps(response, indent=2))
-    elif args.stats:
-        stats = integration.get_state_statistics(args.stats)
-        print(json.dumps(stats, indent=2))
-    elif args.config:
-        config = integration.create_agent_config()
-        print(json.dumps(config, indent=2))
-    else:
-        print("Please specify an action:")
-        print("  --check-readiness  Check if system is ready")
-        print("  --query 'text'     Test query processing")
-        print("  --stats <state>    Get state statistics")
-        print("  --config           Generate agent configuration")
+    with ComplianceIntegration() as integration:
+        if args.check_readiness:
+            readiness = integration.check_system_readiness()
+            print(json.dumps(readiness, indent=2))
+        elif args.query:
+            response = integration.get_regulatory_answer(args.query, args.state)
+            print(json.dumps(response, indent=2))
+        elif args.stats:
+            stats = integration.get_state_statistics(args.stats)
+            print(json.dumps(stats, indent=2))
+        elif args.config:
+            config = integration.create_agent_config()
+            print(json.dumps(config, indent=2))
+        else:
+            print("Please specify an action:")
+            print("  --check-readiness  Check if system is ready")
+            print("  --query 'text'     Test query processing")
+            print("  --stats <state>    Get state statistics")
+            print("  --config           Generate agent configuration")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,529 @@
+"""
+Shared Async Crawl Engine for Regulatory Sites
+
+One fetch path for the collectors: a global concurrency budget, per-host
+rate limits with robots.txt compliance, retry with exponential backoff,
+URL normalization/dedup and a SQLite-persisted frontier so an interrupted
+crawl resumes where it stopped.
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import inspect
+import logging
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+from multidict import CIMultiDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (compatible; Formul8 Compliance Bot/1.0)'
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def normalize_url(url: str, base_url: Optional[str] = None) -> str:
+    """
+    Canonical form of a URL for deduplication
+
+    Resolves against base_url, drops the fragment and default port, lowercases
+    scheme and host, collapses duplicate slashes and sorts query parameters.
+    The result is a dedup key only: servers may treat parameter order or
+    repeated slashes as significant, so fetch the original URL.
+    """
+    if base_url:
+        url = urljoin(base_url, url)
+    url, _ = urldefrag(url.strip())
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    netloc = host
+    if parts.port is not None and DEFAULT_PORTS.get(scheme) != parts.port:
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        credentials = parts.username + (f":{parts.password}" if parts.password else '')
+        netloc = f"{credentials}@{netloc}"
+
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def host_key(url: str) -> str:
+    """Host (with non-default port) that politeness limits apply to"""
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if parts.port is not None and DEFAULT_PORTS.get(parts.scheme.lower()) != parts.port:
+        return f"{host}:{parts.port}"
+    return host
+
+
+class DisallowedByRobots(Exception):
+    """Raised when robots.txt forbids fetching a URL"""
+
+
+class FetchError(Exception):
+    """Raised by FetchResult.raise_for_status for failed fetches"""
+
+
+@dataclass
+class FetchResult:
+    """Outcome of an engine fetch"""
+    url: str
+    status: int = 0
+    final_url: Optional[str] = None
+    headers: CIMultiDict = field(default_factory=CIMultiDict)
+    body: bytes = b''
+    encoding: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 300
+
+    def text(self) -> str:
+        """Decode the body using the response charset (UTF-8 fallback)"""
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise FetchError(f"{self.url}: {self.error or f'HTTP {self.status}'}")
+
+
+@dataclass
+class FrontierEntry:
+    """A URL waiting in (or claimed from) the frontier"""
+    url: str
+    depth: int
+    data: Dict[str, Any]
+
+
+class CrawlFrontier:
+    """
+    SQLite-backed crawl queue with URL dedup
+
+    URLs are deduplicated by their normalized form and never queued twice;
+    entries keep the URL as given (minus its fragment) for fetching. Entries
+    claimed but not finished when a crawl is interrupted go back to pending
+    on reopen.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ":memory:"):
+        self.db_path = str(db_path)
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS frontier (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                depth INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                data TEXT NOT NULL DEFAULT '{}',
+                error TEXT,
+                updated_at REAL NOT NULL,
+                fetch_url TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier(status, id);
+        ''')
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(frontier)")}
+        with self.conn:
+            if 'fetch_url' not in columns:
+                # Frontiers created before fetch URLs were kept fetch the normalized URL
+                self.conn.execute("ALTER TABLE frontier ADD COLUMN fetch_url TEXT")
+            # Resume: work claimed by an interrupted crawl is pending again
+            self.conn.execute("UPDATE frontier SET status = 'pending' WHERE status = 'in_progress'")
+
+    def add(self, url: str, depth: int = 0, data: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue a URL; returns False if it was already seen"""
+        return self.add_many([url], depth, data) == 1
+
+    def add_many(self, urls: Iterable[str], depth: int = 0, data: Optional[Dict[str, Any]] = None) -> int:
+        """Queue URLs at one depth; returns how many were new"""
+        payload = json.dumps(data or {})
+        now = time.time()
+        rows = [(normalize_url(url), urldefrag(url.strip())[0], depth, payload, now) for url in urls]
+
+        with self.lock:
+            with self.conn:
+                before = self.conn.total_changes
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO frontier (url, fetch_url, depth, data, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                return self.conn.total_changes - before
+
+    def claim(self, limit: int) -> List[FrontierEntry]:
+        """Take up to limit pending entries (oldest first) and mark them in progress"""
+        if limit <= 0:
+            return []
+
+        with self.lock:
+            with self.conn:
+                rows = self.conn.execute(
+                    "SELECT id, COALESCE(fetch_url, url), depth, data FROM frontier "
+                    "WHERE status = 'pending' ORDER BY id LIMIT ?",
+                    (limit,)
+                ).fetchall()
+                self.conn.executemany(
+                    "UPDATE frontier SET status = 'in_progress', updated_at = ? WHERE id = ?",
+                    [(time.time(), row[0]) for row in rows]
+                )
+        return [FrontierEntry(url=url, depth=depth, data=json.loads(data)) for _, url, depth, data in rows]
+
+    def mark_done(self, url: str):
+        self._set_status(url, 'done')
+
+    def mark_failed(self, url: str, error: str):
+        self._set_status(url, 'failed', error)
+
+    def _set_status(self, url: str, status: str, error: Optional[str] = None):
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE frontier SET status = ?, error = ?, updated_at = ? WHERE url = ?",
+                    (status, error, time.time(), normalize_url(url))
+                )
+
+    def entries(self, status: Optional[str] = None) -> List[FrontierEntry]:
+        """All entries (optionally with one status) in queue order"""
+        sql = "SELECT COALESCE(fetch_url, url), depth, data FROM frontier"
+        params: List[Any] = []
+        if status is not None:
+            sql += " WHERE status = ?"
+            params.append(status)
+        with self.lock:
+            rows = self.conn.execute(sql + " ORDER BY id", params).fetchall()
+        return [FrontierEntry(url=url, depth=depth, data=json.loads(data)) for url, depth, data in rows]
+
+    def retry_failed(self) -> int:
+        """Put failed entries back in the queue"""
+        with self.lock:
+            with self.conn:
+                return self.conn.execute(
+                    "UPDATE frontier SET status = 'pending', error = NULL WHERE status = 'failed'"
+                ).rowcount
+
+    def reset(self):
+        """Forget all entries (start a fresh crawl)"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM frontier")
+
+    def counts(self) -> Dict[str, int]:
+        """Number of entries per status"""
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall()
+        counts = {'pending': 0, 'in_progress': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class _HostState:
+    """Per-host politeness state"""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.delay = delay
+        self.next_request_at = 0.0
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_lock = asyncio.Lock()
+
+
+class CrawlEngine:
+    """
+    Polite async fetcher shared by the regulatory collectors
+
+    Requests to one host are spaced by per_host_delay (or the robots.txt
+    Crawl-delay, whichever is longer) and capped at per_host_concurrency,
+    while max_concurrency bounds requests across all hosts, so many state
+    sites are crawled in parallel without hammering any one of them.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 10,
+                 per_host_concurrency: int = 2,
+                 per_host_delay: float = 1.0,
+                 max_retries: int = 3,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 30.0,
+                 timeout: float = 30.0,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 headers: Optional[Dict[str, str]] = None,
+                 respect_robots: bool = True):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.headers = {'User-Agent': user_agent, **(headers or {})}
+        self.respect_robots = respect_robots
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, _HostState] = {}
+
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "robots_blocked": 0}
+
+    async def __aenter__(self) -> "CrawlEngine":
+        await self.get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get or create the shared aiohttp session"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             limit_per_host=self.per_host_concurrency)
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=connector
+            )
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._hosts = {}
+        return self.session
+
+    async def close(self):
+        """Close the shared session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def _host(self, url: str) -> _HostState:
+        key = host_key(url)
+        if key not in self._hosts:
+            self._hosts[key] = _HostState(self.per_host_concurrency, self.per_host_delay)
+        return self._hosts[key]
+
+    @asynccontextmanager
+    async def slot(self, url: str, check_robots: bool = True):
+        """
+        Hold a request slot for a URL
+
+        Waits for the host's next allowed request time, then for the global
+        budget. Raises DisallowedByRobots if robots.txt forbids the URL.
+        """
+        await self.get_session()
+        if check_robots and not await self.allowed(url):
+            self.stats["robots_blocked"] += 1
+            raise DisallowedByRobots(url)
+
+        host = self._host(url)
+        async with host.semaphore:
+            async with host.lock:
+                loop = asyncio.get_running_loop()
+                wait = host.next_request_at - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                host.next_request_at = loop.time() + host.delay
+
+            async with self._global_semaphore:
+                self.stats["requests"] += 1
+                yield self.session
+
+    async def allowed(self, url: str) -> bool:
+        """Whether robots.txt permits fetching a URL (fetched once per host)"""
+        if not self.respect_robots:
+            return True
+
+        host = self._host(url)
+        async with host.robots_lock:
+            if host.robots is None:
+                host.robots = await self._load_robots(url)
+                crawl_delay = host.robots.crawl_delay(self.user_agent)
+                if crawl_delay:
+                    host.delay = max(host.delay, float(crawl_delay))
+
+        return host.robots.can_fetch(self.user_agent, url)
+
+    async def _load_robots(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        parser = RobotFileParser(robots_url)
+
+        try:
+            async with self.slot(robots_url, check_robots=False) as session:
+                async with session.get(robots_url) as response:
+                    if response.status == 200:
+                        parser.parse((await response.text(errors='replace')).splitlines())
+                        return parser
+        except Exception as e:
+            logger.warning(f"Could not fetch {robots_url}: {e}")
+
+        # Missing or unreachable robots.txt: everything is allowed
+        parser.parse([])
+        return parser
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay before retry number attempt (1-based), honouring Retry-After seconds"""
+        if retry_after and retry_after.strip().isdigit():
+            return min(float(retry_after), self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * (0.5 + random.random() / 2)
+
+    async def request(self, url: str, send: Callable[[aiohttp.ClientSession], Awaitable[Any]]) -> Any:
+        """
+        Run send(session) under the URL's request slot, retrying with backoff
+
+        Network errors and results whose .status is retryable (429/5xx) are
+        retried up to max_retries times; the last result or error is returned/raised.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self.slot(url) as session:
+                    result = await send(session)
+            except DisallowedByRobots:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt > self.max_retries:
+                    self.stats["errors"] += 1
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Retrying {url} in {delay:.1f}s after error: {e}")
+            else:
+                status = getattr(result, 'status', None)
+                if status not in RETRY_STATUSES or attempt > self.max_retries:
+                    return result
+                delay = self._backoff(attempt, (getattr(result, 'headers', None) or {}).get('Retry-After'))
+                logger.warning(f"Retrying {url} in {delay:.1f}s after HTTP {status}")
+
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def fetch(self, url: str, method: str = 'GET', **request_kwargs) -> FetchResult:
+        """
+        Fetch a URL politely with retries
+
+        Never raises for network or HTTP errors: check FetchResult.ok / .error.
+        """
+        attempts = 0
+
+        async def send(session):
+            nonlocal attempts
+            attempts += 1
+            async with session.request(method, url, **request_kwargs) as response:
+                body = await response.read() if method != 'HEAD' else b''
+                return FetchResult(
+                    url=url,
+                    status=response.status,
+                    final_url=str(response.url),
+                    headers=CIMultiDict(response.headers),
+                    body=body,
+                    encoding=response.charset
+                )
+
+        try:
+            result = await self.request(url, send)
+        except DisallowedByRobots:
+            return FetchResult(url=url, error="Disallowed by robots.txt")
+        except Exception as e:
+            return FetchResult(url=url, error=str(e) or type(e).__name__, attempts=attempts)
+
+        result.attempts = attempts
+        return result
+
+    async def fetch_all(self, urls: Iterable[str], method: str = 'GET', **request_kwargs) -> Dict[str, FetchResult]:
+        """Fetch URLs concurrently within the engine's limits"""
+        urls = list(urls)
+        results = await asyncio.gather(*(self.fetch(url, method, **request_kwargs) for url in urls))
+        return dict(zip(urls, results))
+
+    async def crawl(self,
+                    frontier: CrawlFrontier,
+                    handler: Callable[[FrontierEntry], Any],
+                    max_pages: Optional[int] = None) -> Dict[str, int]:
+        """
+        Drain a frontier, running handler on each entry concurrently
+
+        handler(entry) (sync or async) processes one URL - typically via
+        self.fetch or self.request - and returns links to queue at depth + 1,
+        as URLs or (url, data) tuples. Entries whose handler raises are marked
+        failed; everything else is marked done.
+
+        Returns:
+            Counts of processed and failed entries in this run
+        """
+        processed = failed = 0
+        in_flight: Dict[asyncio.Task, FrontierEntry] = {}
+
+        async def run(entry: FrontierEntry):
+            links = handler(entry)
+            if inspect.isawaitable(links):
+                links = await links
+            return links or []
+
+        while True:
+            budget = self.max_concurrency - len(in_flight)
+            if max_pages is not None:
+                budget = min(budget, max_pages - processed - failed - len(in_flight))
+            for entry in frontier.claim(budget):
+                in_flight[asyncio.ensure_future(run(entry))] = entry
+
+            if not in_flight:
+                break
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                entry = in_flight.pop(task)
+                try:
+                    links = task.result()
+                except Exception as e:
+                    logger.error(f"Failed to process {entry.url}: {e}")
+                    frontier.mark_failed(entry.url, str(e))
+                    failed += 1
+                    continue
+
+                # One frontier write per distinct link payload
+                by_data: Dict[str, List[str]] = {}
+                for link in links:
+                    link_url, data = link if isinstance(link, tuple) else (link, None)
+                    by_data.setdefault(json.dumps(data or {}, sort_keys=True), []).append(link_url)
+                for data, link_urls in by_data.items():
+                    frontier.add_many(link_urls, entry.depth + 1, json.loads(data))
+                frontier.mark_done(entry.url)
+                processed += 1
+
+        return {"processed": processed, "failed": failed, **{f"frontier_{k}": v for k, v in frontier.counts().items()}}
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get request, retry and politeness counters"""
+        return {**self.stats, "hosts": len(self._hosts)}
+
+
+def fetch_urls(urls: Iterable[str], method: str = 'GET',
+               request_kwargs: Optional[Dict[str, Any]] = None,
+               **engine_kwargs) -> Dict[str, FetchResult]:
+    """Synchronously fetch URLs through a temporary CrawlEngine (for non-async callers)"""
+    async def run():
+        async with CrawlEngine(**engine_kwargs) as engine:
+            return await engine.fetch_all(urls, method, **(request_kwargs or {}))
+
+    return asyncio.run(run())
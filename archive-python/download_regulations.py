@@ -6,38 +6,48 @@ Downloads regulatory content using direct HTTP requests
 
 import os
 import json
+import asyncio
 import logging
-import requests
-import time
 import re
 from datetime import datetime
 from typing import Dict, List
 from urllib.parse import urljoin, urlparse, quote
 from pathlib import Path
 
+from crawl_engine import CrawlEngine, CrawlFrontier, FetchError
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class SimpleRegulationMirror:
-    def __init__(self, base_dir: str = "regulations"):
+    def __init__(self, base_dir: str = "regulations", resume: bool = False):
         self.base_dir = base_dir
         self.state_sites = self._get_state_regulatory_sites()
-        self.session = requests.Session()
+        self.resume = resume  # Continue interrupted state crawls from their saved frontier
 
-        # Set up session with realistic headers
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        # Realistic headers for the shared crawl engine
+        self.user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        self.headers = {
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
             'Sec-Fetch-Mode': 'navigate',
             'Sec-Fetch-Site': 'none',
             'Cache-Control': 'max-age=0'
-        })
+        }
+
+    def _create_engine(self, max_retries: int = 3) -> CrawlEngine:
+        """Polite fetcher: states crawl in parallel, each host is rate limited"""
+        return CrawlEngine(
+            max_concurrency=8,
+            per_host_delay=1.0,
+            max_retries=max_retries - 1,
+            timeout=30,
+            user_agent=self.user_agent,
+            headers=self.headers
+        )
 
     def _get_state_regulatory_sites(self) -> Dict[str, Dict[str, str]]:
         """Define main regulatory websites for each state with direct regulation URLs"""
@@ -91,43 +101,33 @@ class SimpleRegulationMirror:
 
     def download_url_content(self, url: str, max_retries: int = 3) -> tuple:
         """Download content from a URL with retries"""
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"Downloading: {url} (attempt {attempt + 1})")
-
-                # Add delay between requests to be respectful
-                if attempt > 0:
-                    time.sleep(2 * attempt)
-
-                response = self.session.get(url, timeout=30, verify=False, allow_redirects=True)
-
-                if response.status_code == 200:
-                    logger.info(f"Successfully downloaded: {url} ({len(response.content)} bytes)")
-                    return True, response.content, response.text
-                elif response.status_code == 403:
-                    logger.warning(f"Access forbidden for {url}, trying different user agent")
-                    # Try with different user agent
-                    headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
-                    response = self.session.get(url, headers=headers, timeout=30, verify=False)
-                    if response.status_code == 200:
-                        return True, response.content, response.text
-                else:
-                    logger.warning(f"HTTP {response.status_code} for {url}")
-
-            except requests.exceptions.SSLError:
-                logger.warning(f"SSL error for {url}, trying HTTP")
-                try:
-                    http_url = url.replace('https://', 'http://')
-                    response = self.session.get(http_url, timeout=30, allow_redirects=True)
-                    if response.status_code == 200:
-                        return True, response.content, response.text
-                except Exception as e:
-                    logger.warning(f"HTTP fallback failed: {e}")
+        async def run():
+            async with self._create_engine(max_retries) as engine:
+                return await self._fetch_content(engine, url)
 
-            except Exception as e:
-                logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+        return asyncio.run(run())
+
+    async def _fetch_content(self, engine: CrawlEngine, url: str) -> tuple:
+        """Fetch a URL through the engine, with user agent and plain-HTTP fallbacks"""
+        logger.info(f"Downloading: {url}")
+
+        # Certificate problems are common on state sites (verify=False)
+        result = await engine.fetch(url, allow_redirects=True, ssl=False)
+
+        if result.status == 403:
+            logger.warning(f"Access forbidden for {url}, trying different user agent")
+            headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
+            result = await engine.fetch(url, headers=headers, ssl=False)
 
-        logger.error(f"Failed to download {url} after {max_retries} attempts")
+        elif result.error and url.startswith('https://') and 'robots' not in result.error:
+            logger.warning(f"Error for {url} ({result.error}), trying HTTP")
+            result = await engine.fetch(url.replace('https://', 'http://', 1), allow_redirects=True)
+
+        if result.status == 200:
+            logger.info(f"Successfully downloaded: {url} ({len(result.body)} bytes)")
+            return True, result.body, result.text()
+
+        logger.error(f"Failed to download {url}: {result.error or f'HTTP {result.status}'}")
         return False, None, None
 
     def extract_regulation_links(self, html_content: str, base_url: str) -> List[str]:
@@ -185,6 +185,14 @@ class SimpleRegulationMirror:
 
     def mirror_state_simple(self, state_code: str) -> bool:
         """Mirror regulatory content for a state using simple HTTP requests"""
+        async def run():
+            async with self._create_engine() as engine:
+                return await self._mirror_state(engine, state_code)
+
+        return asyncio.run(run())
+
+    async def _mirror_state(self, engine: CrawlEngine, state_code: str) -> bool:
+        """Mirror one state through a shared engine, resuming its saved frontier if enabled"""
         if state_code not in self.state_sites:
             logger.error(f"Unknown state: {state_code}")
             return False
@@ -195,65 +203,53 @@ class SimpleRegulationMirror:
 
         logger.info(f"Mirroring {state_info['name']} ({state_code})")
 
-        total_files = 0
-        total_size = 0
-        downloaded_urls = []
+        frontier = CrawlFrontier(state_dir / 'frontier.db')
+        if not self.resume:
+            frontier.reset()
+        else:
+            retried = frontier.retry_failed()
+            if retried:
+                logger.info(f"Retrying {retried} failed URLs for {state_code}")
 
-        # Download main page and regulation pages
+        # Download main page and regulation pages; the index picks the saved filename
         urls_to_download = [state_info['main_url']] + state_info.get('regulation_urls', [])
-
         for i, url in enumerate(urls_to_download):
-            try:
-                success, content, html = self.download_url_content(url)
-
-                if success and content:
-                    # Save the content
-                    filename = self.safe_filename(url, i)
-                    file_path = state_dir / filename
-
-                    with open(file_path, 'wb') as f:
-                        f.write(content)
-
-                    total_files += 1
-                    total_size += len(content)
-                    downloaded_urls.append(url)
-
-                    logger.info(f"Saved: {filename} ({len(content)} bytes)")
-
-                    # Try to extract and download additional regulation links
-                    if html and i == 0:  # Only from main page to avoid too many requests
-                        additional_links = self.extract_regulation_links(html, url)
-                        logger.info(f"Found {len(additional_links)} additional regulation links")
-
-                        for j, link_url in enumerate(additional_links[:5]):  # Limit to 5 additional
-                            try:
-                                link_success, link_content, _ = self.download_url_content(link_url)
-                                if link_success and link_content:
-                                    link_filename = self.safe_filename(link_url, i + j + 10)
-                                    link_path = state_dir / link_filename
-
-                                    with open(link_path, 'wb') as f:
-                                        f.write(link_content)
-
-                                    total_files += 1
-                                    total_size += len(link_content)
-                                    downloaded_urls.append(link_url)
-
-                                    logger.info(f"Saved additional: {link_filename}")
-
-                                    # Be respectful - add delay
-                                    time.sleep(1)
-
-                            except Exception as e:
-                                logger.warning(f"Failed to download additional link {link_url}: {e}")
-                                continue
+            frontier.add(url, depth=0, data={"index": i})
+
+        async def process(entry):
+            success, content, html = await self._fetch_content(engine, entry.url)
+            if not (success and content):
+                raise FetchError(f"Failed to download {entry.url}")
+
+            # Save the content
+            index = entry.data.get("index", 0)
+            filename = self.safe_filename(entry.url, index)
+            with open(state_dir / filename, 'wb') as f:
+                f.write(content)
+
+            logger.info(f"Saved: {filename} ({len(content)} bytes)")
+
+            # Try to extract and download additional regulation links
+            if html and entry.depth == 0 and index == 0:  # Only from main page to avoid too many requests
+                additional_links = self.extract_regulation_links(html, entry.url)
+                logger.info(f"Found {len(additional_links)} additional regulation links")
+                return [(link_url, {"index": index + j + 10})
+                        for j, link_url in enumerate(additional_links[:5])]  # Limit to 5 additional
+            return []
 
-                # Be respectful - add delay between main requests
-                time.sleep(2)
+        try:
+            await engine.crawl(frontier, process)
+            downloaded = frontier.entries('done')
+        finally:
+            frontier.close()
 
-            except Exception as e:
-                logger.error(f"Failed to download {url}: {e}")
-                continue
+        downloaded_urls = [entry.url for entry in downloaded]
+        total_files = len(downloaded)
+        total_size = 0
+        for entry in downloaded:
+            file_path = state_dir / self.safe_filename(entry.url, entry.data.get("index", 0))
+            if file_path.exists():
+                total_size += file_path.stat().st_size
 
         # Create metadata
         metadata = {
@@ -282,14 +278,23 @@ class SimpleRegulationMirror:
         base_path = Path(self.base_dir)
         base_path.mkdir(exist_ok=True)
 
-        results = {}
-        for state_code in self.state_sites.keys():
+        async def mirror(engine, state_code):
             try:
-                results[state_code] = self.mirror_state_simple(state_code)
-                logger.info(f"State {state_code}: {'✅ Success' if results[state_code] else '❌ Failed'}")
+                success = await self._mirror_state(engine, state_code)
+                logger.info(f"State {state_code}: {'✅ Success' if success else '❌ Failed'}")
+                return success
             except Exception as e:
                 logger.error(f"Error mirroring {state_code}: {e}")
-                results[state_code] = False
+                return False
+
+        async def run():
+            # States are separate hosts, so they are mirrored in parallel
+            async with self._create_engine() as engine:
+                state_codes = list(self.state_sites.keys())
+                successes = await asyncio.gather(*(mirror(engine, code) for code in state_codes))
+                return dict(zip(state_codes, successes))
+
+        results = asyncio.run(run())
 
         # Create summary
         summary = {
@@ -313,9 +318,15 @@ class SimpleRegulationMirror:
 
 def main():
     """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mirror state cannabis regulation websites")
+    parser.add_argument('--resume', action='store_true', help='Resume interrupted state crawls (failed URLs are retried)')
+    args = parser.parse_args()
+
     logger.info("🌐 Starting Simple Regulation Mirror")
 
-    mirror = SimpleRegulationMirror()
+    mirror = SimpleRegulationMirror(resume=args.resume)
     results = mirror.mirror_all_states()
 
     successful = sum(results.values())
@@ -0,0 +1,303 @@
+"""
+Embedding Utilities for Cannabis AI Agents
+Batched, content-hash-deduplicated embedding generation with a persistent
+on-disk cache shared by all vectorizers
+"""
+import os
+import hashlib
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+EmbedFunction = Callable[[List[str]], List[List[float]]]
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "formul8" / "embedding_cache.db"
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of text content used to deduplicate embeddings"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def default_cache_path() -> Path:
+    """Embedding cache location, overridable with EMBEDDING_CACHE_PATH"""
+    return Path(os.getenv("EMBEDDING_CACHE_PATH", str(DEFAULT_CACHE_PATH)))
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache keyed by (model name, content hash)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else default_cache_path()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (model_name, content_hash)
+            )
+        ''')
+        self.conn.commit()
+
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    def get_many(self, model_name: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """Look up cached embeddings, returning only the hashes that were found"""
+        found: Dict[str, List[float]] = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+
+        with self.lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(unique_hashes), 500):
+                chunk = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT content_hash, vector FROM embeddings "
+                    f"WHERE model_name = ? AND content_hash IN ({placeholders})",
+                    [model_name, *chunk]
+                )
+                for text_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[text_hash] = vector.tolist()
+
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(unique_hashes) - len(found)
+
+        return found
+
+    def set_many(self, model_name: str, items: Iterable[Tuple[str, Sequence[float]]]):
+        """Store embeddings for (content hash, vector) pairs"""
+        created_at = datetime.now().isoformat()
+        rows = [
+            (model_name, text_hash, len(vector), array("f", vector).tobytes(), created_at)
+            for text_hash, vector in items
+        ]
+        if not rows:
+            return
+
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(model_name, content_hash, dimension, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+            self.stats["writes"] += len(rows)
+
+    def count(self, model_name: Optional[str] = None) -> int:
+        """Number of cached embeddings, optionally for one model"""
+        with self.lock:
+            if model_name:
+                row = self.conn.execute(
+                    "SELECT COUNT(*) FROM embeddings WHERE model_name = ?", (model_name,)
+                ).fetchone()
+            else:
+                row = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return row[0]
+
+    def get_statistics(self) -> Dict[str, object]:
+        """Get cache hit/miss statistics"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "cache_path": str(self.db_path),
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "writes": self.stats["writes"],
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self.lock:
+            self.conn.close()
+
+
+_shared_caches: Dict[str, EmbeddingCache] = {}
+_shared_caches_lock = threading.Lock()
+
+
+def get_shared_embedding_cache(db_path: Optional[str] = None) -> EmbeddingCache:
+    """Get the process-wide embedding cache for a database path"""
+    path = str(Path(db_path) if db_path else default_cache_path())
+    with _shared_caches_lock:
+        if path not in _shared_caches:
+            _shared_caches[path] = EmbeddingCache(path)
+        return _shared_caches[path]
+
+
+class BatchedEmbedder:
+    """Embeds texts in batches, skipping any text whose embedding is already known"""
+
+    def __init__(self,
+                 embed_fn: EmbedFunction,
+                 batch_size: int = 100,
+                 cache: Optional[EmbeddingCache] = None,
+                 model_name: str = "default",
+                 max_known: int = 10000):
+        """
+        Initialize batched embedder
+
+        Args:
+            embed_fn: Function mapping a list of texts to a list of embeddings
+            batch_size: Maximum number of texts sent per embedding call
+            cache: Optional persistent cache consulted before calling the model
+            model_name: Model name used to key cached embeddings
+            max_known: Most recently used embeddings kept in memory; older ones
+                are evicted (and re-read from the persistent cache if needed)
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if max_known < 0:
+            raise ValueError("max_known must not be negative")
+
+        self.embed_fn = embed_fn
+        self.batch_size = batch_size
+        self.cache = cache
+        self.model_name = model_name
+        self.max_known = max_known
+        self.known_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+
+        self.stats = {
+            "texts_requested": 0,
+            "texts_embedded": 0,
+            "embedding_calls": 0
+        }
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Embed texts, calling the model only for unseen content
+
+        Args:
+            texts: Texts to embed (duplicates allowed)
+
+        Returns:
+            One embedding per input text, in input order
+        """
+        hashes = [content_hash(text) for text in texts]
+        self.stats["texts_requested"] += len(texts)
+
+        # Embeddings for this call; kept apart from the bounded map so eviction
+        # can't drop a vector before it is returned
+        found: Dict[str, List[float]] = {}
+        pending: Dict[str, str] = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash in found or text_hash in pending:
+                continue
+            if text_hash in self.known_embeddings:
+                self.known_embeddings.move_to_end(text_hash)
+                found[text_hash] = self.known_embeddings[text_hash]
+            else:
+                pending[text_hash] = text
+
+        # Consult the persistent cache before calling the model
+        if self.cache and pending:
+            cached = self.cache.get_many(self.model_name, list(pending))
+            found.update(cached)
+            self._remember(cached.items())
+            for text_hash in cached:
+                del pending[text_hash]
+
+        pending_items = list(pending.items())
+        for start in range(0, len(pending_items), self.batch_size):
+            batch = pending_items[start:start + self.batch_size]
+            embeddings = self.embed_fn([text for _, text in batch])
+
+            if len(embeddings) != len(batch):
+                raise ValueError(
+                    f"Embedding function returned {len(embeddings)} vectors for {len(batch)} texts"
+                )
+
+            embedded = [(text_hash, list(embedding)) for (text_hash, _), embedding in zip(batch, embeddings)]
+            found.update(embedded)
+            self._remember(embedded)
+
+            if self.cache:
+                self.cache.set_many(self.model_name, embedded)
+
+            self.stats["embedding_calls"] += 1
+            self.stats["texts_embedded"] += len(batch)
+
+        return [found[text_hash] for text_hash in hashes]
+
+    def _remember(self, items: Iterable[Tuple[str, List[float]]]):
+        """Add embeddings to the in-memory map, evicting the least recently used"""
+        for text_hash, embedding in items:
+            self.known_embeddings[text_hash] = embedding
+            self.known_embeddings.move_to_end(text_hash)
+        while len(self.known_embeddings) > self.max_known:
+            self.known_embeddings.popitem(last=False)
+
+    def embed_one(self, text: str) -> List[float]:
+        """Embed a single text"""
+        return self.embed([text])[0]
+
+    def get_statistics(self) -> Dict[str, object]:
+        """Get embedding call and cache statistics"""
+        stats: Dict[str, object] = dict(self.stats)
+        stats["texts_deduplicated"] = self.stats["texts_requested"] - self.stats["texts_embedded"]
+        stats["known_embeddings"] = len(self.known_embeddings)
+        if self.cache:
+            stats["cache"] = self.cache.get_statistics()
+        return stats
+
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class Embedder(ABC):
+    """
+    Pluggable text embedder
+
+    Implementations provide a model name (which keys cached embeddings) and a
+    batch encode method.
+    """
+    model_name = "default"
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts"""
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Local sentence-transformers model, loaded on first use"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, batch_size: int = 100,
+                 device: Optional[str] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self._model = None
+        # One model instance is shared by concurrent pipelines; encode calls take turns
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name, device=self.device)
+            return self._model
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        model = self.model
+        with self._lock:
+            embeddings = model.encode(
+                texts,
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+        return embeddings.tolist()
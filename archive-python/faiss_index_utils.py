@@ -0,0 +1,142 @@
+"""
+FAISS Index Utilities for Cannabis AI Agents
+Configurable exact (flat) and approximate (IVF, HNSW) vector indexes with
+recall-vs-latency evaluation against exact search
+"""
+import math
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import faiss
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+
+def default_nlist(n_vectors: int) -> int:
+    """Number of IVF clusters for a corpus size (~4 * sqrt(n), at least 1)"""
+    return max(1, int(4 * math.sqrt(max(n_vectors, 1))))
+
+
+def create_faiss_index(index_type: str,
+                       dimension: int,
+                       metric: int = faiss.METRIC_INNER_PRODUCT,
+                       training_vectors: Optional[np.ndarray] = None,
+                       nlist: Optional[int] = None,
+                       hnsw_m: int = 32,
+                       ef_construction: int = 200):
+    """
+    Create an empty FAISS index of the requested type
+
+    Args:
+        index_type: "flat" (exact), "ivf" (inverted file) or "hnsw" (graph)
+        dimension: Vector dimension
+        metric: faiss.METRIC_INNER_PRODUCT or faiss.METRIC_L2
+        training_vectors: Vectors used to train the IVF quantizer (required for "ivf")
+        nlist: Number of IVF clusters (defaults to ~4 * sqrt(n))
+        hnsw_m: HNSW graph degree
+        ef_construction: HNSW construction-time candidate list size
+
+    Returns:
+        A ready-to-add FAISS index
+    """
+    if index_type == "flat":
+        if metric == faiss.METRIC_INNER_PRODUCT:
+            return faiss.IndexFlatIP(dimension)
+        return faiss.IndexFlatL2(dimension)
+
+    if index_type == "ivf":
+        if training_vectors is None or len(training_vectors) == 0:
+            raise ValueError("IVF index requires training vectors")
+
+        # Every cluster needs at least one training point
+        nlist = min(nlist or default_nlist(len(training_vectors)), len(training_vectors))
+        quantizer = faiss.IndexFlatIP(dimension) if metric == faiss.METRIC_INNER_PRODUCT else faiss.IndexFlatL2(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        index.train(np.ascontiguousarray(training_vectors, dtype='float32'))
+        return index
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, metric)
+        index.hnsw.efConstruction = ef_construction
+        return index
+
+    raise ValueError(f"Unknown index type: {index_type}. Expected one of {INDEX_TYPES}")
+
+
+def supports_remove(index) -> bool:
+    """Whether vectors can be removed from the index in place (HNSW graphs cannot)"""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return not isinstance(index, faiss.IndexHNSW)
+
+
+def set_search_params(index, nprobe: int = 16, ef_search: int = 64):
+    """Apply query-time accuracy parameters to IVF and HNSW indexes"""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(nprobe, index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = max(ef_search, 1)
+
+
+def evaluate_index_types(vectors: np.ndarray,
+                         queries: np.ndarray,
+                         k: int = 10,
+                         index_types: List[str] = INDEX_TYPES,
+                         metric: int = faiss.METRIC_INNER_PRODUCT,
+                         nprobe: int = 16,
+                         ef_search: int = 64,
+                         nlist: Optional[int] = None,
+                         hnsw_m: int = 32) -> Dict[str, Dict]:
+    """
+    Compare each index type against exact flat search on the same queries
+
+    Args:
+        vectors: Corpus vectors (normalized for inner product)
+        queries: Query vectors
+        k: Number of neighbours per query
+        index_types: Index types to evaluate
+
+    Returns:
+        Per index type: recall@k versus flat search, build time and query latency
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    dimension = vectors.shape[1]
+    k = min(k, len(vectors))
+
+    exact = create_faiss_index("flat", dimension, metric)
+    exact.add(vectors)
+    _, exact_ids = exact.search(queries, k)
+
+    report = {}
+    for index_type in index_types:
+        build_start = time.perf_counter()
+        index = create_faiss_index(index_type, dimension, metric,
+                                   training_vectors=vectors, nlist=nlist, hnsw_m=hnsw_m)
+        index.add(vectors)
+        set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+        build_seconds = time.perf_counter() - build_start
+
+        search_start = time.perf_counter()
+        _, ids = index.search(queries, k)
+        search_seconds = time.perf_counter() - search_start
+
+        matches = sum(
+            len(set(found[found >= 0].tolist()) & set(expected[expected >= 0].tolist()))
+            for found, expected in zip(ids, exact_ids)
+        )
+
+        report[index_type] = {
+            "recall_at_k": matches / float(len(queries) * k) if len(queries) else 0.0,
+            "build_seconds": build_seconds,
+            "mean_query_ms": 1000.0 * search_seconds / max(len(queries), 1),
+            "k": k,
+            "total_vectors": len(vectors),
+            "total_queries": len(queries)
+        }
+
+    return report
@@ -0,0 +1,125 @@
+"""
+Streaming File Hashing for Document Ingest
+
+Hashes files in fixed-size chunks so memory stays flat regardless of file
+size, offers fast algorithms for dedup (BLAKE2b, or xxHash when installed)
+and caches digests by (size, mtime) so unchanged files are not re-read.
+"""
+import os
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Union
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+HASH_ALGORITHMS = ("md5", "sha256", "blake2b", "xxh3_128")
+
+
+def new_hasher(algorithm: str = "sha256"):
+    """
+    Create a hasher by name
+
+    "blake2b" uses a 128-bit digest (fast dedup keys); "xxh3_128" is a
+    non-cryptographic hash that requires the optional xxhash package.
+    """
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == "xxh3_128":
+        if xxhash is None:
+            raise ValueError("xxh3_128 requires the xxhash package (pip install xxhash)")
+        return xxhash.xxh3_128()
+    if algorithm in ("md5", "sha256"):
+        return hashlib.new(algorithm)
+    raise ValueError(f"Unknown hash algorithm: {algorithm}. Expected one of {HASH_ALGORITHMS}")
+
+
+def update_from_stream(hasher, stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Feed a binary stream into a hasher chunk by chunk; returns the hasher"""
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        hasher.update(chunk)
+    return hasher
+
+
+def update_from_file(hasher, path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Feed a file's contents into a hasher chunk by chunk; returns the hasher"""
+    with open(path, 'rb') as f:
+        return update_from_stream(hasher, f, chunk_size)
+
+
+def hash_file(path: Union[str, Path], algorithm: str = "sha256",
+              chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Hex digest of a file, read in fixed-size chunks"""
+    return update_from_file(new_hasher(algorithm), path, chunk_size).hexdigest()
+
+
+class FileHashCache:
+    """
+    SQLite cache of file digests keyed by path and algorithm
+
+    A stored digest is reused while the file's size and mtime are unchanged,
+    so repeated ingest runs skip re-reading files that did not change.
+    """
+
+    def __init__(self, db_path: Union[str, Path], algorithm: str = "sha256",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        new_hasher(algorithm)  # Validate early
+        self.algorithm = algorithm
+        self.chunk_size = chunk_size
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (path, algorithm)
+            )
+        ''')
+        self.conn.commit()
+
+        self.stats = {"stat_hits": 0, "hashed": 0, "bytes_hashed": 0}
+
+    def get_hash(self, path: Union[str, Path]) -> str:
+        """Digest of a file, re-hashing only if its size or mtime changed"""
+        path = str(Path(path).resolve())
+        stat = os.stat(path)
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, digest FROM file_hashes WHERE path = ? AND algorithm = ?",
+                (path, self.algorithm)
+            ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            self.stats["stat_hits"] += 1
+            return row[2]
+
+        digest = hash_file(path, self.algorithm, self.chunk_size)
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?)",
+                    (path, self.algorithm, stat.st_size, stat.st_mtime_ns, digest)
+                )
+        self.stats["hashed"] += 1
+        self.stats["bytes_hashed"] += stat.st_size
+        return digest
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get stat-shortcut hit and hashing counters"""
+        return {"algorithm": self.algorithm, **self.stats}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
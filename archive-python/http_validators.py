@@ -0,0 +1,179 @@
+"""
+HTTP Validator Store for Incremental Crawling
+
+Persists each URL's ETag, Last-Modified and body hash in SQLite so later
+fetches send If-None-Match / If-Modified-Since and a 304 Not Modified
+response is treated as unchanged without downloading or parsing the page.
+New validators are only stored when the caller commits a response after
+saving its content, so a failed save is retried on the next fetch.
+"""
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+
+@dataclass
+class ConditionalResponse:
+    """Result of a conditional GET"""
+    url: str
+    status: int
+    not_modified: bool = False
+    body: Optional[bytes] = None
+    encoding: Optional[str] = None
+    content_hash: Optional[str] = None
+    changed: bool = True
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def text(self) -> str:
+        """Decode the body using the response charset (UTF-8 fallback)"""
+        if self.body is None:
+            return ""
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class HTTPValidatorStore:
+    """SQLite-backed store of per-URL HTTP cache validators"""
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                fetched_at TEXT NOT NULL,
+                checked_at TEXT NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+        self.stats = {"not_modified": 0, "unchanged": 0, "changed": 0}
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored validators for a URL, or None if it was never fetched"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content_hash, fetched_at, checked_at FROM validators WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("etag", "last_modified", "content_hash", "fetched_at", "checked_at"), row))
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a URL"""
+        stored = self.get(url)
+        headers = {}
+        if stored:
+            if stored["etag"]:
+                headers['If-None-Match'] = stored["etag"]
+            if stored["last_modified"]:
+                headers['If-Modified-Since'] = stored["last_modified"]
+        return headers
+
+    def record(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str):
+        """Store validators after a full (200) response"""
+        now = datetime.now().isoformat()
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, content_hash, now, now)
+                )
+
+    def commit(self, response: ConditionalResponse):
+        """Store a full response's validators once the caller has saved its content"""
+        if response.status == 200 and response.content_hash:
+            self.record(response.url, response.etag, response.last_modified, response.content_hash)
+
+    def touch(self, url: str):
+        """Mark a URL as checked (e.g. after a 304)"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE validators SET checked_at = ? WHERE url = ?",
+                    (datetime.now().isoformat(), url)
+                )
+
+    def forget(self, url: str):
+        """Drop a URL's validators so the next fetch is unconditional"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM validators WHERE url = ?", (url,))
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get store size and conditional fetch outcome counts"""
+        with self.lock:
+            total_urls = self.conn.execute("SELECT COUNT(*) FROM validators").fetchone()[0]
+        return {"db_path": str(self.db_path), "total_urls": total_urls, **self.stats}
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self.lock:
+            self.conn.close()
+
+
+async def conditional_get(session: aiohttp.ClientSession, url: str,
+                          store: HTTPValidatorStore, conditional: bool = True,
+                          **request_kwargs) -> ConditionalResponse:
+    """
+    GET a URL, sending stored validators
+
+    A 304 response returns not_modified=True with no body. A 200 response whose
+    body hash matches the stored hash (servers without validator support)
+    returns changed=False. Any other status returns the status with no body.
+
+    A 200 response carries the new validators but does not store them: call
+    store.commit(response) after its content has been saved. Until then the
+    URL is still reported as changed.
+
+    Args:
+        session: aiohttp session to fetch with
+        url: URL to fetch
+        store: Validator store
+        conditional: Send stored validators and compare hashes (False always
+            downloads and reports the body as changed)
+        **request_kwargs: Passed through to session.get (e.g. timeout)
+    """
+    headers = dict(request_kwargs.pop('headers', None) or {})
+    if conditional:
+        headers.update(store.conditional_headers(url))
+
+    async with session.get(url, headers=headers, **request_kwargs) as response:
+        if response.status == 304:
+            store.touch(url)
+            store.stats["not_modified"] += 1
+            return ConditionalResponse(url=url, status=304, not_modified=True, changed=False)
+
+        if response.status != 200:
+            return ConditionalResponse(url=url, status=response.status)
+
+        body = await response.read()
+        content_hash = hashlib.sha256(body).hexdigest()
+        stored = store.get(url) if conditional else None
+        changed = stored is None or stored["content_hash"] != content_hash
+
+        store.stats["changed" if changed else "unchanged"] += 1
+
+        return ConditionalResponse(
+            url=url,
+            status=200,
+            body=body,
+            encoding=response.charset,
+            content_hash=content_hash,
+            changed=changed,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
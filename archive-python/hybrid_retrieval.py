@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Hybrid Retrieval Utilities for Cannabis Compliance
+
+Fuses ranked result lists from vector and keyword search with reciprocal
+rank fusion and trims the fused list to a prompt token budget.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+def reciprocal_rank_fusion(ranked_lists: Dict[str, Sequence[Dict]],
+                           id_key: Callable[[Dict], str],
+                           k: int = 60) -> List[Dict]:
+    """
+    Fuse ranked lists with reciprocal rank fusion
+
+    Each item scores sum(1 / (k + rank)) over the lists it appears in, so items
+    ranked well by several retrievers rise to the top. Items are deduplicated by ID;
+    the first occurrence (in list order) is kept as the representative item.
+
+    Args:
+        ranked_lists: Source name -> results ordered best first
+        id_key: Function returning an item's unique ID
+        k: RRF damping constant
+
+    Returns:
+        Fused entries ordered by fusion score, each with "id", "item",
+        "fusion_score", "sources" and per-source "ranks"
+    """
+    fused: Dict[str, Dict] = {}
+
+    for source, results in ranked_lists.items():
+        for rank, item in enumerate(results, 1):
+            item_id = id_key(item)
+            entry = fused.get(item_id)
+            if entry is None:
+                entry = fused[item_id] = {
+                    "id": item_id,
+                    "item": item,
+                    "fusion_score": 0.0,
+                    "sources": [],
+                    "ranks": {}
+                }
+            if source in entry["ranks"]:
+                continue  # Duplicate within one list: keep its best rank
+            entry["fusion_score"] += 1.0 / (k + rank)
+            entry["sources"].append(source)
+            entry["ranks"][source] = rank
+
+    return sorted(fused.values(), key=lambda entry: entry["fusion_score"], reverse=True)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def apply_token_budget(items: Sequence[Dict],
+                       item_text: Callable[[Dict], str],
+                       token_budget: int,
+                       max_items: Optional[int] = None) -> List[Dict]:
+    """
+    Keep items in order until the token budget is spent
+
+    The first item is always kept so a query never ends up with no context.
+    """
+    selected = []
+    used_tokens = 0
+
+    for item in items:
+        if max_items is not None and len(selected) >= max_items:
+            break
+
+        tokens = estimate_tokens(item_text(item))
+        if selected and used_tokens + tokens > token_budget:
+            break
+
+        selected.append(item)
+        used_tokens += tokens
+
+    return selected
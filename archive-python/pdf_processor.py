@@ -6,17 +6,21 @@ Extracts text from all downloaded PDFs and creates searchable,
 structured data for compliance analysis.
 """
 
+import io
 import os
 import json
 import logging
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
-import hashlib
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import threading
 
+from bm25_index import BM25Index, highlight_snippet
+from file_hashing import HASH_ALGORITHMS, FileHashCache
+
 # PDF processing libraries
 try:
     import PyPDF2
@@ -36,11 +40,170 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class PageTextCache:
+    """
+    SQLite cache of extracted text keyed by (file hash, page number, extractor)
+    
+    A document row marks that an extractor finished a file, so pages that
+    yielded no text are not re-extracted either. An extractor error is
+    recorded with its class and the library version, and is retried once
+    the library changes or the entry is older than failure_ttl seconds.
+    Safe to share between worker processes (WAL mode with a busy timeout).
+    """
+    
+    def __init__(self, db_path: Path, failure_ttl: float = 7 * 24 * 3600):
+        self.db_path = Path(db_path)
+        self.failure_ttl = failure_ttl
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS page_text (
+                file_hash TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                extractor TEXT NOT NULL,
+                entries TEXT NOT NULL,
+                PRIMARY KEY (file_hash, page, extractor)
+            );
+            CREATE TABLE IF NOT EXISTS extracted_documents (
+                file_hash TEXT NOT NULL,
+                extractor TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                extracted_at TEXT NOT NULL,
+                PRIMARY KEY (file_hash, extractor)
+            );
+        ''')
+        self.conn.commit()
+    
+    def get_document(self, file_hash: str, extractor: str,
+                     library_version: Optional[str] = None) -> Optional[Dict]:
+        """
+        Cached extraction result for a file, or None if the extractor never ran on it
+        
+        A recorded failure comes back as {"success": False, "error": ...} while it
+        is current: from the same library version and younger than failure_ttl.
+        A stale failure is treated as never having run.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT metadata, extracted_at FROM extracted_documents WHERE file_hash = ? AND extractor = ?",
+                (file_hash, extractor)
+            ).fetchone()
+            if row is None:
+                return None
+            metadata = json.loads(row[0])
+            if metadata.get("failed"):
+                age = (datetime.now() - datetime.fromisoformat(row[1])).total_seconds()
+                if metadata.get("library_version") != library_version or age >= self.failure_ttl:
+                    return None
+                return {"success": False, "error": metadata.get("error")}
+            pages = self.conn.execute(
+                "SELECT entries FROM page_text WHERE file_hash = ? AND extractor = ? ORDER BY page",
+                (file_hash, extractor)
+            ).fetchall()
+        
+        text_content = [entry for (entries,) in pages for entry in json.loads(entries)]
+        return {"text_content": text_content, "metadata": metadata, "success": True}
+    
+    def put_document(self, file_hash: str, extractor: str, extraction: Dict):
+        """Store an extractor's result page by page"""
+        by_page: Dict[int, List[Dict]] = {}
+        for entry in extraction["text_content"]:
+            by_page.setdefault(entry["page"], []).append(entry)
+        
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO page_text VALUES (?, ?, ?, ?)",
+                    [(file_hash, page, extractor, json.dumps(entries, ensure_ascii=False))
+                     for page, entries in by_page.items()]
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO extracted_documents VALUES (?, ?, ?, ?)",
+                    (file_hash, extractor, json.dumps(extraction["metadata"]), datetime.now().isoformat())
+                )
+    
+    def get_pages(self, file_hash: str, extractor: str, pages: List[int]) -> Dict[int, List[Dict]]:
+        """Cached entries for specific pages (pages never extracted are absent)"""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT page, entries FROM page_text WHERE file_hash = ? AND extractor = ? "
+                f"AND page IN ({','.join('?' * len(pages))})",
+                (file_hash, extractor, *pages)
+            ).fetchall()
+        return {page: json.loads(entries) for page, entries in rows}
+    
+    def put_pages(self, file_hash: str, extractor: str, by_page: Dict[int, List[Dict]]):
+        """Store entries for individual pages (an empty list records a page with no text)"""
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO page_text VALUES (?, ?, ?, ?)",
+                    [(file_hash, page, extractor, json.dumps(entries, ensure_ascii=False))
+                     for page, entries in by_page.items()]
+                )
+    
+    def put_failure(self, file_hash: str, extractor: str, error: str, library_version: str):
+        """Record that an extractor raised on a file, so it is not retried until the failure is stale"""
+        metadata = {"failed": True, "error": error, "library_version": library_version}
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO extracted_documents VALUES (?, ?, ?, ?)",
+                    (file_hash, extractor, json.dumps(metadata), datetime.now().isoformat())
+                )
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# Library behind each cached extraction method; its version is stored with failures
+EXTRACTOR_LIBRARIES = {
+    "extract_with_pdfplumber": pdfplumber,
+    "extract_with_pymupdf": fitz,
+    "extract_with_pypdf2": PyPDF2
+}
+
+def library_version(extractor: str) -> str:
+    """Version of the library an extraction method uses"""
+    return str(getattr(EXTRACTOR_LIBRARIES.get(extractor), "__version__", "unknown"))
+
+# Per-process processor used by process-pool workers
+_worker_processor = None
+
+_worker_settings = None
+
+def _extract_pdf_in_worker(base_dir: str, pdf_path: str, settings: Dict) -> Dict:
+    """Process-pool entry point: extract one PDF with a per-process PDFProcessor"""
+    global _worker_processor, _worker_settings
+    if _worker_processor is None or _worker_settings != (base_dir, settings):
+        _worker_processor = PDFProcessor(base_dir, use_processes=False, **settings)
+        _worker_settings = (base_dir, settings)
+    return _worker_processor.extract_pdf(Path(pdf_path))
+
 class PDFProcessor:
-    def __init__(self, base_dir: str = "compliance_data"):
+    def __init__(self, base_dir: str = "compliance_data", use_processes: bool = True,
+                 max_workers: Optional[int] = None, use_cache: bool = True,
+                 hash_algorithm: str = "blake2b", min_page_chars: int = 50):
         self.base_dir = Path(base_dir)
         self.states_dir = self.base_dir / "states"
         
+        # Extraction is CPU-bound: processes sidestep the GIL, sized to the cores
+        self.use_processes = use_processes
+        self.max_workers = max_workers or ((os.cpu_count() or 4) if use_processes else 4)
+        
+        # Extracted text per (file hash, page, extractor), reused across runs
+        self.page_cache = PageTextCache(self.base_dir / "pdf_text_cache.db") if use_cache else None
+        
+        # Streaming file hashes, skipped for files whose size and mtime are unchanged
+        self.hash_cache = FileHashCache(self.base_dir / "pdf_file_hashes.db", algorithm=hash_algorithm)
+        
+        # Page-level BM25 index over extracted text, updated as PDFs are recorded
+        self.search_index_file = self.base_dir / "pdf_search_index.db"
+        self._search_index = None
+        
         # Processing statistics
         self.stats = {
             "total_pdfs": 0,
@@ -54,15 +217,26 @@ class PDFProcessor:
         # Thread safety
         self.lock = threading.Lock()
         
-        # Text extraction methods priority order
-        self.extraction_methods = [
+        # Text-layer extraction methods priority order; OCR only runs on pages
+        # that none of them could read
+        self.text_extractors = [
             self.extract_with_pdfplumber,
             self.extract_with_pymupdf,
-            self.extract_with_pypdf2,
-            self.extract_with_ocr
+            self.extract_with_pypdf2
         ]
+        self.extraction_methods = self.text_extractors + [self.extract_with_ocr]
+        
+        # A page with fewer text characters than this is treated as image-only
+        self.min_page_chars = min_page_chars
+
+    @property
+    def search_index(self) -> BM25Index:
+        """Full-text index (opened on first use, so extraction workers never touch it)"""
+        if self._search_index is None:
+            self._search_index = BM25Index(str(self.search_index_file))
+        return self._search_index
 
-    def extract_with_pdfplumber(self, pdf_path: Path) -> Optional[Dict]:
+    def extract_with_pdfplumber(self, pdf_path: Path) -> Dict:
         """Extract text using pdfplumber (best for structured documents)"""
         try:
             with pdfplumber.open(pdf_path) as pdf:
@@ -105,9 +279,9 @@ class PDFProcessor:
         
         except Exception as e:
             logger.debug(f"pdfplumber failed for {pdf_path}: {str(e)}")
-            return None
+            raise
 
-    def extract_with_pymupdf(self, pdf_path: Path) -> Optional[Dict]:
+    def extract_with_pymupdf(self, pdf_path: Path) -> Dict:
         """Extract text using PyMuPDF (good for complex layouts)"""
         try:
             doc = fitz.open(pdf_path)
@@ -143,9 +317,9 @@ class PDFProcessor:
         
         except Exception as e:
             logger.debug(f"PyMuPDF failed for {pdf_path}: {str(e)}")
-            return None
+            raise
 
-    def extract_with_pypdf2(self, pdf_path: Path) -> Optional[Dict]:
+    def extract_with_pypdf2(self, pdf_path: Path) -> Dict:
         """Extract text using PyPDF2 (fallback method)"""
         try:
             with open(pdf_path, 'rb') as file:
@@ -173,47 +347,40 @@ class PDFProcessor:
         
         except Exception as e:
             logger.debug(f"PyPDF2 failed for {pdf_path}: {str(e)}")
-            return None
+            raise
+
+    def ocr_page(self, page) -> str:
+        """OCR a single PyMuPDF page"""
+        mat = fitz.Matrix(2, 2)  # 2x zoom for better OCR
+        pix = page.get_pixmap(matrix=mat)
+        image = Image.open(io.BytesIO(pix.tobytes("png")))
+        return pytesseract.image_to_string(image)
 
-    def extract_with_ocr(self, pdf_path: Path) -> Optional[Dict]:
-        """Extract text using OCR (last resort for scanned documents)"""
+    def extract_with_ocr(self, pdf_path: Path, pages: Optional[List[int]] = None) -> Optional[Dict]:
+        """Extract text using OCR (last resort for scanned documents), optionally for given pages only"""
         try:
             doc = fitz.open(pdf_path)
             text_content = []
             metadata = {
                 "pages": len(doc),
                 "method": "ocr",
-                "ocr_confidence": []
+                "ocr_confidence": [],
+                "ocr_failed_pages": []
             }
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Convert page to image
-                mat = fitz.Matrix(2, 2)  # 2x zoom for better OCR
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-                # Save temporary image
-                temp_img_path = f"/tmp/temp_page_{page_num}.png"
-                with open(temp_img_path, "wb") as img_file:
-                    img_file.write(img_data)
-                
-                # Perform OCR
+            for page_num in (pages or range(1, len(doc) + 1)):
                 try:
-                    ocr_text = pytesseract.image_to_string(temp_img_path)
+                    ocr_text = self.ocr_page(doc[page_num - 1])
                     if ocr_text.strip():
                         text_content.append({
-                            "page": page_num + 1,
+                            "page": page_num,
                             "text": ocr_text.strip(),
                             "char_count": len(ocr_text)
                         })
                     
-                    # Clean up temporary file
-                    os.remove(temp_img_path)
-                    
                 except Exception as ocr_error:
                     logger.debug(f"OCR failed for page {page_num}: {str(ocr_error)}")
+                    metadata["ocr_failed_pages"].append(page_num)
                     continue
             
             doc.close()
@@ -230,6 +397,38 @@ class PDFProcessor:
 
     def process_pdf(self, pdf_path: Path, state_dir: Path) -> Dict:
         """Process a single PDF file with multiple extraction methods"""
+        return self._record_result(self.extract_pdf(pdf_path), pdf_path, state_dir)
+
+    def _extract_with_cache(self, method, pdf_path: Path, file_hash: str) -> Optional[Dict]:
+        """
+        Run an extraction method, reusing cached page text for this file and method
+        
+        A run that succeeds (even with no text) is cached for good; an error is
+        cached with its class and library version and re-raised. Returns None
+        while a cached failure is current.
+        """
+        extractor = method.__name__
+        version = library_version(extractor)
+        if self.page_cache:
+            cached = self.page_cache.get_document(file_hash, extractor, version)
+            if cached is not None:
+                if not cached["success"]:
+                    return None
+                cached["from_cache"] = True
+                return cached
+        
+        try:
+            extraction_result = method(pdf_path)
+        except Exception as e:
+            if self.page_cache:
+                self.page_cache.put_failure(file_hash, extractor, type(e).__name__, version)
+            raise
+        if self.page_cache and extraction_result and extraction_result["success"]:
+            self.page_cache.put_document(file_hash, extractor, extraction_result)
+        return extraction_result
+
+    def extract_pdf(self, pdf_path: Path) -> Dict:
+        """Extract a PDF's text (no statistics or output files; safe to run in a worker process)"""
         logger.info(f"Processing PDF: {pdf_path}")
         
         # Initialize result
@@ -246,39 +445,140 @@ class PDFProcessor:
         }
         
         # Generate file hash for uniqueness
-        with open(pdf_path, 'rb') as f:
-            file_hash = hashlib.md5(f.read()).hexdigest()
+        file_hash = self.hash_cache.get_hash(pdf_path)
         
         result["file_hash"] = file_hash
-        
-        # Try extraction methods in order of preference
-        for method in self.extraction_methods:
+        result["hash_algorithm"] = self.hash_cache.algorithm
+        
+        # Primary text layer: the first extraction method that can read the file
+        primary = None
+        fallbacks = []
+        for method in self.text_extractors:
+            if primary is not None:
+                fallbacks.append(method)
+                continue
             try:
-                extraction_result = method(pdf_path)
+                extraction_result = self._extract_with_cache(method, pdf_path, file_hash)
                 if extraction_result and extraction_result["success"]:
-                    result.update(extraction_result)
-                    result["extraction_method"] = extraction_result["metadata"]["method"]
-                    result["success"] = True
-                    break
+                    primary = extraction_result
             except Exception as e:
                 error_msg = f"Method {method.__name__} failed: {str(e)}"
                 result["errors"].append(error_msg)
                 logger.debug(error_msg)
         
+        try:
+            if primary is not None:
+                page_count = primary["metadata"]["pages"]
+                pages = self._tag_pages(primary)
+            else:
+                with fitz.open(pdf_path) as doc:
+                    page_count = len(doc)
+                pages = {}
+        except Exception as e:
+            result["errors"].append(f"Could not read page count: {str(e)}")
+            return result
+        
+        # Pages whose text layer is too thin: try the other text extractors, then OCR
+        weak_pages = [page for page in range(1, page_count + 1)
+                      if self._page_chars(pages.get(page)) < self.min_page_chars]
+        for method in fallbacks:
+            if not weak_pages:
+                break
+            try:
+                extraction_result = self._extract_with_cache(method, pdf_path, file_hash)
+            except Exception as e:
+                result["errors"].append(f"Method {method.__name__} failed: {str(e)}")
+                continue
+            if extraction_result and extraction_result["success"]:
+                weak_pages = self._merge_pages(pages, self._tag_pages(extraction_result), weak_pages)
+        
+        ocr_pages = self._image_pages(pdf_path, weak_pages) if weak_pages else []
+        if ocr_pages:
+            ocr_result = self._ocr_pages(pdf_path, file_hash, ocr_pages)
+            self._merge_pages(pages, ocr_result, ocr_pages)
+        
+        if primary is None and not any(pages.values()):
+            return result
+        
+        result["text_content"] = [entry for page in sorted(pages) for entry in pages[page]]
+        result["page_extractors"] = {
+            str(page): entries[0]["extractor"] for page, entries in sorted(pages.items()) if entries
+        }
+        result["metadata"] = dict(primary["metadata"]) if primary else {"pages": page_count}
+        result["metadata"]["ocr_pages"] = ocr_pages
+        result["extraction_method"] = primary["metadata"]["method"] if primary else "ocr"
+        result["from_cache"] = bool(primary and primary.get("from_cache")) and not ocr_pages
+        result["success"] = True
+        result["total_characters"] = sum(page["char_count"] for page in result["text_content"])
+        result["total_pages"] = len(result["text_content"])
+        
+        return result
+
+    @staticmethod
+    def _page_chars(entries: Optional[List[Dict]]) -> int:
+        """Characters of running text on a page (tables repeat the page's text)"""
+        return sum(len(entry["text"].strip()) for entry in entries or [] if entry.get("type") != "table")
+
+    @staticmethod
+    def _tag_pages(extraction_result: Dict) -> Dict[int, List[Dict]]:
+        """Group an extraction result's entries by page, tagging each with its extractor"""
+        extractor = extraction_result["metadata"]["method"]
+        by_page: Dict[int, List[Dict]] = {}
+        for entry in extraction_result["text_content"]:
+            by_page.setdefault(entry["page"], []).append({**entry, "extractor": extractor})
+        return by_page
+
+    def _merge_pages(self, pages: Dict[int, List[Dict]], candidates: Dict[int, List[Dict]],
+                     weak_pages: List[int]) -> List[int]:
+        """Take candidate text for weak pages where it is richer; returns the pages still weak"""
+        still_weak = []
+        for page in weak_pages:
+            if self._page_chars(candidates.get(page)) > self._page_chars(pages.get(page)):
+                pages[page] = candidates[page]
+            if self._page_chars(pages.get(page)) < self.min_page_chars:
+                still_weak.append(page)
+        return still_weak
+
+    def _image_pages(self, pdf_path: Path, pages: List[int]) -> List[int]:
+        """Pages that carry an image (a scan); blank pages are not worth OCR"""
+        try:
+            with fitz.open(pdf_path) as doc:
+                return [page for page in pages if doc[page - 1].get_images()]
+        except Exception as e:
+            logger.debug(f"Could not inspect images in {pdf_path}: {str(e)}")
+            return []
+
+    def _ocr_pages(self, pdf_path: Path, file_hash: str, pages: List[int]) -> Dict[int, List[Dict]]:
+        """OCR the given pages, reusing cached OCR text per page"""
+        extractor = self.extract_with_ocr.__name__
+        by_page = self.page_cache.get_pages(file_hash, extractor, pages) if self.page_cache else {}
+        missing = [page for page in pages if page not in by_page]
+        
+        if missing:
+            ocr_result = self.extract_with_ocr(pdf_path, pages=missing)
+            if ocr_result:
+                failed = set(ocr_result["metadata"]["ocr_failed_pages"])
+                fresh = {page: [] for page in missing if page not in failed}
+                for entry in ocr_result["text_content"]:
+                    fresh[entry["page"]].append(entry)
+                if self.page_cache and fresh:
+                    self.page_cache.put_pages(file_hash, extractor, fresh)
+                by_page.update(fresh)
+        
+        return {page: [{**entry, "extractor": "ocr"} for entry in entries]
+                for page, entries in by_page.items()}
+
+    def _record_result(self, result: Dict, pdf_path: Path, state_dir: Path) -> Dict:
+        """Update statistics and save an extraction result"""
         if not result["success"]:
             logger.warning(f"All extraction methods failed for {pdf_path}")
             with self.lock:
                 self.stats["failed_pdfs"] += 1
         else:
-            # Calculate statistics
-            total_chars = sum(page["char_count"] for page in result["text_content"])
-            result["total_characters"] = total_chars
-            result["total_pages"] = len(result["text_content"])
-            
             with self.lock:
                 self.stats["processed_pdfs"] += 1
                 self.stats["total_pages"] += result["total_pages"]
-                self.stats["total_text_length"] += total_chars
+                self.stats["total_text_length"] += result["total_characters"]
         
         # Save individual PDF result
         output_filename = f"{pdf_path.stem}_extracted.json"
@@ -287,9 +587,58 @@ class PDFProcessor:
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(result, f, indent=2, ensure_ascii=False)
         
+        self.index_result(result, state_dir.name, output_path)
+        
         logger.info(f"Completed processing: {pdf_path} -> {output_path}")
         return result
 
+    def index_result(self, result: Dict, state_key: str, output_path: Path) -> int:
+        """Replace a PDF's pages in the search index; returns the number of pages indexed"""
+        group_key = f"{state_key}/{result['filename']}"
+        if not result.get("success"):
+            self.search_index.remove_group(group_key)
+            return 0
+        
+        by_page: Dict[int, List[Dict]] = {}
+        for entry in result.get("text_content", []):
+            by_page.setdefault(entry["page"], []).append(entry)
+        
+        documents = []
+        for page, entries in sorted(by_page.items()):
+            # Tables repeat the page's running text; index them only for table-only pages
+            texts = [entry["text"] for entry in entries if entry.get("type") != "table"]
+            text = "\n".join(texts or [entry["text"] for entry in entries])
+            documents.append((f"{group_key}#page={page}", text, {
+                "state": state_key,
+                "pdf_filename": result["filename"],
+                "page": page,
+                "file_path": str(output_path),
+                "text": text
+            }))
+        
+        return self.search_index.replace_group(group_key, documents)
+
+    def rebuild_search_index(self, state_key: Optional[str] = None) -> int:
+        """Index previously extracted JSON files (e.g. processed before the index existed)"""
+        state_dirs = [self.states_dir / state_key] if state_key else self.states_dir.iterdir()
+        indexed = 0
+        
+        for state_dir in state_dirs:
+            processed_dir = state_dir / "processed"
+            if not processed_dir.is_dir():
+                continue
+            
+            for json_file in processed_dir.glob("*_extracted.json"):
+                try:
+                    with open(json_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    indexed += self.index_result(data, state_dir.name, json_file)
+                except Exception as e:
+                    logger.error(f"Error indexing {json_file}: {str(e)}")
+        
+        logger.info(f"Indexed {indexed} pages")
+        return indexed
+
     def process_state_pdfs(self, state_key: str) -> Dict:
         """Process all PDFs for a single state"""
         logger.info(f"Processing PDFs for state: {state_key}")
@@ -310,21 +659,31 @@ class PDFProcessor:
         
         logger.info(f"Found {len(pdf_files)} PDF files for {state_key}")
         
-        # Process PDFs with thread pool
+        # Extract in a process pool (or thread pool); results are recorded here
         processed_results = []
         
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            # Submit all PDF processing tasks
-            future_to_pdf = {
-                executor.submit(self.process_pdf, pdf_path, state_dir): pdf_path
-                for pdf_path in pdf_files
+        if self.use_processes:
+            executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            settings = {
+                "use_cache": self.page_cache is not None,
+                "hash_algorithm": self.hash_cache.algorithm,
+                "min_page_chars": self.min_page_chars
             }
+            submit = lambda pdf_path: executor.submit(_extract_pdf_in_worker, str(self.base_dir),
+                                                      str(pdf_path), settings)
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            submit = lambda pdf_path: executor.submit(self.extract_pdf, pdf_path)
+        
+        with executor:
+            # Submit all PDF processing tasks
+            future_to_pdf = {submit(pdf_path): pdf_path for pdf_path in pdf_files}
             
             # Collect results
             for future in as_completed(future_to_pdf):
                 pdf_path = future_to_pdf[future]
                 try:
-                    result = future.result()
+                    result = self._record_result(future.result(), pdf_path, state_dir)
                     processed_results.append(result)
                 except Exception as e:
                     logger.error(f"Error processing {pdf_path}: {str(e)}")
@@ -337,20 +696,27 @@ class PDFProcessor:
         state_summary = {
             "state": state_key,
             "total_pdfs": len(pdf_files),
+            "served_from_cache": len([r for r in processed_results if r.get("from_cache")]),
             "processed_successfully": len([r for r in processed_results if r["success"]]),
             "processing_failures": len([r for r in processed_results if not r["success"]]),
             "total_pages": sum(r.get("total_pages", 0) for r in processed_results),
             "total_characters": sum(r.get("total_characters", 0) for r in processed_results),
             "processing_methods": {},
+            "page_extractors": {},
+            "ocr_pages": 0,
             "processed_at": datetime.now().isoformat()
         }
         
-        # Count extraction methods used
+        # Count extraction methods used, per document and per page
         for result in processed_results:
             if result["success"]:
                 method = result["extraction_method"]
                 state_summary["processing_methods"][method] = \
                     state_summary["processing_methods"].get(method, 0) + 1
+                for extractor in result.get("page_extractors", {}).values():
+                    state_summary["page_extractors"][extractor] = \
+                        state_summary["page_extractors"].get(extractor, 0) + 1
+                state_summary["ocr_pages"] += len(result["metadata"].get("ocr_pages", []))
         
         # Save state summary
         summary_path = state_dir / "processed" / "pdf_processing_summary.json"
@@ -430,51 +796,25 @@ class PDFProcessor:
         
         return overall_summary
 
-    def search_text(self, query: str, state_key: Optional[str] = None) -> List[Dict]:
-        """Search extracted text across all or specific state documents"""
+    def search_text(self, query: str, state_key: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Ranked full-text search over extracted pages in all or specific state documents"""
         logger.info(f"Searching for: '{query}'" + (f" in state: {state_key}" if state_key else " in all states"))
         
-        results = []
-        search_dirs = [self.states_dir / state_key] if state_key else self.states_dir.iterdir()
+        hits = self.search_index.search(query, limit=limit,
+                                        group_prefix=f"{state_key}/" if state_key else None)
         
-        for state_dir in search_dirs:
-            if not state_dir.is_dir():
-                continue
-                
-            processed_dir = state_dir / "processed"
-            if not processed_dir.exists():
-                continue
-            
-            # Search in all extracted JSON files
-            for json_file in processed_dir.glob("*_extracted.json"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    if not data.get("success", False):
-                        continue
-                    
-                    # Search in text content
-                    for page_data in data.get("text_content", []):
-                        text = page_data.get("text", "")
-                        if query.lower() in text.lower():
-                            # Find context around the match
-                            match_index = text.lower().find(query.lower())
-                            context_start = max(0, match_index - 100)
-                            context_end = min(len(text), match_index + len(query) + 100)
-                            context = text[context_start:context_end]
-                            
-                            results.append({
-                                "state": state_dir.name,
-                                "pdf_filename": data["filename"],
-                                "page": page_data["page"],
-                                "match_context": context,
-                                "match_position": match_index,
-                                "file_path": str(json_file)
-                            })
-                
-                except Exception as e:
-                    logger.error(f"Error searching in {json_file}: {str(e)}")
+        results = []
+        for _, score, payload in hits:
+            snippet, position = highlight_snippet(payload["text"], query)
+            results.append({
+                "state": payload["state"],
+                "pdf_filename": payload["pdf_filename"],
+                "page": payload["page"],
+                "score": round(score, 4),
+                "match_context": snippet,
+                "match_position": position,
+                "file_path": payload["file_path"]
+            })
         
         logger.info(f"Found {len(results)} matches for '{query}'")
         return results
@@ -488,26 +828,39 @@ def main():
     parser.add_argument('--all', action='store_true', help='Process PDFs for all states')
     parser.add_argument('--search', help='Search text in processed documents')
     parser.add_argument('--search-state', help='Limit search to specific state')
+    parser.add_argument('--reindex', action='store_true', help='Rebuild the search index from extracted JSON')
+    parser.add_argument('--threads', action='store_true', help='Extract with threads instead of processes')
+    parser.add_argument('--workers', type=int, help='Number of extraction workers (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore the page text cache')
+    parser.add_argument('--min-page-chars', type=int, default=50,
+                        help='Pages with less text than this fall back to other extractors, then OCR')
+    parser.add_argument('--hash-algorithm', default='blake2b', choices=HASH_ALGORITHMS,
+                        help='File hash used for dedup and cache keys')
     
     args = parser.parse_args()
     
     # Change to compliance_data directory
     os.chdir(Path(__file__).parent.parent)
     
-    processor = PDFProcessor()
+    processor = PDFProcessor(use_processes=not args.threads, max_workers=args.workers,
+                             use_cache=not args.no_cache, hash_algorithm=args.hash_algorithm,
+                             min_page_chars=args.min_page_chars)
+    
+    if args.reindex:
+        processor.rebuild_search_index(args.search_state)
     
     if args.search:
         results = processor.search_text(args.search, args.search_state)
         print(f"\nFound {len(results)} matches:")
         for result in results[:10]:  # Show first 10 results
-            print(f"\n{result['state']} - {result['pdf_filename']} (page {result['page']})")
+            print(f"\n{result['state']} - {result['pdf_filename']} (page {result['page']}, score {result['score']})")
             print(f"Context: ...{result['match_context']}...")
     elif args.state:
         processor.process_state_pdfs(args.state)
     elif args.all:
         processor.process_all_states()
-    else:
-        print("Please specify --state <state_name>, --all, or --search <query>")
+    elif not args.reindex:
+        print("Please specify --state <state_name>, --all, --reindex, or --search <query>")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
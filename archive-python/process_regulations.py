@@ -62,6 +62,26 @@ def process_single_state(rag_system: AstraDBRAG, processor: RegulationProcessor,
     
     return success
 
+def reconcile_states(processor: RegulationProcessor, states: List[str],
+                     regulations_dir: str, apply: bool = False) -> bool:
+    """Report orphaned and duplicate chunks per state (and remove them with apply)"""
+    clean = True
+    for state in states:
+        report = processor.reconcile_state_regulations(state, regulations_dir, apply=apply)
+        if "error" in report:
+            print(f"  {state}: {report['error']}")
+            clean = False
+            continue
+        
+        print(f"  {state}: {report['stored']} stored, {report['expected']} expected, "
+              f"{len(report['orphans'])} orphans, {len(report['duplicates'])} duplicates, "
+              f"{len(report['missing'])} missing, {len(report['stale'])} stale")
+        if apply:
+            print(f"    deleted {report['deleted']}, upserted {report['upserted']}")
+        elif report['orphans'] or report['duplicates'] or report['missing'] or report['stale']:
+            clean = False
+    return clean
+
 def main():
     parser = argparse.ArgumentParser(description="Process regulation files and store in AstraDB")
     parser.add_argument("--config", default="agent_config.yaml", 
@@ -75,6 +95,10 @@ def main():
                        help="List available states and exit")
     parser.add_argument("--stats", action="store_true", 
                        help="Show RAG system statistics")
+    parser.add_argument("--reconcile", action="store_true", 
+                       help="Report orphaned and duplicate chunks per state")
+    parser.add_argument("--apply", action="store_true", 
+                       help="With --reconcile, delete orphans/duplicates and upsert missing chunks")
     
     args = parser.parse_args()
     
@@ -115,6 +139,12 @@ def main():
             print(f"  {state}: {reg_count} regulation chunks")
         return 0
     
+    # Reconcile stored chunks with regulation files if requested
+    if args.reconcile:
+        states = [args.state] if args.state else get_state_directories(args.regulations_dir)
+        print(f"\nReconciling {len(states)} states{' (applying fixes)' if args.apply else ''}:")
+        return 0 if reconcile_states(processor, states, args.regulations_dir, args.apply) else 1
+    
     # Process regulations
     if args.state:
         # Process single state
@@ -7,6 +7,8 @@ import os
 import sys
 import json
 import argparse
+import socketserver
+import threading
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
@@ -15,6 +17,29 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from shared.astradb_vector_store import AstraDBVectorStore, CannabisKnowledgeBase
 
+# Warm stores reused across requests when running as a resident worker
+_vector_stores: Dict[str, AstraDBVectorStore] = {}
+_knowledge_base: Optional[CannabisKnowledgeBase] = None
+_store_lock = threading.Lock()
+
+def get_vector_store(agent_type: str) -> AstraDBVectorStore:
+    """Get cached vector store for agent, creating it on first use"""
+    with _store_lock:
+        if agent_type not in _vector_stores:
+            _vector_stores[agent_type] = AstraDBVectorStore(agent_type)
+        return _vector_stores[agent_type]
+
+def get_knowledge_base() -> CannabisKnowledgeBase:
+    """Get cached knowledge base, creating it on first use"""
+    global _knowledge_base
+    with _store_lock:
+        if _knowledge_base is None:
+            _knowledge_base = CannabisKnowledgeBase()
+            # Share the knowledge base stores with single-agent requests
+            for agent_type, store in _knowledge_base.agents.items():
+                _vector_stores.setdefault(agent_type, store)
+        return _knowledge_base
+
 def vector_search(params: Dict[str, Any]) -> Dict[str, Any]:
     """Perform vector search on specific agent"""
     try:
@@ -23,8 +48,8 @@ def vector_search(params: Dict[str, Any]) -> Dict[str, Any]:
         top_k = params.get("top_k", 5)
         filter_metadata = params.get("filter_metadata")
         
-        # Initialize vector store
-        vector_store = AstraDBVectorStore(agent_type)
+        # Get vector store
+        vector_store = get_vector_store(agent_type)
         
         # Perform search
         results = vector_store.similarity_search(
@@ -55,8 +80,8 @@ def cross_agent_search(params: Dict[str, Any]) -> Dict[str, Any]:
         agent_types = params.get("agent_types")
         top_k_per_agent = params.get("top_k_per_agent", 3)
         
-        # Initialize knowledge base
-        knowledge_base = CannabisKnowledgeBase()
+        # Get knowledge base
+        knowledge_base = get_knowledge_base()
         
         # Perform cross-agent search
         results = knowledge_base.cross_agent_search(
@@ -89,8 +114,8 @@ def add_documents(params: Dict[str, Any]) -> Dict[str, Any]:
         agent_type = params["agent_type"]
         documents = params["documents"]
         
-        # Initialize vector store
-        vector_store = AstraDBVectorStore(agent_type)
+        # Get vector store
+        vector_store = get_vector_store(agent_type)
         
         # Add documents
         doc_ids = vector_store.add_documents(documents)
@@ -114,8 +139,8 @@ def get_agent_stats(params: Dict[str, Any]) -> Dict[str, Any]:
     try:
         agent_type = params["agent_type"]
         
-        # Initialize vector store
-        vector_store = AstraDBVectorStore(agent_type)
+        # Get vector store
+        vector_store = get_vector_store(agent_type)
         
         # Get statistics
         stats = vector_store.get_statistics()
@@ -136,8 +161,8 @@ def get_agent_stats(params: Dict[str, Any]) -> Dict[str, Any]:
 def get_knowledge_base_stats() -> Dict[str, Any]:
     """Get statistics for entire knowledge base"""
     try:
-        # Initialize knowledge base
-        knowledge_base = CannabisKnowledgeBase()
+        # Get knowledge base
+        knowledge_base = get_knowledge_base()
         
         # Get statistics
         stats = knowledge_base.get_knowledge_base_statistics()
@@ -180,7 +205,7 @@ def health_check() -> Dict[str, Any]:
             }
         
         # Test connection with a simple operation
-        test_store = AstraDBVectorStore("health_test")
+        test_store = get_vector_store("health_test")
         test_count = test_store.get_document_count()
         
         return {
@@ -196,17 +221,112 @@ def health_check() -> Dict[str, Any]:
             "error": str(e)
         }
 
+def run_command(command: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute a single command and return its result"""
+    if command == "search":
+        return vector_search(params)
+    elif command == "cross-search":
+        return cross_agent_search(params)
+    elif command == "add-documents":
+        return add_documents(params)
+    elif command == "stats":
+        return get_agent_stats(params)
+    elif command == "knowledge-base":
+        return get_knowledge_base_stats()
+    elif command == "health":
+        return health_check()
+    elif command == "migrate":
+        # Import migration functionality
+        from scripts.migrate_to_astradb import AstraDBMigrator
+        migrator = AstraDBMigrator()
+        
+        if params.get("verify_only"):
+            return migrator.verify_migration()
+        elif params.get("agent_type"):
+            return migrator.migrate_agent(params["agent_type"])
+        else:
+            return migrator.migrate_all_agents()
+    else:
+        return {"status": "error", "error": f"Unknown command: {command}"}
+
+def handle_request_line(line: str) -> Dict[str, Any]:
+    """
+    Handle one newline-delimited JSON request from the worker loop
+    
+    Requests look like {"id": ..., "command": "search", "params": {...}}.
+    The request id is echoed back so callers can match responses.
+    """
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError:
+        return {"status": "error", "error": "Invalid JSON request"}
+    
+    if not isinstance(request, dict) or "command" not in request:
+        return {"status": "error", "error": "Request must be an object with a command"}
+    
+    command = request["command"]
+    try:
+        result = run_command(command, request.get("params") or {})
+    except Exception as e:
+        result = {"status": "error", "error": str(e), "command": command}
+    
+    if "id" in request:
+        result["id"] = request["id"]
+    return result
+
+class _WorkerRequestHandler(socketserver.StreamRequestHandler):
+    """Serve newline-delimited JSON requests on a Unix socket connection"""
+    
+    def handle(self):
+        for raw_line in self.rfile:
+            line = raw_line.decode("utf-8").strip()
+            if not line:
+                continue
+            result = handle_request_line(line)
+            self.wfile.write((json.dumps(result) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+def serve_stdin():
+    """Resident worker reading requests from stdin, one JSON object per line"""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        print(json.dumps(handle_request_line(line)), flush=True)
+
+def serve_socket(socket_path: str):
+    """Resident worker listening on a Unix domain socket"""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    
+    with socketserver.ThreadingUnixStreamServer(socket_path, _WorkerRequestHandler) as server:
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
 def main():
     """Main function to handle command line arguments"""
     parser = argparse.ArgumentParser(description="AstraDB Search Backend")
     parser.add_argument("command", choices=[
         "search", "cross-search", "add-documents", "stats", 
-        "knowledge-base", "health", "migrate"
+        "knowledge-base", "health", "migrate", "serve"
     ])
     parser.add_argument("params", nargs="?", help="JSON parameters")
+    parser.add_argument("--socket", help="Unix socket path for serve mode (defaults to stdin/stdout)")
     
     args = parser.parse_args()
     
+    # Resident worker mode keeps stores warm across requests
+    if args.command == "serve":
+        if args.socket:
+            serve_socket(args.socket)
+        else:
+            serve_stdin()
+        return
+    
     # Parse parameters
     params = {}
     if args.params:
@@ -218,32 +338,7 @@ def main():
     
     # Execute command
     try:
-        if args.command == "search":
-            result = vector_search(params)
-        elif args.command == "cross-search":
-            result = cross_agent_search(params)
-        elif args.command == "add-documents":
-            result = add_documents(params)
-        elif args.command == "stats":
-            result = get_agent_stats(params)
-        elif args.command == "knowledge-base":
-            result = get_knowledge_base_stats()
-        elif args.command == "health":
-            result = health_check()
-        elif args.command == "migrate":
-            # Import migration functionality
-            from scripts.migrate_to_astradb import AstraDBMigrator
-            migrator = AstraDBMigrator()
-            
-            if params.get("verify_only"):
-                result = migrator.verify_migration()
-            elif params.get("agent_type"):
-                result = migrator.migrate_agent(params["agent_type"])
-            else:
-                result = migrator.migrate_all_agents()
-        else:
-            result = {"status": "error", "error": f"Unknown command: {args.command}"}
-        
+        result = run_command(args.command, params)
         print(json.dumps(result))
         
     except Exception as e:
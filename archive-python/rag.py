@@ -9,7 +9,6 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
-import hashlib
 
 # AstraDB imports
 from astrapy.db import AstraDB
@@ -17,8 +16,9 @@ from astrapy.db import AstraDB
 # LangChain imports for embeddings and vector stores
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import AstraDB as LangChainAstraDB
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from regulation_chunker import RegulationChunker
+from regulation_store import RegulationStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +34,8 @@ class RegulationChunk:
     source_url: str
     chunk_index: int
     created_at: datetime
+    section_heading: str = ""
+    content_hash: str = ""
 
 class AstraDBRAG:
     """AstraDB-based RAG system for cannabis regulations"""
@@ -44,12 +46,14 @@ class AstraDBRAG:
         self.collection = None
         self.embeddings = None
         self.vector_store = None
-        self.text_splitter = None
+        self.chunker = None
+        self.store = None
         
-        # Initialize components
-        self._initialize_astra_db()
+        # Initialize components (embeddings first: the vector store and chunk store use them)
         self._initialize_embeddings()
-        self._initialize_text_splitter()
+        self._initialize_astra_db()
+        self._initialize_chunker()
+        self.store = RegulationStore(self.collection, self.embeddings.embed_documents)
     
     def _initialize_astra_db(self):
         """Initialize AstraDB connection"""
@@ -105,51 +109,53 @@ class AstraDBRAG:
             logger.error(f"Failed to initialize embeddings: {e}")
             raise
     
-    def _initialize_text_splitter(self):
-        """Initialize text splitter for chunking regulations"""
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
+    def _initialize_chunker(self):
+        """Initialize heading-anchored chunker for regulations"""
+        chunking_config = self.config.get("chunking", {})
+        self.chunker = RegulationChunker(
+            max_chars=chunking_config.get("max_chars", 1000),
+            min_chars=chunking_config.get("min_chars", 200)
         )
-        logger.info("Initialized text splitter")
-    
-    def _generate_chunk_id(self, state: str, source_url: str, chunk_index: int) -> str:
-        """Generate unique ID for regulation chunk"""
-        content = f"{state}_{source_url}_{chunk_index}"
-        return hashlib.md5(content.encode()).hexdigest()
+        logger.info("Initialized regulation chunker")
     
     def process_regulation_file(self, file_path: str, state: str, source_url: str) -> List[RegulationChunk]:
-        """Process a regulation file and split into chunks"""
+        """
+        Process a regulation file and split into chunks
+        
+        Chunks are anchored on section headings, so chunk IDs and content hashes
+        of unchanged sections stay the same across revisions of the file.
+        """
         try:
             # Read file content
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             # Split content into chunks
-            chunks = self.text_splitter.split_text(content)
+            chunks = self.chunker.chunk(content, state, source_url)
             
             # Create regulation chunks
             regulation_chunks = []
-            for i, chunk in enumerate(chunks):
-                chunk_id = self._generate_chunk_id(state, source_url, i)
-                
+            for chunk in chunks:
                 regulation_chunk = RegulationChunk(
-                    id=chunk_id,
-                    content=chunk,
+                    id=chunk.id,
+                    content=chunk.content,
                     metadata={
+                        "chunk_id": chunk.id,
                         "state": state,
                         "source_url": source_url,
                         "file_path": file_path,
-                        "chunk_index": i,
+                        "chunk_index": chunk.index,
                         "total_chunks": len(chunks),
+                        "section_heading": chunk.heading,
+                        "content_hash": chunk.content_hash,
                         "processed_at": datetime.now().isoformat()
                     },
                     state=state,
                     source_url=source_url,
-                    chunk_index=i,
-                    created_at=datetime.now()
+                    chunk_index=chunk.index,
+                    created_at=datetime.now(),
+                    section_heading=chunk.heading,
+                    content_hash=chunk.content_hash
                 )
                 regulation_chunks.append(regulation_chunk)
             
@@ -161,24 +167,21 @@ class AstraDBRAG:
             return []
     
     def store_regulations(self, regulation_chunks: List[RegulationChunk]) -> bool:
-        """Store regulation chunks in AstraDB"""
+        """
+        Upsert regulation chunks in AstraDB by chunk ID
+        
+        Re-ingesting a file replaces its chunks in place, chunks whose content
+        hash is unchanged are not re-embedded, and chunks of sections the file
+        no longer has are deleted.
+        """
         try:
-            # Convert to LangChain documents
-            documents = []
-            for chunk in regulation_chunks:
-                doc = Document(
-                    page_content=chunk.content,
-                    metadata=chunk.metadata
-                )
-                documents.append(doc)
-            
-            # Add documents to vector store
-            if documents:
-                self.vector_store.add_documents(documents)
-                logger.info(f"Successfully stored {len(documents)} regulation chunks in AstraDB")
-                return True
+            if not regulation_chunks:
+                return False
             
-            return False
+            counts = self.store.sync_chunks(regulation_chunks)
+            logger.info(f"Stored regulation chunks in AstraDB: {counts['upserted']} upserted, "
+                        f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+            return True
             
         except Exception as e:
             logger.error(f"Error storing regulations in AstraDB: {e}")
@@ -247,22 +250,24 @@ class AstraDBRAG:
     def delete_regulations_by_state(self, state: str) -> bool:
         """Delete all regulations for a specific state"""
         try:
-            # Get all documents for the state
-            documents = self.get_regulations_by_state(state, limit=1000)
-            
-            # Delete each document
-            for doc in documents:
-                # Note: This would require implementing delete functionality
-                # in the AstraDB vector store or using direct AstraDB operations
-                pass
-            
-            logger.info(f"Deleted regulations for state: {state}")
+            deleted = self.store.delete_where({"metadata.state": state})
+            logger.info(f"Deleted {deleted} regulation chunks for state: {state}")
             return True
             
         except Exception as e:
             logger.error(f"Error deleting regulations for state {state}: {e}")
             return False
     
+    def reconcile_state(self, state: str, regulation_chunks: List[RegulationChunk],
+                        apply: bool = False) -> Dict[str, Any]:
+        """Report (and with apply, remove) orphaned and duplicate chunks for a state"""
+        try:
+            return self.store.reconcile(state, regulation_chunks, apply=apply)
+            
+        except Exception as e:
+            logger.error(f"Error reconciling regulations for state {state}: {e}")
+            return {"state": state, "error": str(e)}
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the regulation collection"""
         try:
@@ -283,30 +288,36 @@ class RegulationProcessor:
     def __init__(self, rag_system: AstraDBRAG):
         self.rag_system = rag_system
     
+    def collect_state_chunks(self, state: str, regulations_dir: str) -> Optional[List[RegulationChunk]]:
+        """Chunk all regulation files for a state; None if the state directory is missing"""
+        state_dir = os.path.join(regulations_dir, state)
+        if not os.path.exists(state_dir):
+            logger.warning(f"State directory not found: {state_dir}")
+            return None
+        
+        all_chunks = []
+        
+        # Process all files in the state directory
+        for root, dirs, files in os.walk(state_dir):
+            for file in files:
+                if file.endswith(('.html', '.txt', '.pdf', '.json')):
+                    file_path = os.path.join(root, file)
+                    
+                    # Extract source URL from file path or metadata
+                    source_url = self._extract_source_url(file_path)
+                    
+                    # Process the file
+                    chunks = self.rag_system.process_regulation_file(
+                        file_path, state, source_url
+                    )
+                    all_chunks.extend(chunks)
+        
+        return all_chunks
+    
     def process_state_regulations(self, state: str, regulations_dir: str) -> bool:
         """Process all regulation files for a specific state"""
         try:
-            state_dir = os.path.join(regulations_dir, state)
-            if not os.path.exists(state_dir):
-                logger.warning(f"State directory not found: {state_dir}")
-                return False
-            
-            all_chunks = []
-            
-            # Process all files in the state directory
-            for root, dirs, files in os.walk(state_dir):
-                for file in files:
-                    if file.endswith(('.html', '.txt', '.pdf', '.json')):
-                        file_path = os.path.join(root, file)
-                        
-                        # Extract source URL from file path or metadata
-                        source_url = self._extract_source_url(file_path)
-                        
-                        # Process the file
-                        chunks = self.rag_system.process_regulation_file(
-                            file_path, state, source_url
-                        )
-                        all_chunks.extend(chunks)
+            all_chunks = self.collect_state_chunks(state, regulations_dir)
             
             # Store all chunks
             if all_chunks:
@@ -320,6 +331,14 @@ class RegulationProcessor:
             logger.error(f"Error processing regulations for state {state}: {e}")
             return False
     
+    def reconcile_state_regulations(self, state: str, regulations_dir: str,
+                                    apply: bool = False) -> Dict[str, Any]:
+        """Compare a state's stored chunks with its regulation files"""
+        all_chunks = self.collect_state_chunks(state, regulations_dir)
+        if all_chunks is None:
+            return {"state": state, "error": "State directory not found"}
+        return self.rag_system.reconcile_state(state, all_chunks, apply=apply)
+    
     def _extract_source_url(self, file_path: str) -> str:
         """Extract source URL from file path or metadata"""
         # This is a simplified implementation
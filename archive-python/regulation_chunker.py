@@ -0,0 +1,165 @@
+"""
+Heading-Anchored Chunking for Regulation Text
+
+Splits regulations at section, chapter, part, rule and title headings (the
+RegulatoryParser patterns, anchored at line starts) and packs each section's
+paragraphs into chunks whose boundaries are chosen from the paragraph text
+itself. A chunk's ID is derived from its section heading and its position
+within that section, never from its offset in the file, so an amendment to
+one section leaves every other section's chunk IDs and content hashes
+unchanged and only the amended section needs to be re-embedded.
+"""
+import re
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from citation_system import RegulatoryParser
+
+
+@dataclass
+class TextChunk:
+    """A chunk of regulation text with a stable ID"""
+    id: str
+    content: str
+    heading: str
+    index: int
+    content_hash: str
+
+
+def content_hash(text: str) -> str:
+    """Digest of chunk text, used to detect amended chunks"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class RegulationChunker:
+    """Content-defined chunker anchored on regulatory headings"""
+
+    def __init__(self, max_chars: int = 1000, min_chars: int = 200, boundary_divisor: int = 4,
+                 parser: Optional[RegulatoryParser] = None):
+        """
+        Args:
+            max_chars: Upper bound on chunk length
+            min_chars: A chunk is only closed at a content-defined boundary once it is this long
+            boundary_divisor: Roughly one paragraph in this many is a boundary candidate
+            parser: Source of heading patterns (a default RegulatoryParser if omitted)
+        """
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self.boundary_divisor = boundary_divisor
+
+        parser = parser or RegulatoryParser()
+        patterns = (parser.section_patterns + parser.chapter_patterns + parser.part_patterns
+                    + parser.rule_patterns + parser.title_patterns)
+        self.heading_pattern = re.compile(
+            "|".join(f"^[ \\t]*(?:{pattern})" for pattern in patterns),
+            re.IGNORECASE | re.MULTILINE
+        )
+
+    def split_sections(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Split text at heading lines
+
+        Returns:
+            (heading, section text) pairs; text before the first heading has an empty heading
+        """
+        starts = [match.start() for match in self.heading_pattern.finditer(text)]
+        if not starts or starts[0] > 0:
+            starts.insert(0, 0)
+
+        sections = []
+        for start, end in zip(starts, starts[1:] + [len(text)]):
+            section = text[start:end].strip()
+            if not section:
+                continue
+            heading = ""
+            if self.heading_pattern.match(text, start):
+                heading = re.sub(r'\s+', ' ', section.split('\n', 1)[0])[:200]
+            sections.append((heading, section))
+        return sections
+
+    def _units(self, section: str) -> List[str]:
+        """Paragraphs of a section, with over-long paragraphs split at sentences and then hard-wrapped"""
+        units = []
+        for paragraph in re.split(r'\n\s*\n', section):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if len(paragraph) <= self.max_chars:
+                units.append(paragraph)
+                continue
+            for sentence in re.split(r'(?<=[.;:])\s+', paragraph):
+                for start in range(0, len(sentence), self.max_chars):
+                    units.append(sentence[start:start + self.max_chars])
+        return units
+
+    def _is_boundary(self, unit: str) -> bool:
+        """Whether a chunk may end after this unit; depends only on the unit's own text"""
+        digest = hashlib.blake2b(unit.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') % self.boundary_divisor == 0
+
+    def _group(self, units: List[str]) -> List[str]:
+        """Pack units into chunks, cutting at content-defined boundaries or at max_chars"""
+        chunks = []
+        current: List[str] = []
+        length = 0
+        for i, unit in enumerate(units):
+            current.append(unit)
+            length += len(unit) + (2 if length else 0)
+
+            next_length = len(units[i + 1]) + 2 if i + 1 < len(units) else 0
+            if (i + 1 == len(units)
+                    or length + next_length > self.max_chars
+                    or (length >= self.min_chars and self._is_boundary(unit))):
+                chunks.append("\n\n".join(current))
+                current, length = [], 0
+        return chunks
+
+    def chunk(self, text: str, state: str, source_url: str) -> List[TextChunk]:
+        """
+        Chunk a regulation document
+
+        Args:
+            text: Document text
+            state: State code (part of the chunk ID)
+            source_url: Document URL (part of the chunk ID)
+
+        Returns:
+            Chunks in document order
+        """
+        chunks = []
+        heading_counts: Dict[str, int] = {}
+        for heading, section in self.split_sections(text):
+            # Repeated headings (e.g. a table of contents) are told apart by occurrence
+            heading_counts[heading] = heading_counts.get(heading, 0) + 1
+            anchor = f"{heading}#{heading_counts[heading]}"
+
+            for ordinal, content in enumerate(self._group(self._units(section))):
+                key = f"{state}|{source_url}|{anchor}|{ordinal}"
+                chunks.append(TextChunk(
+                    id=hashlib.sha256(key.encode('utf-8')).hexdigest()[:32],
+                    content=content,
+                    heading=heading,
+                    index=len(chunks),
+                    content_hash=content_hash(content)
+                ))
+        return chunks
+
+
+def diff_chunks(chunks: List[TextChunk], stored_hashes: Dict[str, str]) -> Dict[str, List]:
+    """
+    Compare fresh chunks with what is already stored
+
+    Args:
+        chunks: Chunks of the current revision
+        stored_hashes: chunk ID -> content hash of the stored revision
+
+    Returns:
+        {"changed": chunks to (re-)embed, "unchanged": IDs to keep, "removed": stored IDs to delete}
+    """
+    current_ids = {chunk.id for chunk in chunks}
+    return {
+        "changed": [chunk for chunk in chunks if stored_hashes.get(chunk.id) != chunk.content_hash],
+        "unchanged": [chunk.id for chunk in chunks if stored_hashes.get(chunk.id) == chunk.content_hash],
+        "removed": [chunk_id for chunk_id in stored_hashes if chunk_id not in current_ids]
+    }
@@ -0,0 +1,188 @@
+"""
+Regulation Chunk Store with Upsert and Reconciliation
+
+Writes regulation chunks to a document collection keyed by their stable
+chunk IDs, using the layout of the LangChain AstraDB vector store
+({"_id", "content", "metadata", "$vector"}) so similarity search keeps
+working. Chunks whose stored content hash is current are not re-embedded,
+re-ingesting a document replaces its chunks in place and deletes the ones
+its new revision no longer has, and reconcile() reports (and optionally
+removes) orphaned and duplicate chunks.
+
+The collection only needs the paginated_find / upsert / delete_many subset
+of the astrapy collection API, so any stand-in with those methods works.
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from regulation_chunker import content_hash, diff_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class RegulationStore:
+    """Upsert/delete/reconcile layer over an AstraDB-style collection"""
+
+    def __init__(self, collection: Any, embed_documents: Callable[[List[str]], List[List[float]]],
+                 batch_size: int = 32):
+        """
+        Args:
+            collection: astrapy collection (or a stand-in with the same methods)
+            embed_documents: Embeds a batch of texts, e.g. OpenAIEmbeddings.embed_documents
+            batch_size: Texts per embedding call
+        """
+        self.collection = collection
+        self.embed_documents = embed_documents
+        self.batch_size = batch_size
+
+    def find(self, filter: Dict[str, Any], fields: Sequence[str] = ("metadata",)) -> List[Dict[str, Any]]:
+        """All stored documents matching a filter, projected to the given fields"""
+        projection = {field: 1 for field in fields}
+        return list(self.collection.paginated_find(filter=filter, projection=projection))
+
+    def stored_hashes(self, chunk_ids: Sequence[str]) -> Dict[str, Optional[str]]:
+        """chunk ID -> stored content hash, for the IDs that are stored"""
+        stored = {}
+        for start in range(0, len(chunk_ids), 100):
+            batch = list(chunk_ids[start:start + 100])
+            for document in self.find({"_id": {"$in": batch}}):
+                stored[document["_id"]] = document.get("metadata", {}).get("content_hash")
+        return stored
+
+    def upsert_chunks(self, chunks: Sequence[Any]) -> Dict[str, int]:
+        """
+        Insert or replace chunks by chunk ID, embedding only new or changed ones
+
+        Args:
+            chunks: Objects with id, content, metadata and content_hash (e.g. RegulationChunk)
+
+        Returns:
+            {"upserted", "unchanged"} counts
+        """
+        # The last occurrence of an ID wins, as it would in the collection
+        unique = list({chunk.id: chunk for chunk in chunks}.values())
+        stored = self.stored_hashes([chunk.id for chunk in unique])
+        changed = [chunk for chunk in unique if stored.get(chunk.id) != chunk.content_hash]
+        self._write(changed)
+        return {"upserted": len(changed), "unchanged": len(unique) - len(changed)}
+
+    def sync_chunks(self, chunks: Sequence[Any]) -> Dict[str, int]:
+        """
+        Make the stored chunks of each document match its current chunks
+
+        Chunks are grouped by metadata["source_url"]; for each document, new
+        and changed chunks are upserted first, then stored chunks the current
+        revision no longer has (e.g. a repealed section) are deleted. Documents
+        with no chunks in the batch are left alone; reconcile() finds those.
+
+        Args:
+            chunks: Current chunks of one or more documents
+
+        Returns:
+            {"upserted", "unchanged", "removed"} counts
+        """
+        documents = defaultdict(dict)
+        for chunk in chunks:
+            documents[(chunk.metadata.get("state"), chunk.metadata.get("source_url"))][chunk.id] = chunk
+
+        counts = {"upserted": 0, "unchanged": 0, "removed": 0}
+        for (state, source_url), by_id in documents.items():
+            stored = {
+                document["_id"]: document.get("metadata", {}).get("content_hash")
+                for document in self.find({"metadata.state": state, "metadata.source_url": source_url})
+            }
+            diff = diff_chunks(list(by_id.values()), stored)
+            self._write(diff["changed"])
+            counts["upserted"] += len(diff["changed"])
+            counts["unchanged"] += len(diff["unchanged"])
+            counts["removed"] += self.delete_ids(diff["removed"])
+        return counts
+
+    def _write(self, chunks: Sequence[Any]):
+        """Embed chunks and upsert them by chunk ID"""
+        for start in range(0, len(chunks), self.batch_size):
+            batch = chunks[start:start + self.batch_size]
+            vectors = self.embed_documents([chunk.content for chunk in batch])
+            for chunk, vector in zip(batch, vectors):
+                self.collection.upsert({
+                    "_id": chunk.id,
+                    "content": chunk.content,
+                    "metadata": {**chunk.metadata, "content_hash": chunk.content_hash},
+                    "$vector": list(vector)
+                })
+
+    def delete_where(self, filter: Dict[str, Any]) -> int:
+        """Delete every document matching a filter; returns the number deleted"""
+        deleted = 0
+        while True:
+            response = self.collection.delete_many(filter=filter)
+            if response.get("errors"):
+                raise RuntimeError(f"delete_many failed: {response['errors']}")
+            status = response.get("status", {})
+            deleted += max(status.get("deletedCount", 0), 0)
+            # The Data API deletes in pages and flags when more documents match
+            if not status.get("moreData"):
+                return deleted
+
+    def delete_ids(self, chunk_ids: Sequence[str]) -> int:
+        """Delete documents by ID"""
+        deleted = 0
+        for start in range(0, len(chunk_ids), 100):
+            deleted += self.delete_where({"_id": {"$in": list(chunk_ids[start:start + 100])}})
+        return deleted
+
+    def reconcile(self, state: str, expected_chunks: Sequence[Any], apply: bool = False) -> Dict[str, Any]:
+        """
+        Compare a state's stored chunks with the chunks its source files produce now
+
+        Orphans are stored chunks that no current chunk ID accounts for (e.g.
+        sections removed from a regulation, or files no longer on disk).
+        Duplicates are extra stored copies of the same text from the same
+        source, such as those left by ingests before chunk IDs were stable.
+
+        Args:
+            state: State code
+            expected_chunks: Chunks produced from the state's current files
+            apply: Delete orphans and duplicates, then upsert missing/stale chunks
+
+        Returns:
+            Report with stored/expected counts and orphan, duplicate, missing and stale IDs
+        """
+        expected = {chunk.id: chunk for chunk in expected_chunks}
+        stored = self.find({"metadata.state": state}, fields=("content", "metadata"))
+
+        # Group copies of the same text; keep the expected IDs, else the first copy seen
+        copies = defaultdict(list)
+        for document in stored:
+            metadata = document.get("metadata", {})
+            key = (metadata.get("source_url"), metadata.get("content_hash") or content_hash(document.get("content", "")))
+            copies[key].append(document["_id"])
+
+        duplicates = []
+        for ids in copies.values():
+            keep = [chunk_id for chunk_id in ids if chunk_id in expected] or ids[:1]
+            duplicates.extend(chunk_id for chunk_id in ids if chunk_id not in keep)
+        duplicate_set = set(duplicates)
+
+        stored_hashes = {document["_id"]: document.get("metadata", {}).get("content_hash") for document in stored}
+        report = {
+            "state": state,
+            "stored": len(stored),
+            "expected": len(expected),
+            "orphans": sorted(chunk_id for chunk_id in stored_hashes
+                              if chunk_id not in expected and chunk_id not in duplicate_set),
+            "duplicates": sorted(duplicates),
+            "missing": sorted(chunk_id for chunk_id in expected if chunk_id not in stored_hashes),
+            "stale": sorted(chunk_id for chunk_id, chunk in expected.items()
+                            if chunk_id in stored_hashes and stored_hashes[chunk_id] != chunk.content_hash),
+            "applied": apply
+        }
+
+        if apply:
+            report["deleted"] = self.delete_ids(report["orphans"] + report["duplicates"])
+            report["upserted"] = self.upsert_chunks(list(expected.values()))["upserted"]
+
+        logger.info(f"Reconciled {state}: {len(report['orphans'])} orphans, {len(report['duplicates'])} duplicates, "
+                    f"{len(report['missing'])} missing, {len(report['stale'])} stale")
+        return report
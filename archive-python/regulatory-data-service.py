@@ -5,20 +5,28 @@ Downloads and maintains up-to-date cannabis regulations from all states with dai
 
 import os
 import json
+import re
 import hashlib
 import asyncio
 import aiohttp
 import schedule
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, asdict, fields
 from pathlib import Path
 import logging
 from bs4 import BeautifulSoup
 import sqlite3
+import queue
+import threading
 from contextlib import contextmanager
 
+try:
+    from .http_validators import ConditionalResponse, HTTPValidatorStore, conditional_get
+except ImportError:
+    from http_validators import ConditionalResponse, HTTPValidatorStore, conditional_get
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -315,19 +323,34 @@ STATE_REGULATION_SOURCES = {
 }
 
 class RegulatoryDataService:
-    def __init__(self, data_path: str = "./data/regulations"):
+    def __init__(self, data_path: str = "./data/regulations", busy_timeout: float = 30.0,
+                 pool_size: int = 8):
         self.data_path = Path(data_path)
         self.db_path = self.data_path / "regulations.db"
         self.last_update_check = datetime.min
         self.session: Optional[aiohttp.ClientSession] = None
         
+        # Bounded pool of reusable connections shared by all threads; the
+        # threaded Flask server uses a new thread per request, so connections
+        # are borrowed per use rather than owned by a thread
+        self.busy_timeout = busy_timeout
+        self.pool_size = pool_size
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        # Connection currently borrowed by this thread, so nested use reuses it
+        self._local = threading.local()
+        
         # Ensure data directory exists
         self.data_path.mkdir(parents=True, exist_ok=True)
         self._init_database()
         
+        # ETag/Last-Modified per source URL for conditional re-fetches
+        self.validators = HTTPValidatorStore(self.data_path / "http_validators.db")
+        
     def _init_database(self):
         """Initialize SQLite database for storing regulations"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_db_connection() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS regulations (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -358,21 +381,127 @@ class RegulatoryDataService:
                 )
             """)
             
-            conn.execute("""
+            conn.executescript("""
                 CREATE INDEX IF NOT EXISTS idx_state_code ON regulations(state_code);
                 CREATE INDEX IF NOT EXISTS idx_category ON regulations(category);
                 CREATE INDEX IF NOT EXISTS idx_content_hash ON regulations(content_hash);
             """)
+            
+            self._init_fts(conn)
+    
+    def _init_fts(self, conn: sqlite3.Connection):
+        """Create the FTS5 index over regulation titles and content, kept in sync by triggers"""
+        conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS regulations_fts USING fts5(
+                title, content,
+                content='regulations', content_rowid='id',
+                tokenize='porter unicode61'
+            );
+            
+            CREATE TRIGGER IF NOT EXISTS regulations_fts_insert AFTER INSERT ON regulations BEGIN
+                INSERT INTO regulations_fts(rowid, title, content)
+                VALUES (new.id, new.title, new.content);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS regulations_fts_delete AFTER DELETE ON regulations BEGIN
+                INSERT INTO regulations_fts(regulations_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS regulations_fts_update AFTER UPDATE ON regulations BEGIN
+                INSERT INTO regulations_fts(regulations_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+                INSERT INTO regulations_fts(rowid, title, content)
+                VALUES (new.id, new.title, new.content);
+            END;
+        """)
+        
+        # Backfill the index for databases created before FTS was added
+        indexed = conn.execute("SELECT COUNT(*) FROM regulations_fts_docsize").fetchone()[0]
+        total = conn.execute("SELECT COUNT(*) FROM regulations").fetchone()[0]
+        if indexed != total:
+            logger.info(f"Rebuilding regulation full-text index ({total} regulations)")
+            conn.execute("INSERT INTO regulations_fts(regulations_fts) VALUES ('rebuild')")
+        conn.commit()
+    
+    @staticmethod
+    def _row_to_regulation(row: sqlite3.Row) -> StateRegulation:
+        """Build a StateRegulation from a database row, ignoring extra columns"""
+        field_names = {field.name for field in fields(StateRegulation)}
+        return StateRegulation(**{key: row[key] for key in row.keys() if key in field_names})
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in WAL mode so readers don't block on the update writer"""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """Borrow an idle connection, opening one if the pool is below its size"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._pool_lock:
+            if self._opened < self.pool_size:
+                self._opened += 1
+                opened = True
+            else:
+                opened = False
+        if opened:
+            try:
+                return self._connect()
+            except Exception:
+                with self._pool_lock:
+                    self._opened -= 1
+                raise
+        
+        try:
+            return self._pool.get(timeout=self.busy_timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"No database connection available after {self.busy_timeout}s (pool size {self.pool_size})"
+            )
+    
+    def _release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool without an open transaction"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._pool.put(conn)
     
     @contextmanager
     def get_db_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager borrowing a pooled database connection for the duration of the block"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+        
+        conn = self._local.conn = self._acquire()
         try:
             yield conn
+        except Exception:
+            # Never leave a failed transaction open on a reused connection
+            conn.rollback()
+            raise
         finally:
+            self._local.conn = None
+            self._release(conn)
+    
+    def close_connections(self):
+        """Close all idle pooled database connections"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
             conn.close()
+            with self._pool_lock:
+                self._opened -= 1
     
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session"""
@@ -387,22 +516,39 @@ class RegulatoryDataService:
             self.session = aiohttp.ClientSession(timeout=timeout, headers=headers)
         return self.session
     
-    async def _fetch_regulation_content(self, url: str) -> str:
-        """Fetch regulation content from URL"""
+    async def _fetch_regulation_content(self, url: str, conditional: bool = True
+                                        ) -> Tuple[Optional[str], Optional[ConditionalResponse]]:
+        """
+        Fetch regulation content from URL
+        
+        Returns (content, response); content is None if unchanged since the last
+        fetch. The response's validators are committed once the content is saved.
+        """
         try:
             session = await self._get_session()
             logger.info(f"Fetching regulation from: {url}")
             
-            async with session.get(url) as response:
-                if response.status != 200:
-                    raise aiohttp.ClientError(f"HTTP {response.status}: {response.reason}")
-                
-                content = await response.text()
-                return content
+            response = await conditional_get(session, url, self.validators, conditional=conditional)
+            if not response.changed:
+                logger.info(f"Regulation unchanged (HTTP {response.status}): {url}")
+                return None, response
+            if response.status != 200:
+                raise aiohttp.ClientError(f"HTTP {response.status}")
+            
+            return response.text(), response
                 
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
-            return f"Error fetching regulation: {str(e)}"
+            return f"Error fetching regulation: {str(e)}", None
+    
+    def _get_stored_regulation(self, state_code: str, category: str, url: str) -> Optional[StateRegulation]:
+        """Get the stored regulation for a source, if any"""
+        with self.get_db_connection() as conn:
+            row = conn.execute("""
+                SELECT * FROM regulations 
+                WHERE state_code = ? AND category = ? AND url = ?
+            """, (state_code, category, url)).fetchone()
+            return self._row_to_regulation(row) if row else None
     
     def _extract_text_from_html(self, html: str) -> str:
         """Extract meaningful text from HTML content"""
@@ -434,10 +580,21 @@ class RegulatoryDataService:
             return []
         
         regulations = []
+        changed_regulations = []
+        fetched_responses = []
         
         for source in state_info['sources']:
             try:
-                content = await self._fetch_regulation_content(source['url'])
+                # Only a stored regulation can stand in for an unchanged page
+                stored = self._get_stored_regulation(state_code, source['category'], source['url'])
+                content, response = await self._fetch_regulation_content(source['url'], conditional=stored is not None)
+                
+                if content is None:
+                    # Not modified: keep the stored regulation without re-parsing or re-saving
+                    self.validators.commit(response)
+                    regulations.append(stored)
+                    continue
+                
                 clean_content = self._extract_text_from_html(content)
                 content_hash = self._generate_hash(clean_content)
                 
@@ -455,7 +612,9 @@ class RegulatoryDataService:
                 )
                 
                 regulations.append(regulation)
-                await self._save_regulation(regulation)
+                changed_regulations.append(regulation)
+                if response is not None:
+                    fetched_responses.append(response)
                 
                 logger.info(f"Downloaded regulation: {state_code} - {source['title']}")
                 
@@ -465,23 +624,50 @@ class RegulatoryDataService:
             except Exception as e:
                 logger.error(f"Error downloading regulation for {state_code} - {source['title']}: {e}")
         
+        # Write all of the state's changed regulations in one transaction
+        await self._save_regulations(changed_regulations)
+        
+        # Only now may later fetches treat these pages as unchanged
+        for response in fetched_responses:
+            self.validators.commit(response)
+        
         return regulations
     
     async def _save_regulation(self, regulation: StateRegulation):
         """Save regulation to database"""
+        await self._save_regulations([regulation])
+    
+    async def _save_regulations(self, regulations: List[StateRegulation]):
+        """Save regulations to database in a single transaction"""
+        if not regulations:
+            return
+        
         with self.get_db_connection() as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO regulations 
-                (state, state_code, title, url, last_updated, content, content_hash, 
-                 version, effective_date, category, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                regulation.state, regulation.state_code, regulation.title,
-                regulation.url, regulation.last_updated, regulation.content,
-                regulation.content_hash, regulation.version, regulation.effective_date,
-                regulation.category, regulation.status
-            ))
-            conn.commit()
+            with conn:
+                # Upsert (rather than INSERT OR REPLACE) so the FTS update trigger fires
+                conn.executemany("""
+                    INSERT INTO regulations 
+                    (state, state_code, title, url, last_updated, content, content_hash, 
+                     version, effective_date, category, status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(state_code, category, url) DO UPDATE SET
+                        state = excluded.state,
+                        title = excluded.title,
+                        last_updated = excluded.last_updated,
+                        content = excluded.content,
+                        content_hash = excluded.content_hash,
+                        version = excluded.version,
+                        effective_date = excluded.effective_date,
+                        status = excluded.status
+                """, [
+                    (
+                        regulation.state, regulation.state_code, regulation.title,
+                        regulation.url, regulation.last_updated, regulation.content,
+                        regulation.content_hash, regulation.version, regulation.effective_date,
+                        regulation.category, regulation.status
+                    )
+                    for regulation in regulations
+                ])
     
     async def download_all_state_regulations(self):
         """Download regulations for all states"""
@@ -516,16 +702,26 @@ class RegulatoryDataService:
     
     async def _save_update_log(self, update: RegulatoryUpdate):
         """Save update log to database"""
+        await self._save_update_logs([update])
+    
+    async def _save_update_logs(self, updates: List[RegulatoryUpdate]):
+        """Save update logs to database in a single transaction"""
+        if not updates:
+            return
+        
         with self.get_db_connection() as conn:
-            conn.execute("""
-                INSERT INTO regulatory_updates 
-                (state, change_type, change_description, timestamp, regulation_data)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                update.state, update.change_type, update.change_description,
-                update.timestamp, json.dumps(asdict(update.regulation))
-            ))
-            conn.commit()
+            with conn:
+                conn.executemany("""
+                    INSERT INTO regulatory_updates 
+                    (state, change_type, change_description, timestamp, regulation_data)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [
+                    (
+                        update.state, update.change_type, update.change_description,
+                        update.timestamp, json.dumps(asdict(update.regulation))
+                    )
+                    for update in updates
+                ])
     
     def get_state_regulations(self, state_code: str) -> List[StateRegulation]:
         """Get regulations for a specific state"""
@@ -534,25 +730,75 @@ class RegulatoryDataService:
                 SELECT * FROM regulations WHERE state_code = ? ORDER BY last_updated DESC
             """, (state_code,)).fetchall()
             
-            return [StateRegulation(**dict(row)) for row in rows]
+            return [self._row_to_regulation(row) for row in rows]
     
-    def search_regulations(self, query: str, state_code: Optional[str] = None) -> List[StateRegulation]:
-        """Search regulations by content"""
+    @staticmethod
+    def _build_fts_query(query: str) -> str:
+        """
+        Convert a user query to an FTS5 MATCH expression
+        
+        "quoted text" is kept as a phrase and a trailing * marks a prefix
+        (e.g. licens*); all other punctuation is dropped. Terms are ANDed.
+        """
+        terms = []
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+            if phrase:
+                words = re.findall(r'\w+', phrase)
+                if words:
+                    terms.append('"' + ' '.join(words) + '"')
+            else:
+                words = re.findall(r'\w+', word)
+                if not words:
+                    continue
+                prefix = '*' if word.endswith('*') else ''
+                terms.extend(f'"{w}"' for w in words[:-1])
+                terms.append(f'"{words[-1]}"{prefix}')
+        return ' '.join(terms)
+    
+    def search_regulations_ranked(self, query: str, state_code: Optional[str] = None,
+                                  limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Full-text search over regulations ranked by BM25
+        
+        Supports "phrase queries" and prefix* terms. Returns dicts with the
+        regulation, its bm25 score (lower is better) and a highlighted snippet.
+        """
+        match_query = self._build_fts_query(query)
+        if not match_query:
+            return []
+        
+        # Title matches weigh more than body matches
         sql = """
-            SELECT * FROM regulations 
-            WHERE (title LIKE ? OR content LIKE ?)
+            SELECT r.*,
+                   bm25(regulations_fts, 10.0, 1.0) AS score,
+                   snippet(regulations_fts, 1, '[', ']', '...', 32) AS snippet
+            FROM regulations_fts
+            JOIN regulations r ON r.id = regulations_fts.rowid
+            WHERE regulations_fts MATCH ?
         """
-        params = [f"%{query}%", f"%{query}%"]
+        params: List[Any] = [match_query]
         
         if state_code:
-            sql += " AND state_code = ?"
+            sql += " AND r.state_code = ?"
             params.append(state_code)
         
-        sql += " ORDER BY last_updated DESC LIMIT 50"
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
         
         with self.get_db_connection() as conn:
             rows = conn.execute(sql, params).fetchall()
-            return [StateRegulation(**dict(row)) for row in rows]
+            return [
+                {
+                    'regulation': self._row_to_regulation(row),
+                    'score': row['score'],
+                    'snippet': row['snippet']
+                }
+                for row in rows
+            ]
+    
+    def search_regulations(self, query: str, state_code: Optional[str] = None) -> List[StateRegulation]:
+        """Search regulations by content"""
+        return [result['regulation'] for result in self.search_regulations_ranked(query, state_code)]
     
     async def check_for_updates(self) -> List[RegulatoryUpdate]:
         """Check for updates in regulations"""
@@ -566,6 +812,7 @@ class RegulatoryDataService:
                 
                 # Download current regulations
                 new_regulations = await self.download_state_regulations(state_code)
+                state_updates = []
                 
                 for new_reg in new_regulations:
                     existing_reg = existing_by_url.get(new_reg.url)
@@ -578,8 +825,7 @@ class RegulatoryDataService:
                             change_description='New regulation added',
                             timestamp=datetime.now().isoformat()
                         )
-                        updates.append(update)
-                        await self._save_update_log(update)
+                        state_updates.append(update)
                         
                     elif existing_reg.content_hash != new_reg.content_hash:
                         update = RegulatoryUpdate(
@@ -589,9 +835,11 @@ class RegulatoryDataService:
                             change_description='Regulation content updated',
                             timestamp=datetime.now().isoformat()
                         )
-                        updates.append(update)
-                        await self._save_update_log(update)
-                        
+                        state_updates.append(update)
+                
+                await self._save_update_logs(state_updates)
+                updates.extend(state_updates)
+                
             except Exception as e:
                 logger.error(f"Error checking updates for {state_code}: {e}")
         
@@ -660,6 +908,8 @@ class RegulatoryDataService:
         """Cleanup resources"""
         if self.session and not self.session.closed:
             await self.session.close()
+        self.close_connections()
+        self.validators.close()
 
 # Create singleton instance
 regulatory_service = RegulatoryDataService()
@@ -82,7 +82,7 @@ def search_regulations():
         if not query:
             return jsonify({'error': 'Search query is required'}), 400
         
-        results = regulatory_service.search_regulations(
+        results = regulatory_service.search_regulations_ranked(
             query, 
             state.upper() if state else None
         )
@@ -93,14 +93,15 @@ def search_regulations():
             'result_count': len(results),
             'results': [
                 {
-                    'state': reg.state_code,
-                    'title': reg.title,
-                    'category': reg.category,
-                    'last_updated': reg.last_updated,
-                    'url': reg.url,
-                    'relevant_excerpt': _extract_relevant_excerpt(reg.content, query)
+                    'state': result['regulation'].state_code,
+                    'title': result['regulation'].title,
+                    'category': result['regulation'].category,
+                    'last_updated': result['regulation'].last_updated,
+                    'url': result['regulation'].url,
+                    'score': -result['score'],  # bm25() is lower-is-better
+                    'relevant_excerpt': result['snippet']
                 }
-                for reg in results
+                for result in results
             ]
         })
     except Exception as e:
@@ -7,10 +7,31 @@ import json
 import yaml
 from typing import List, Dict, Any, Optional
 from langchain.embeddings import OpenAIEmbeddings
+from langchain.embeddings.base import Embeddings
 from langchain.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from .astradb_vector_store import AstraDBVectorStore, create_agent_vector_store
+from .embedding_utils import BatchedEmbedder, get_shared_embedding_cache
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain embeddings wrapper that consults the shared on-disk embedding cache"""
+    
+    def __init__(self, embeddings: Embeddings, model_name: str, batch_size: int = 100):
+        self.embeddings = embeddings
+        self.embedder = BatchedEmbedder(
+            embeddings.embed_documents,
+            batch_size=batch_size,
+            cache=get_shared_embedding_cache(),
+            model_name=model_name
+        )
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedder.embed(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedder.embed_one(text)
 
 
 class BaseRetriever:
@@ -40,6 +61,8 @@ class BaseRetriever:
                 model=embedding_config['model'],
                 openai_api_key=os.getenv('OPENAI_API_KEY')
             )
+            if embedding_config.get('cache', True):
+                self.embeddings = CachedEmbeddings(self.embeddings, embedding_config['model'])
         
         # Initialize text splitter
         chunking_config = self.config['chunking']
@@ -61,10 +84,42 @@ class BaseRetriever:
         
         if os.path.exists(index_path):
             self.vectorstore = FAISS.load_local(index_path, self.embeddings)
+            self._apply_index_type()
         else:
             # Create new vectorstore from corpus
             self._create_vectorstore_from_corpus()
     
+    def _apply_index_type(self):
+        """Replace the flat FAISS index with an approximate one (ivf/hnsw) when configured"""
+        retrieval_config = self.config['retrieval']
+        index_type = retrieval_config.get('index_type', 'flat')
+        if index_type == 'flat' or not self.vectorstore:
+            return
+        
+        import faiss
+        from .faiss_index_utils import create_faiss_index, set_search_params
+        
+        current_index = self.vectorstore.index
+        if isinstance(faiss.downcast_index(current_index), faiss.IndexFlat) and current_index.ntotal > 0:
+            # Rebuild from the flat vectors, keeping positions so docstore ids still line up
+            vectors = current_index.reconstruct_n(0, current_index.ntotal)
+            new_index = create_faiss_index(
+                index_type,
+                current_index.d,
+                metric=current_index.metric_type,
+                training_vectors=vectors,
+                nlist=retrieval_config.get('nlist'),
+                hnsw_m=retrieval_config.get('hnsw_m', 32)
+            )
+            new_index.add(vectors)
+            self.vectorstore.index = new_index
+        
+        set_search_params(
+            self.vectorstore.index,
+            nprobe=retrieval_config.get('nprobe', 16),
+            ef_search=retrieval_config.get('ef_search', 64)
+        )
+    
     def _create_vectorstore_from_corpus(self):
         """Create vectorstore from corpus.jsonl file"""
         retrieval_config = self.config['retrieval']
@@ -82,6 +137,7 @@ class BaseRetriever:
         
         if documents:
             self.vectorstore = FAISS.from_documents(documents, self.embeddings)
+            self._apply_index_type()
             self.vectorstore.save_local(retrieval_config['index_path'])
     
     def retrieve(self, query: str, top_k: Optional[int] = None) -> List[Document]:
@@ -127,6 +183,7 @@ class BaseRetriever:
             # Use FAISS
             if not self.vectorstore:
                 self.vectorstore = FAISS.from_documents(documents, self.embeddings)
+                self._apply_index_type()
             else:
                 self.vectorstore.add_documents(documents)
             
@@ -4,7 +4,6 @@ Collects data from supplier websites for the sourcing agent
 """
 
 import asyncio
-import aiohttp
 import requests
 from bs4 import BeautifulSoup
 from typing import Dict, List, Any, Optional
@@ -15,6 +14,11 @@ from urllib.parse import urljoin, urlparse
 import re
 from datetime import datetime
 
+try:
+    from .crawl_engine import CrawlEngine
+except ImportError:
+    from crawl_engine import CrawlEngine
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,10 +29,19 @@ class CannabisSourceScraper:
     def __init__(self, sources_file: str = "sources/sources.json"):
         self.sources_file = sources_file
         self.sources_data = self._load_sources()
-        self.session = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.engine = self._create_engine()
+    
+    def _create_engine(self, max_concurrent: int = 5) -> CrawlEngine:
+        """Shared fetcher with per-host politeness and retries"""
+        return CrawlEngine(
+            max_concurrency=max_concurrent,
+            per_host_delay=1.0,
+            timeout=30,
+            user_agent=self.headers['User-Agent']
+        )
     
     def _load_sources(self) -> Dict[str, Any]:
         """Load sources data from JSON file"""
@@ -41,19 +54,11 @@ class CannabisSourceScraper:
     
     async def _get_session(self):
         """Get or create aiohttp session"""
-        if self.session is None:
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(
-                headers=self.headers,
-                timeout=timeout
-            )
-        return self.session
+        return await self.engine.get_session()
     
     async def close_session(self):
         """Close the aiohttp session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        await self.engine.close()
     
     async def scrape_source(self, source: Dict[str, Any]) -> Dict[str, Any]:
         """Scrape a single source website"""
@@ -62,42 +67,46 @@ class CannabisSourceScraper:
             return {'error': 'No URL provided'}
         
         try:
-            session = await self._get_session()
-            
             # Add protocol if missing
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
             logger.info(f"Scraping: {url}")
             
-            async with session.get(url, allow_redirects=True) as response:
-                if response.status != 200:
-                    return {
-                        'url': url,
-                        'error': f'HTTP {response.status}',
-                        'status': response.status
-                    }
-                
-                content = await response.text()
-                
-                # Parse with BeautifulSoup
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Extract data
-                scraped_data = {
+            response = await self.engine.fetch(url, allow_redirects=True)
+            if response.error:
+                logger.error(f"Error scraping {url}: {response.error}")
+                return {
                     'url': url,
-                    'timestamp': datetime.now().isoformat(),
-                    'status': 'success',
-                    'title': self._extract_title(soup),
-                    'description': self._extract_description(soup),
-                    'products': self._extract_products(soup, source),
-                    'contact_info': self._extract_contact_info(soup),
-                    'location': self._extract_location(soup, source),
-                    'certifications': self._extract_certifications(soup),
-                    'services': self._extract_services(soup, source)
+                    'error': response.error,
+                    'status': 'error',
+                    'timestamp': datetime.now().isoformat()
                 }
-                
-                return scraped_data
+            if response.status != 200:
+                return {
+                    'url': url,
+                    'error': f'HTTP {response.status}',
+                    'status': response.status
+                }
+            
+            # Parse with BeautifulSoup
+            soup = BeautifulSoup(response.text(), 'html.parser')
+            
+            # Extract data
+            scraped_data = {
+                'url': url,
+                'timestamp': datetime.now().isoformat(),
+                'status': 'success',
+                'title': self._extract_title(soup),
+                'description': self._extract_description(soup),
+                'products': self._extract_products(soup, source),
+                'contact_info': self._extract_contact_info(soup),
+                'location': self._extract_location(soup, source),
+                'certifications': self._extract_certifications(soup),
+                'services': self._extract_services(soup, source)
+            }
+            
+            return scraped_data
                 
         except Exception as e:
             logger.error(f"Error scraping {url}: {e}")
@@ -295,17 +304,12 @@ class CannabisSourceScraper:
         
         logger.info(f"Found {len(all_sources)} sources to scrape")
         
-        # Scrape with rate limiting
-        semaphore = asyncio.Semaphore(max_concurrent)
-        
-        async def scrape_with_semaphore(source):
-            async with semaphore:
-                result = await self.scrape_source(source)
-                # Add delay to be respectful
-                await asyncio.sleep(1)
-                return result
+        # Rate limiting is per host (CrawlEngine), so different suppliers are scraped in parallel
+        if self.engine.max_concurrency != max_concurrent:
+            await self.close_session()
+            self.engine = self._create_engine(max_concurrent)
         
-        tasks = [scrape_with_semaphore(source) for source in all_sources]
+        tasks = [self.scrape_source(source) for source in all_sources]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Process results
@@ -0,0 +1,254 @@
+"""
+Sharded Unified Search Index
+
+Stores the cross-state search index as one shard per state plus a small
+manifest. Shard files are content-addressed and the manifest is replaced
+atomically, so updating one state rewrites only that state's shard and
+readers never see a half-written index. Superseded shard files are kept
+until the following write, so a reader holding the previous manifest can
+still open them. Shards are loaded lazily, so query-time memory scales with
+the states actually queried.
+"""
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def _atomic_write(path: Path, write: Any):
+    """Write a file through a temporary sibling and os.replace, so readers see old or new, never partial"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ShardedSearchIndex:
+    """One shard per state (metadata JSON + embedding matrix) described by manifest.json"""
+
+    def __init__(self, index_dir: str, max_loaded_shards: Optional[int] = None):
+        self.index_dir = Path(index_dir)
+        self.shards_dir = self.index_dir / "shards"
+        self.shards_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.index_dir / "manifest.json"
+
+        self.max_loaded_shards = max_loaded_shards
+        # Keyed by shard content hash, so a shard rewritten by another process is reloaded
+        self.loaded_shards: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def load_manifest(self) -> Dict[str, Any]:
+        """Current manifest (an empty one if the index has never been written)"""
+        if not self.manifest_path.exists():
+            return {"version": MANIFEST_VERSION, "shards": {}, "superseded": []}
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        shards = manifest["shards"].values()
+        manifest["version"] = MANIFEST_VERSION
+        manifest["updated_at"] = datetime.now().isoformat()
+        manifest["total_citations"] = sum(shard["citations"] for shard in shards)
+        manifest["total_vectors"] = sum(shard["vectors"] for shard in shards)
+        payload = json.dumps(manifest, indent=2).encode()
+        _atomic_write(self.manifest_path, lambda f: f.write(payload))
+
+    def shard_source_hash(self, state: str) -> Optional[str]:
+        """Source hash recorded for a state's shard, or None if the state has no shard"""
+        entry = self.load_manifest()["shards"].get(state)
+        return entry["source_hash"] if entry else None
+
+    def write_shard(self, state: str, citations: List[Dict[str, Any]], vectors: List[Dict[str, Any]],
+                    source_hash: Optional[str] = None) -> bool:
+        """
+        Replace a state's shard
+
+        Args:
+            state: State code
+            citations: Citation records
+            vectors: Vector records, each with an "embedding" list
+            source_hash: Hash of the source files, recorded to detect unchanged states
+
+        Returns:
+            True if the shard changed, False if an identical shard was already in place
+        """
+        embeddings = np.array([vector["embedding"] for vector in vectors], dtype='float32')
+        if len(vectors) == 0:
+            embeddings = embeddings.reshape(0, 0)
+        metadata = {
+            "state": state,
+            "citations": citations,
+            "vectors": [{key: value for key, value in vector.items() if key != "embedding"} for vector in vectors]
+        }
+        metadata_bytes = json.dumps(metadata, ensure_ascii=False, sort_keys=True).encode()
+
+        hasher = hashlib.sha256(metadata_bytes)
+        hasher.update(embeddings.tobytes())
+        content_hash = hasher.hexdigest()
+
+        with self.lock:
+            manifest = self.load_manifest()
+            previous = manifest["shards"].get(state)
+            if previous and previous["content_hash"] == content_hash:
+                if source_hash and previous.get("source_hash") != source_hash:
+                    previous["source_hash"] = source_hash
+                    self._save_manifest(manifest)
+                return False
+
+            # Content-addressed shard files; the manifest swap makes them live
+            stem = f"{state}-{content_hash[:16]}"
+            metadata_file = self.shards_dir / f"{stem}.json"
+            embeddings_file = self.shards_dir / f"{stem}.npy"
+            _atomic_write(metadata_file, lambda f: f.write(metadata_bytes))
+            _atomic_write(embeddings_file, lambda f: np.save(f, embeddings))
+
+            superseded = self._supersede(manifest, previous)
+            manifest["shards"][state] = {
+                "metadata_file": metadata_file.name,
+                "embeddings_file": embeddings_file.name,
+                "content_hash": content_hash,
+                "source_hash": source_hash,
+                "citations": len(citations),
+                "vectors": len(vectors),
+                "dimension": int(embeddings.shape[1]) if len(vectors) else 0,
+                "bytes": len(metadata_bytes) + embeddings.nbytes,
+                "updated_at": datetime.now().isoformat()
+            }
+            self._save_manifest(manifest)
+            self._remove_files(manifest, superseded)
+            if previous:
+                self.loaded_shards.pop(previous["content_hash"], None)
+
+        logger.info(f"Wrote index shard for {state}: {len(citations)} citations, {len(vectors)} vectors")
+        return True
+
+    def remove_shard(self, state: str) -> bool:
+        """Drop a state's shard; returns False if it had none"""
+        with self.lock:
+            manifest = self.load_manifest()
+            entry = manifest["shards"].pop(state, None)
+            if entry is None:
+                return False
+            superseded = self._supersede(manifest, entry)
+            self._save_manifest(manifest)
+            self._remove_files(manifest, superseded)
+            self.loaded_shards.pop(entry["content_hash"], None)
+        return True
+
+    @staticmethod
+    def _supersede(manifest: Dict[str, Any], entry: Optional[Dict[str, Any]]) -> List[str]:
+        """
+        Record a replaced shard's files for deletion on the next write
+
+        Returns:
+            The files superseded by the previous write, now safe to delete
+        """
+        superseded = manifest.get("superseded", [])
+        manifest["superseded"] = [entry["metadata_file"], entry["embeddings_file"]] if entry else []
+        return superseded
+
+    def _remove_files(self, manifest: Dict[str, Any], filenames: List[str]):
+        # A state can return to earlier content, whose content-addressed files are live again
+        live = {entry[key] for entry in manifest["shards"].values() for key in ("metadata_file", "embeddings_file")}
+        live.update(manifest["superseded"])
+        for filename in filenames:
+            if filename not in live:
+                (self.shards_dir / filename).unlink(missing_ok=True)
+
+    def states(self) -> List[str]:
+        """States with a shard"""
+        return sorted(self.load_manifest()["shards"])
+
+    def load_shard(self, state: str) -> Optional[Dict[str, Any]]:
+        """
+        A state's shard (loaded on first use, and again once the manifest points at new content)
+
+        Returns:
+            {"citations", "vectors", "embeddings" (unit-normalized matrix)} or None
+        """
+        with self.lock:
+            entry = self.load_manifest()["shards"].get(state)
+            if entry is None:
+                return None
+
+            content_hash = entry["content_hash"]
+            if content_hash in self.loaded_shards:
+                self.loaded_shards.move_to_end(content_hash)
+                return self.loaded_shards[content_hash]
+
+            with open(self.shards_dir / entry["metadata_file"], 'r', encoding='utf-8') as f:
+                shard = json.load(f)
+            embeddings = np.load(self.shards_dir / entry["embeddings_file"])
+            if len(embeddings):
+                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+                embeddings = embeddings / np.maximum(norms, 1e-12)
+            shard["embeddings"] = embeddings
+
+            # Drop an older version of this state's shard
+            for stale in [key for key, loaded in self.loaded_shards.items() if loaded["state"] == state]:
+                del self.loaded_shards[stale]
+            self.loaded_shards[content_hash] = shard
+            if self.max_loaded_shards is not None:
+                while len(self.loaded_shards) > self.max_loaded_shards:
+                    self.loaded_shards.popitem(last=False)
+            return shard
+
+    def iter_citations(self, states: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Citations of the given states (all states by default), one shard at a time"""
+        for state in states or self.states():
+            shard = self.load_shard(state)
+            if shard:
+                yield from shard["citations"]
+
+    def search(self, query_embedding: Sequence[float], k: int = 10,
+               states: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Cosine-similarity search over the given states' shards
+
+        Returns:
+            Vector records with a "score", best first
+        """
+        query = np.asarray(query_embedding, dtype='float32')
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        candidates = []
+        for state in states or self.states():
+            shard = self.load_shard(state)
+            if not shard or not len(shard["embeddings"]):
+                continue
+            scores = shard["embeddings"] @ query
+            top = np.argsort(-scores)[:k]
+            candidates.extend((float(scores[i]), shard["vectors"][i]) for i in top)
+
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        return [{**vector, "score": score} for score, vector in candidates[:k]]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Index totals from the manifest, plus shards currently in memory"""
+        manifest = self.load_manifest()
+        return {
+            "index_dir": str(self.index_dir),
+            "shards": len(manifest["shards"]),
+            "total_citations": manifest.get("total_citations", 0),
+            "total_vectors": manifest.get("total_vectors", 0),
+            "loaded_shards": [shard["state"] for shard in self.loaded_shards.values()]
+        }
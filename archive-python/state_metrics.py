@@ -7,8 +7,6 @@ Collects real cannabis regulatory data from state websites
 import json
 import os
 import sys
-import requests
-import time
 from datetime import datetime, timedelta
 from pathlib import Path
 import argparse
@@ -16,6 +14,8 @@ from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import hashlib
 
+from crawl_engine import FetchError, FetchResult, fetch_urls
+
 # Cannabis legal states with their regulatory website URLs
 STATE_SOURCES = {
     'ca': {
@@ -176,19 +176,28 @@ class StateDataCollector:
         self.states_dir = self.data_dir / "states"
         self.states_dir.mkdir(parents=True, exist_ok=True)
         
-        # Create session with realistic headers
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        # Realistic headers for the shared crawl engine
+        self.headers = {
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
-        })
-        
-    def collect_state_data(self, state_code, max_pages=10):
-        """Collect real regulatory data from a state website"""
+        }
+        self.user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    
+    def fetch_state_pages(self, state_codes):
+        """Fetch state main pages concurrently, rate limited per host"""
+        urls = {code: STATE_SOURCES[code]['url'] for code in state_codes if code in STATE_SOURCES}
+        pages = fetch_urls(
+            urls.values(),
+            headers=self.headers,
+            user_agent=self.user_agent,
+            per_host_delay=2.0,
+            timeout=30
+        )
+        return {code: pages[url] for code, url in urls.items()}
+    
+    def collect_state_data(self, state_code, max_pages=10, page: FetchResult = None):
+        """Collect real regulatory data from a state website (page: prefetched main page)"""
         if state_code not in STATE_SOURCES:
             return None
             
@@ -200,11 +209,12 @@ class StateDataCollector:
         
         try:
             # Fetch main page
-            response = self.session.get(state_info['url'], timeout=30)
-            response.raise_for_status()
+            if page is None:
+                page = self.fetch_state_pages([state_code])[state_code]
+            page.raise_for_status()
             
             # Parse content
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(page.body, 'html.parser')
             
             # Extract text content
             text_content = soup.get_text()
@@ -212,7 +222,7 @@ class StateDataCollector:
             # Save raw HTML
             html_file = state_dir / "main_page.html"
             with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(response.text)
+                f.write(page.text())
             
             # Extract regulations and citations
             citations = self.extract_citations(soup, text_content)
@@ -220,7 +230,7 @@ class StateDataCollector:
             regulations = self.extract_regulations(soup, text_content)
             
             # Calculate file metrics
-            file_size = len(response.content)
+            file_size = len(page.body)
             
             # Generate state metrics
             metrics = {
@@ -276,7 +286,7 @@ class StateDataCollector:
             print(f"✓ {state_info['name']}: {len(citations)} citations, {len(regulations)} regulations")
             return metrics
             
-        except requests.RequestException as e:
+        except FetchError as e:
             print(f"✗ {state_info['name']}: Network error - {e}")
             return self.create_failed_metrics(state_code, state_info, str(e))
         except Exception as e:
@@ -404,15 +414,13 @@ def main():
     
     print(f"Processing {len(states_to_process)} states...")
     
-    # Collect data from each state
+    # Fetch all state sites in parallel (politeness is per host), then collect from each
+    pages = collector.fetch_state_pages(states_to_process)
     all_metrics = []
     for state_code in states_to_process:
-        metrics = collector.collect_state_data(state_code)
+        metrics = collector.collect_state_data(state_code, page=pages.get(state_code))
         if metrics:
             all_metrics.append(metrics)
-        
-        # Respectful delay between requests
-        time.sleep(2)
     
     # Generate summary metrics
     summary_metrics = {
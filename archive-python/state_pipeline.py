@@ -28,6 +28,13 @@ import subprocess
 import time
 import hashlib
 import pickle
+import re
+import html
+
+from file_hashing import FileHashCache
+from sharded_index import ShardedSearchIndex
+from embedding_utils import BatchedEmbedder, Embedder, SentenceTransformerEmbedder, get_shared_embedding_cache
+from task_graph import CheckpointStore, PipelineTask, TaskGraph, TaskOutcome
 
 # Configure logging
 logging.basicConfig(
@@ -39,10 +46,23 @@ logger = logging.getLogger(__name__)
 class StatePipeline:
     """Individual state processing pipeline"""
     
-    def __init__(self, state_code: str, base_dir: str = "."):
+    # Phases in dependency order; each runs as a checkpointed task
+    PHASES = ["mirroring", "citation_extraction", "vectorization", "validation"]
+    
+    def __init__(self, state_code: str, base_dir: str = ".", embedder: Optional[Embedder] = None,
+                 use_embedding_cache: bool = True, mirror_max_age_days: Optional[float] = 7):
         self.state_code = state_code.lower()
         self.base_dir = Path(base_dir)
         
+        # Mirrors are refreshed once they are this old (None: only when forced)
+        self.mirror_max_age_days = mirror_max_age_days
+        
+        # Phase 3 embeds every citation chunk with a local model (cached by content hash)
+        self.embedder = embedder or SentenceTransformerEmbedder()
+        self.embedding_cache = get_shared_embedding_cache() if use_embedding_cache else None
+        self.embedding_batch_size = 100
+        self.chunk_chars = 1000  # Citation text embedded with each section
+        
         # State-specific directories
         self.state_dir = self.base_dir / "states" / self.state_code
         self.mirrors_dir = self.state_dir / "mirrors"
@@ -65,10 +85,12 @@ class StatePipeline:
             "current_phase": "initialization",
             "completed_phases": [],
             "failed_phases": [],
+            "skipped_phases": [],
             "metrics": {
                 "files_mirrored": 0,
                 "citations_extracted": 0,
                 "vectors_created": 0,
+                "chunks_per_second": 0.0,
                 "processing_time": 0
             },
             "errors": []
@@ -158,8 +180,9 @@ class StatePipeline:
                         url
                     ]
                     
-                    # Execute wget
-                    result = subprocess.run(
+                    # Execute wget (in a thread so other states' tasks keep running)
+                    result = await asyncio.to_thread(
+                        subprocess.run,
                         cmd,
                         cwd=self.mirrors_dir,
                         capture_output=True,
@@ -249,23 +272,14 @@ class StatePipeline:
             
             logger.info(f"[{self.state_code.upper()}] Found {len(html_files)} HTML files, {len(pdf_files)} PDF files")
             
-            # Process files and extract citations
-            citations = []
-            
-            for html_file in html_files[:10]:  # Limit for testing
-                try:
-                    # Extract citations from HTML
-                    file_citations = self._extract_citations_from_html(html_file)
-                    citations.extend(file_citations)
-                    
-                except Exception as e:
-                    logger.warning(f"[{self.state_code.upper()}] Error processing {html_file}: {str(e)}")
+            # Process files and extract citations (in a thread so other states' tasks keep running)
+            citations = await asyncio.to_thread(self._extract_citations_from_files, html_files)
             
             # Save citations
             citation_result = {
                 "state": self.state_code,
                 "total_citations": len(citations),
-                "files_processed": len(html_files) + len(pdf_files),
+                "files_processed": len(html_files),
                 "citations": citations,
                 "completed_at": datetime.now().isoformat()
             }
@@ -293,17 +307,39 @@ class StatePipeline:
             self._update_phase("citation_extraction", "failed")
             return {"status": "failed", "error": str(e)}
     
+    def _extract_citations_from_files(self, html_files: List[Path]) -> List[Dict[str, Any]]:
+        """Extract citations from a list of HTML files"""
+        citations = []
+        
+        for html_file in html_files:
+            try:
+                # Extract citations from HTML
+                file_citations = self._extract_citations_from_html(html_file)
+                citations.extend(file_citations)
+                
+            except Exception as e:
+                logger.warning(f"[{self.state_code.upper()}] Error processing {html_file}: {str(e)}")
+        
+        return citations
+    
+    @staticmethod
+    def _html_to_text(content: str) -> str:
+        """Visible text of an HTML page with whitespace collapsed"""
+        content = re.sub(r'<(script|style)\b.*?</\1>', ' ', content, flags=re.IGNORECASE | re.DOTALL)
+        content = re.sub(r'<[^>]+>', ' ', content)
+        return " ".join(html.unescape(content).split())
+    
     def _extract_citations_from_html(self, html_file: Path) -> List[Dict[str, Any]]:
-        """Extract citations from HTML file"""
+        """Extract citations, each with the text chunk that follows it, from an HTML file"""
         citations = []
         
         try:
             with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
             
-            # Simple citation extraction (placeholder)
+            # Simple citation extraction
             # In production, this would use the citation_system.py
-            import re
+            text = self._html_to_text(content)
             
             # Look for section patterns
             section_patterns = [
@@ -314,15 +350,16 @@ class StatePipeline:
             ]
             
             for pattern in section_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                for match in matches:
+                for match in re.finditer(pattern, text, re.IGNORECASE):
+                    section = match.group(1)
                     citation = {
                         "state": self.state_code,
-                        "section": match,
+                        "section": section,
                         "document_type": "regulation",
+                        "text": text[match.start():match.start() + self.chunk_chars],
                         "source_file": str(html_file.relative_to(self.base_dir)),
                         "extracted_at": datetime.now().isoformat(),
-                        "hash_id": hashlib.md5(f"{self.state_code}_{match}".encode()).hexdigest()[:16]
+                        "hash_id": hashlib.md5(f"{self.state_code}_{section}".encode()).hexdigest()[:16]
                     }
                     citations.append(citation)
             
@@ -352,28 +389,46 @@ class StatePipeline:
             if not citations:
                 return {"status": "failed", "error": "No citations to vectorize"}
             
-            # Create embeddings (placeholder)
-            # In production, this would use the vectorize_compliance.py
+            # Embed every citation chunk; only chunks not already in the cache reach the model
+            texts = [citation.get("text") or f"Section {citation['section']}" for citation in citations]
+            embedder = BatchedEmbedder(
+                self.embedder.encode,
+                batch_size=self.embedding_batch_size,
+                cache=self.embedding_cache,
+                model_name=self.embedder.model_name
+            )
+            
+            embedding_start = time.perf_counter()
+            embeddings = await asyncio.to_thread(embedder.embed, texts)
+            embedding_seconds = time.perf_counter() - embedding_start
+            chunks_per_second = len(texts) / embedding_seconds if embedding_seconds > 0 else 0.0
+            
             vectors = []
+            created_at = datetime.now().isoformat()
             
-            for citation in citations:
-                # Create mock embedding
-                embedding = [0.1] * 384  # Mock 384-dimensional embedding
-                
+            for citation, embedding in zip(citations, embeddings):
                 vector = {
                     "citation_id": citation["hash_id"],
                     "state": self.state_code,
                     "section": citation["section"],
+                    "source_file": citation.get("source_file"),
                     "embedding": embedding,
-                    "created_at": datetime.now().isoformat()
+                    "created_at": created_at
                 }
                 vectors.append(vector)
             
+            embedding_stats = embedder.get_statistics()
+            embedding_stats.pop("cache", None)
+            
             # Save vectors
             vector_result = {
                 "state": self.state_code,
                 "total_vectors": len(vectors),
-                "embedding_dimension": 384,
+                "model_name": self.embedder.model_name,
+                "embedding_dimension": len(embeddings[0]),
+                "embedding_seconds": embedding_seconds,
+                "chunks_per_second": chunks_per_second,
+                "embedding_stats": embedding_stats,
                 "vectors": vectors,
                 "completed_at": datetime.now().isoformat()
             }
@@ -384,10 +439,12 @@ class StatePipeline:
             
             # Update metrics
             self.pipeline_status["metrics"]["vectors_created"] = len(vectors)
+            self.pipeline_status["metrics"]["chunks_per_second"] = chunks_per_second
             self.pipeline_status["metrics"]["processing_time"] += time.time() - start_time
             
             self._update_phase("vectorization", "completed")
-            logger.info(f"[{self.state_code.upper()}] Phase 3 completed: {len(vectors)} vectors created")
+            logger.info(f"[{self.state_code.upper()}] Phase 3 completed: {len(vectors)} vectors created "
+                       f"({chunks_per_second:.1f} chunks/sec, {embedding_stats['texts_embedded']} embedded by the model)")
             
             return vector_result
             
@@ -456,74 +513,158 @@ class StatePipeline:
             self._update_phase("validation", "failed")
             return {"status": "failed", "error": str(e)}
     
-    async def run_complete_pipeline(self) -> Dict[str, Any]:
-        """Run the complete pipeline for this state"""
+    def task_key(self, phase: str) -> str:
+        """Task graph key of one of this state's phases"""
+        return f"{self.state_code}/{phase}"
+    
+    def build_tasks(self) -> List[PipelineTask]:
+        """
+        This state's phases as task graph nodes
+        
+        Mirroring is addressed by the state's source configuration and the
+        mirrors' age bucket; every later phase by the content of the files its
+        dependencies produced.
+        """
+        phase_runs = {
+            "mirroring": (self.phase_1_mirror_websites, [self.mirrors_dir]),
+            "citation_extraction": (self.phase_2_extract_citations, [self.citations_dir / "citations.json"]),
+            "vectorization": (self.phase_3_create_vectors, [self.vectors_dir / "vectors.json"]),
+            "validation": (self.phase_4_validate_data, [self.validation_dir / "validation_results.json"])
+        }
+        
+        # Inputs that don't come from files: the state's sources, and the embedding model
+        phase_inputs = {
+            "mirroring": lambda: {"sources": self.state_config, "refresh": self._mirror_refresh_key()},
+            "citation_extraction": lambda: {"chunk_chars": self.chunk_chars},
+            "vectorization": lambda: {"model_name": self.embedder.model_name}
+        }
+        
+        tasks = []
+        for i, phase in enumerate(self.PHASES):
+            run, outputs = phase_runs[phase]
+            tasks.append(PipelineTask(
+                key=self.task_key(phase),
+                run=run,
+                deps=[self.task_key(previous) for previous in self.PHASES[:i]],
+                inputs=phase_inputs.get(phase, lambda: None),
+                outputs=outputs,
+                on_skip=lambda result, phase=phase: self._restore_phase(phase, result),
+                summarize=self._summarize_result
+            ))
+        return tasks
+    
+    def _mirror_refresh_key(self) -> Optional[int]:
+        """Current mirror_max_age_days period: a new period re-mirrors the state's sites"""
+        if not self.mirror_max_age_days:
+            return None
+        return int(time.time() // (self.mirror_max_age_days * 86400))
+    
+    @staticmethod
+    def _summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Phase result without the bulk citation and vector lists (those live in the phase's files)"""
+        return {key: value for key, value in result.items() if key not in ("citations", "vectors")}
+    
+    def _restore_phase(self, phase: str, result: Dict[str, Any]):
+        """Carry a skipped phase's metrics forward from its checkpoint"""
+        metric_sources = {
+            "mirroring": ("files_mirrored", "total_files"),
+            "citation_extraction": ("citations_extracted", "total_citations"),
+            "vectorization": ("vectors_created", "total_vectors")
+        }
+        if phase == "vectorization":
+            self.pipeline_status["metrics"]["chunks_per_second"] = result.get("chunks_per_second", 0.0)
+        if phase in metric_sources:
+            metric, result_key = metric_sources[phase]
+            self.pipeline_status["metrics"][metric] = result.get(result_key, 0)
+        self.pipeline_status["skipped_phases"].append(phase)
+        self._save_pipeline_status()
+    
+    def finalize(self, outcomes: Dict[str, TaskOutcome]) -> Dict[str, Any]:
+        """Build (and save) this state's final result from task graph outcomes"""
+        phase_results = {}
+        
+        for phase in self.PHASES:
+            outcome = outcomes.get(self.task_key(phase))
+            if outcome is None or not outcome.ok:
+                return {
+                    "status": "failed",
+                    "failed_phase": phase,
+                    "error": outcome.error if outcome else "phase did not run"
+                }
+            phase_results[phase] = self._summarize_result(outcome.result)
+        
+        total_time = sum(outcomes[self.task_key(phase)].duration for phase in self.PHASES)
+        
+        final_result = {
+            "state": self.state_code,
+            "status": "completed",
+            "total_processing_time": total_time,
+            "completed_phases": self.pipeline_status["completed_phases"],
+            "failed_phases": self.pipeline_status["failed_phases"],
+            "skipped_phases": self.pipeline_status["skipped_phases"],
+            "final_metrics": self.pipeline_status["metrics"],
+            "phase_results": phase_results,
+            "completed_at": datetime.now().isoformat()
+        }
+        
+        # Save final result
+        final_file = self.state_dir / "final_result.json"
+        with open(final_file, 'w') as f:
+            json.dump(final_result, f, indent=2)
+        
+        logger.info(f"[{self.state_code.upper()}] Complete pipeline finished in {total_time:.1f}s "
+                   f"({len(self.pipeline_status['skipped_phases'])} phases skipped)")
+        
+        return final_result
+    
+    async def run_complete_pipeline(self, force_phases: Optional[List[str]] = None,
+                                    checkpoints: Optional[CheckpointStore] = None) -> Dict[str, Any]:
+        """
+        Run the complete pipeline for this state
+        
+        Phases whose inputs are unchanged since their last successful run are
+        skipped, so a failed run resumes at the phase that failed.
+        """
         logger.info(f"[{self.state_code.upper()}] Starting complete pipeline")
         
-        pipeline_start_time = time.time()
+        own_checkpoints = checkpoints is None
+        if own_checkpoints:
+            checkpoints = CheckpointStore(str(self.base_dir / "aggregated" / "pipeline_checkpoints.db"))
         
         try:
-            # Phase 1: Mirror websites
-            mirror_result = await self.phase_1_mirror_websites()
-            if mirror_result.get("status") == "failed":
-                return {"status": "failed", "failed_phase": "mirroring", "error": mirror_result.get("error")}
-            
-            # Phase 2: Extract citations
-            citation_result = await self.phase_2_extract_citations()
-            if citation_result.get("status") == "failed":
-                return {"status": "failed", "failed_phase": "citation_extraction", "error": citation_result.get("error")}
-            
-            # Phase 3: Create vectors
-            vector_result = await self.phase_3_create_vectors()
-            if vector_result.get("status") == "failed":
-                return {"status": "failed", "failed_phase": "vectorization", "error": vector_result.get("error")}
-            
-            # Phase 4: Validate data
-            validation_result = await self.phase_4_validate_data()
-            if validation_result.get("status") == "failed":
-                return {"status": "failed", "failed_phase": "validation", "error": validation_result.get("error")}
-            
-            # Complete pipeline
-            total_time = time.time() - pipeline_start_time
-            
-            final_result = {
-                "state": self.state_code,
-                "status": "completed",
-                "total_processing_time": total_time,
-                "completed_phases": self.pipeline_status["completed_phases"],
-                "failed_phases": self.pipeline_status["failed_phases"],
-                "final_metrics": self.pipeline_status["metrics"],
-                "phase_results": {
-                    "mirroring": mirror_result,
-                    "citation_extraction": citation_result,
-                    "vectorization": vector_result,
-                    "validation": validation_result
-                },
-                "completed_at": datetime.now().isoformat()
-            }
-            
-            # Save final result
-            final_file = self.state_dir / "final_result.json"
-            with open(final_file, 'w') as f:
-                json.dump(final_result, f, indent=2)
-            
-            logger.info(f"[{self.state_code.upper()}] Complete pipeline finished in {total_time:.1f}s")
-            
-            return final_result
+            graph = TaskGraph(checkpoints, max_concurrency=1)
+            graph.add_many(self.build_tasks())
+            outcomes = await graph.run(force=[self.task_key(phase) for phase in force_phases or []])
+            return self.finalize(outcomes)
             
         except Exception as e:
             logger.error(f"[{self.state_code.upper()}] Pipeline failed: {str(e)}")
             return {"status": "failed", "error": str(e)}
+        finally:
+            if own_checkpoints:
+                checkpoints.close()
 
 
 class MultiStatePipelineManager:
     """Manages multiple state pipelines with parallel processing"""
     
-    def __init__(self, base_dir: str = "."):
+    def __init__(self, base_dir: str = ".", embedder: Optional[Embedder] = None,
+                 use_embedding_cache: bool = True, mirror_max_age_days: Optional[float] = 7):
         self.base_dir = Path(base_dir)
+        
+        # One embedding model shared by every state's pipeline
+        self.embedder = embedder or SentenceTransformerEmbedder()
+        self.use_embedding_cache = use_embedding_cache
+        self.mirror_max_age_days = mirror_max_age_days
         self.aggregated_dir = self.base_dir / "aggregated"
         self.aggregated_dir.mkdir(exist_ok=True)
         
+        # Phase checkpoints shared by all states
+        self.checkpoints = CheckpointStore(str(self.aggregated_dir / "pipeline_checkpoints.db"))
+        
+        # Unified search index: one shard per state plus a manifest
+        self.search_index = ShardedSearchIndex(str(self.aggregated_dir / "unified_index"))
+        
         # Load available states
         self.available_states = self._load_available_states()
         
@@ -549,11 +690,20 @@ class MultiStatePipelineManager:
         
         return list(data.get("cannabis_legal_states", {}).keys())
     
-    async def process_state(self, state_code: str) -> Dict[str, Any]:
+    async def process_state(self, state_code: str, force_phases: Optional[List[str]] = None) -> Dict[str, Any]:
         """Process a single state"""
-        pipeline = StatePipeline(state_code, self.base_dir)
-        result = await pipeline.run_complete_pipeline()
-        
+        pipeline = self._create_pipeline(state_code)
+        result = await pipeline.run_complete_pipeline(force_phases, checkpoints=self.checkpoints)
+        self._record_state_result(state_code, result)
+        return result
+    
+    def _create_pipeline(self, state_code: str) -> StatePipeline:
+        return StatePipeline(state_code, self.base_dir, embedder=self.embedder,
+                             use_embedding_cache=self.use_embedding_cache,
+                             mirror_max_age_days=self.mirror_max_age_days)
+    
+    def _record_state_result(self, state_code: str, result: Dict[str, Any]):
+        """Update manager status with a state's final result"""
         self.manager_status["processed_states"] += 1
         self.manager_status["state_results"][state_code] = result
         
@@ -561,38 +711,56 @@ class MultiStatePipelineManager:
             self.manager_status["successful_states"] += 1
         else:
             self.manager_status["failed_states"] += 1
-        
-        return result
     
-    async def process_states_parallel(self, states: List[str], max_workers: int = 3) -> Dict[str, Any]:
-        """Process multiple states in parallel"""
+    async def process_states_parallel(self, states: List[str], max_workers: int = 3,
+                                      force_phases: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Process multiple states as one task graph
+        
+        Phases of different states run concurrently (up to max_workers tasks at
+        a time), and phases checkpointed with unchanged inputs are skipped.
+        """
         logger.info(f"Starting parallel processing of {len(states)} states with {max_workers} workers")
         
-        # Create semaphore to limit concurrent processing
-        semaphore = asyncio.Semaphore(max_workers)
+        pipelines = {state: self._create_pipeline(state) for state in states}
         
-        async def process_with_semaphore(state_code: str):
-            async with semaphore:
-                return await self.process_state(state_code)
+        graph = TaskGraph(self.checkpoints, max_concurrency=max_workers)
+        for pipeline in pipelines.values():
+            graph.add_many(pipeline.build_tasks())
         
-        # Process all states
-        tasks = [process_with_semaphore(state) for state in states]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        outcomes = await graph.run(force=[
+            pipeline.task_key(phase) for pipeline in pipelines.values() for phase in force_phases or []
+        ])
         
         # Aggregate results
         final_results = {}
-        for state, result in zip(states, results):
-            if isinstance(result, Exception):
-                final_results[state] = {"status": "failed", "error": str(result)}
-            else:
-                final_results[state] = result
+        for state, pipeline in pipelines.items():
+            try:
+                final_results[state] = pipeline.finalize(outcomes)
+            except Exception as e:
+                final_results[state] = {"status": "failed", "error": str(e)}
+            self._record_state_result(state, final_results[state])
         
         # Save aggregated results
+        # Embedding throughput across the states vectorized in this run
+        vectorization_results = [
+            outcomes[pipeline.task_key("vectorization")].result for pipeline in pipelines.values()
+            if outcomes[pipeline.task_key("vectorization")].status == "completed"
+        ]
+        chunks_embedded = sum(result.get("total_vectors", 0) for result in vectorization_results)
+        embedding_seconds = sum(result.get("embedding_seconds", 0.0) for result in vectorization_results)
+        
         aggregated_result = {
             "processing_completed_at": datetime.now().isoformat(),
             "total_states": len(states),
             "successful_states": self.manager_status["successful_states"],
             "failed_states": self.manager_status["failed_states"],
+            "embedding_throughput": {
+                "model_name": self.embedder.model_name,
+                "chunks": chunks_embedded,
+                "embedding_seconds": embedding_seconds,
+                "chunks_per_second": chunks_embedded / embedding_seconds if embedding_seconds > 0 else 0.0
+            },
             "state_results": final_results
         }
         
@@ -600,51 +768,85 @@ class MultiStatePipelineManager:
         with open(aggregated_file, 'w') as f:
             json.dump(aggregated_result, f, indent=2)
         
-        logger.info(f"Parallel processing completed: {self.manager_status['successful_states']}/{len(states)} states successful")
+        logger.info(f"Parallel processing completed: {self.manager_status['successful_states']}/{len(states)} states successful, "
+                   f"{aggregated_result['embedding_throughput']['chunks_per_second']:.1f} chunks/sec embedded")
         
         return aggregated_result
     
-    def create_unified_search_index(self) -> Dict[str, Any]:
-        """Create unified search index from all state data"""
-        logger.info("Creating unified search index from all state data")
+    def create_unified_search_index(self, states: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Create or update the sharded unified search index
         
-        # Aggregate all citations
-        all_citations = []
-        all_vectors = []
+        A state's shard is rewritten only when its citation or vector files
+        changed; other shards are left untouched.
+        """
+        logger.info("Updating unified search index from state data")
         
-        for state_code in self.available_states:
-            state_dir = self.base_dir / "states" / state_code
-            
-            # Load citations
-            citation_file = state_dir / "citations" / "citations.json"
-            if citation_file.exists():
-                with open(citation_file, 'r') as f:
-                    citation_data = json.load(f)
-                all_citations.extend(citation_data.get("citations", []))
-            
-            # Load vectors
-            vector_file = state_dir / "vectors" / "vectors.json"
-            if vector_file.exists():
-                with open(vector_file, 'r') as f:
-                    vector_data = json.load(f)
-                all_vectors.extend(vector_data.get("vectors", []))
+        hash_cache = FileHashCache(self.aggregated_dir / "index_file_hashes.db", algorithm="blake2b")
+        written, unchanged, removed = [], [], []
         
-        # Create unified index
+        try:
+            for state_code in states or self.available_states:
+                state_dir = self.base_dir / "states" / state_code
+                citation_file = state_dir / "citations" / "citations.json"
+                vector_file = state_dir / "vectors" / "vectors.json"
+                
+                if not citation_file.exists():
+                    if self.search_index.remove_shard(state_code):
+                        removed.append(state_code)
+                    continue
+                
+                # Skip states whose source files are unchanged since their shard was written
+                source_hash = hashlib.sha256(
+                    f"{hash_cache.get_hash(citation_file)}:"
+                    f"{hash_cache.get_hash(vector_file) if vector_file.exists() else 'none'}".encode()
+                ).hexdigest()
+                if self.search_index.shard_source_hash(state_code) == source_hash:
+                    unchanged.append(state_code)
+                    continue
+                
+                with open(citation_file, 'r') as f:
+                    citations = json.load(f).get("citations", [])
+                
+                vectors = []
+                if vector_file.exists():
+                    with open(vector_file, 'r') as f:
+                        vectors = json.load(f).get("vectors", [])
+                
+                if self.search_index.write_shard(state_code, citations, vectors, source_hash):
+                    written.append(state_code)
+                else:
+                    unchanged.append(state_code)
+            
+            # States no longer configured drop out of a full rebuild
+            if states is None:
+                for state_code in set(self.search_index.states()) - set(self.available_states):
+                    self.search_index.remove_shard(state_code)
+                    removed.append(state_code)
+        finally:
+            hash_cache.close()
+        
+        # The monolithic index is superseded by the shards
+        legacy_file = self.aggregated_dir / "unified_index.json"
+        if legacy_file.exists():
+            legacy_file.unlink()
+            logger.info(f"Removed superseded {legacy_file.name}")
+        
+        index_stats = self.search_index.get_statistics()
         unified_index = {
-            "total_citations": len(all_citations),
-            "total_vectors": len(all_vectors),
-            "states_included": len([s for s in self.available_states if (self.base_dir / "states" / s / "citations" / "citations.json").exists()]),
-            "citations": all_citations,
-            "vectors": all_vectors,
+            "total_citations": index_stats["total_citations"],
+            "total_vectors": index_stats["total_vectors"],
+            "states_included": index_stats["shards"],
+            "shards_written": written,
+            "shards_unchanged": unchanged,
+            "shards_removed": removed,
+            "manifest": str(self.search_index.manifest_path),
             "created_at": datetime.now().isoformat()
         }
         
-        # Save unified index
-        unified_file = self.aggregated_dir / "unified_index.json"
-        with open(unified_file, 'w') as f:
-            json.dump(unified_index, f, indent=2)
-        
-        logger.info(f"Unified search index created: {len(all_citations)} citations, {len(all_vectors)} vectors")
+        logger.info(f"Unified search index updated: {len(written)} shards written, {len(unchanged)} unchanged, "
+                   f"{len(removed)} removed ({index_stats['total_citations']} citations, "
+                   f"{index_stats['total_vectors']} vectors)")
         
         return unified_index
 
@@ -659,6 +861,10 @@ async def main():
     parser.add_argument('--all', action='store_true', help='Process all available states')
     parser.add_argument('--parallel', type=int, default=3, help='Number of parallel workers')
     parser.add_argument('--create-index', action='store_true', help='Create unified search index')
+    parser.add_argument('--force', nargs='+', choices=StatePipeline.PHASES, default=[],
+                        help='Re-run these phases even if their checkpoints are current')
+    parser.add_argument('--mirror-max-age', type=float, default=7,
+                        help='Re-mirror state websites after this many days (0: only with --force mirroring)')
     
     args = parser.parse_args()
     
@@ -666,23 +872,23 @@ async def main():
     import os
     os.chdir(Path(__file__).parent.parent)
     
-    manager = MultiStatePipelineManager()
+    manager = MultiStatePipelineManager(mirror_max_age_days=args.mirror_max_age)
     
-    if args.state:
+    if args.create_index:
+        # Create or update the unified search index (only the given states, if any)
+        result = manager.create_unified_search_index(args.states or ([args.state] if args.state else None))
+        print(json.dumps(result, indent=2))
+    elif args.state:
         # Process single state
-        result = await manager.process_state(args.state)
+        result = await manager.process_state(args.state, args.force)
         print(json.dumps(result, indent=2))
     elif args.states:
         # Process multiple states
-        result = await manager.process_states_parallel(args.states, args.parallel)
+        result = await manager.process_states_parallel(args.states, args.parallel, args.force)
         print(json.dumps(result, indent=2))
     elif args.all:
         # Process all states
-        result = await manager.process_states_parallel(manager.available_states, args.parallel)
-        print(json.dumps(result, indent=2))
-    elif args.create_index:
-        # Create unified search index
-        result = manager.create_unified_search_index()
+        result = await manager.process_states_parallel(manager.available_states, args.parallel, args.force)
         print(json.dumps(result, indent=2))
     else:
         print("Usage examples:")
@@ -0,0 +1,278 @@
+"""
+Resumable Task Graph with Content-Addressed Checkpoints
+
+Runs async tasks as a dependency graph under a shared concurrency budget.
+Each finished task is checkpointed in SQLite with a hash of its inputs
+(its own configuration plus the output hashes of its dependencies) and a
+hash of the files it produced. A rerun skips every task whose inputs are
+unchanged and whose outputs are intact, so an interrupted run resumes at
+the step that failed.
+"""
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from file_hashing import FileHashCache
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = "completed"
+SKIPPED = "skipped"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+
+@dataclass
+class PipelineTask:
+    """One step of a task graph"""
+    key: str
+    run: Callable[[], Awaitable[Dict[str, Any]]]
+    deps: List[str] = field(default_factory=list)
+    # JSON-serializable description of inputs that do not come from dependencies
+    inputs: Callable[[], Any] = lambda: None
+    # Files or directories whose contents address the task's output
+    outputs: List[Path] = field(default_factory=list)
+    # Called with the checkpointed result when the task is skipped
+    on_skip: Optional[Callable[[Dict[str, Any]], None]] = None
+    # Reduces a result to what is worth checkpointing
+    summarize: Callable[[Dict[str, Any]], Dict[str, Any]] = lambda result: result
+
+
+@dataclass
+class TaskOutcome:
+    """Result of running (or skipping) a task"""
+    key: str
+    status: str
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    duration: float = 0.0
+    output_hash: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (COMPLETED, SKIPPED)
+
+
+class CheckpointStore:
+    """SQLite record of the last successful (or failed) run of each task"""
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                task_key TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                input_hash TEXT,
+                output_hash TEXT,
+                result TEXT,
+                error TEXT,
+                duration REAL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, task_key: str) -> Optional[Dict[str, Any]]:
+        """Last checkpoint for a task, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, input_hash, output_hash, result, error, duration, updated_at "
+                "FROM checkpoints WHERE task_key = ?",
+                (task_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": row[0],
+            "input_hash": row[1],
+            "output_hash": row[2],
+            "result": json.loads(row[3]) if row[3] else {},
+            "error": row[4],
+            "duration": row[5],
+            "updated_at": row[6]
+        }
+
+    def record(self, task_key: str, status: str, input_hash: Optional[str] = None,
+               output_hash: Optional[str] = None, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None, duration: float = 0.0):
+        """Store the outcome of a task run"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (task_key, status, input_hash, output_hash,
+                     json.dumps(result, default=str) if result is not None else None,
+                     error, duration, datetime.now().isoformat())
+                )
+
+    def forget(self, task_keys: Iterable[str]):
+        """Drop checkpoints so the tasks run again"""
+        with self.lock:
+            with self.conn:
+                self.conn.executemany("DELETE FROM checkpoints WHERE task_key = ?",
+                                      [(key,) for key in task_keys])
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Checkpoint counts by status"""
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM checkpoints GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class TaskGraph:
+    """
+    Dependency-ordered async task runner
+
+    Tasks start as soon as their dependencies have completed (or were skipped),
+    so independent chains - e.g. two states' pipelines - interleave under one
+    concurrency budget. A failed task blocks only its dependents.
+    """
+
+    def __init__(self, checkpoints: CheckpointStore, max_concurrency: int = 4,
+                 hash_cache: Optional[FileHashCache] = None):
+        self.checkpoints = checkpoints
+        self.max_concurrency = max_concurrency
+        self.hash_cache = hash_cache or FileHashCache(
+            checkpoints.db_path.with_name(checkpoints.db_path.stem + "_file_hashes.db"),
+            algorithm="blake2b"
+        )
+        self.tasks: Dict[str, PipelineTask] = {}
+
+    def add(self, task: PipelineTask):
+        if task.key in self.tasks:
+            raise ValueError(f"Duplicate task: {task.key}")
+        self.tasks[task.key] = task
+
+    def add_many(self, tasks: Iterable[PipelineTask]):
+        for task in tasks:
+            self.add(task)
+
+    def _topological_order(self) -> List[str]:
+        """Task keys with every task after its dependencies; raises on unknown deps or cycles"""
+        order = []
+        state: Dict[str, str] = {}
+
+        def visit(key: str, path: List[str]):
+            if state.get(key) == "done":
+                return
+            if state.get(key) == "visiting":
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [key])}")
+            if key not in self.tasks:
+                raise ValueError(f"Unknown dependency {key} of {path[-1] if path else '?'}")
+            state[key] = "visiting"
+            for dep in self.tasks[key].deps:
+                visit(dep, path + [key])
+            state[key] = "done"
+            order.append(key)
+
+        for key in self.tasks:
+            visit(key, [])
+        return order
+
+    def output_hash(self, task: PipelineTask) -> str:
+        """Content hash of a task's output files (directories are hashed file by file)"""
+        hasher = hashlib.sha256()
+        for output in task.outputs:
+            output = Path(output)
+            if output.is_dir():
+                files = sorted(path for path in output.rglob("*") if path.is_file())
+                for path in files:
+                    hasher.update(f"{path.relative_to(output)}:{self.hash_cache.get_hash(path)}\n".encode())
+            elif output.is_file():
+                hasher.update(f"{output.name}:{self.hash_cache.get_hash(output)}\n".encode())
+            else:
+                hasher.update(f"{output}:missing\n".encode())
+        return hasher.hexdigest()
+
+    def input_hash(self, task: PipelineTask, dep_outcomes: List[TaskOutcome]) -> str:
+        """Hash of a task's own inputs and its dependencies' outputs"""
+        payload = {
+            "inputs": task.inputs(),
+            "deps": {outcome.key: outcome.output_hash for outcome in dep_outcomes}
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def _run_task(self, task: PipelineTask, dep_futures: List[asyncio.Future],
+                        semaphore: asyncio.Semaphore, force: bool) -> TaskOutcome:
+        dep_outcomes = [await future for future in dep_futures]
+        blocked = [outcome.key for outcome in dep_outcomes if not outcome.ok]
+        if blocked:
+            return TaskOutcome(task.key, BLOCKED, error=f"Blocked by {', '.join(blocked)}")
+
+        async with semaphore:
+            input_hash = self.input_hash(task, dep_outcomes)
+
+            checkpoint = self.checkpoints.get(task.key)
+            if (not force and checkpoint and checkpoint["status"] == COMPLETED
+                    and checkpoint["input_hash"] == input_hash
+                    and checkpoint["output_hash"] == await asyncio.to_thread(self.output_hash, task)):
+                logger.info(f"Skipping {task.key}: inputs unchanged since {checkpoint['updated_at']} "
+                            "(use --force to re-run)")
+                if task.on_skip:
+                    task.on_skip(checkpoint["result"])
+                return TaskOutcome(task.key, SKIPPED, checkpoint["result"],
+                                   output_hash=checkpoint["output_hash"])
+
+            started = time.perf_counter()
+            try:
+                result = await task.run()
+                error = result.get("error") if result.get("status") == FAILED else None
+            except Exception as e:
+                logger.error(f"Task {task.key} raised: {str(e)}")
+                result, error = {}, str(e)
+            duration = time.perf_counter() - started
+
+            if error is not None:
+                self.checkpoints.record(task.key, FAILED, input_hash, result=task.summarize(result),
+                                        error=error, duration=duration)
+                return TaskOutcome(task.key, FAILED, result, error, duration)
+
+            output_hash = await asyncio.to_thread(self.output_hash, task)
+            summary = task.summarize(result)
+            self.checkpoints.record(task.key, COMPLETED, input_hash, output_hash, summary, duration=duration)
+            return TaskOutcome(task.key, COMPLETED, result, duration=duration, output_hash=output_hash)
+
+    async def run(self, force: Iterable[str] = ()) -> Dict[str, TaskOutcome]:
+        """
+        Run the graph
+
+        Args:
+            force: Task keys to run even if their checkpoint is current
+
+        Returns:
+            Outcome per task key
+        """
+        force = set(force)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        futures: Dict[str, asyncio.Future] = {}
+
+        for key in self._topological_order():
+            task = self.tasks[key]
+            futures[key] = asyncio.ensure_future(self._run_task(
+                task, [futures[dep] for dep in task.deps], semaphore, key in force
+            ))
+
+        outcomes = dict(zip(futures, await asyncio.gather(*futures.values())))
+
+        counts: Dict[str, int] = {}
+        for outcome in outcomes.values():
+            counts[outcome.status] = counts.get(outcome.status, 0) + 1
+        logger.info(f"Task graph finished: {counts}")
+        return outcomes
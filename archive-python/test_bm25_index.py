@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test persistent BM25 inverted index used for citation keyword search
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bm25_index import BM25Index, highlight_snippet, tokenize
+
+
+def build_index(db_path):
+    index = BM25Index(db_path)
+    index.replace_group("ca", [
+        ("ca1", "Cannabis testing laboratory requirements for potency testing", {"section": "5714"}),
+        ("ca2", "Packaging and labeling requirements for cannabis products", {"section": "4000"}),
+    ])
+    index.replace_group("co", [
+        ("co1", "Testing of marijuana products by licensed laboratory", {"section": "44-10-501"}),
+    ])
+    return index
+
+
+def test_ranks_by_bm25():
+    """Documents with more query term occurrences rank first"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = build_index(str(Path(tmp_dir) / "index.db"))
+
+        results = index.search("testing laboratory", limit=10)
+        assert [doc_id for doc_id, _, _ in results] == ["ca1", "co1"]
+        assert results[0][1] > results[1][1]
+        assert results[0][2] == {"section": "5714"}
+
+
+def test_group_filter_and_replace():
+    """Group filter restricts results and replacing a group drops old postings"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = build_index(str(Path(tmp_dir) / "index.db"))
+
+        assert [doc_id for doc_id, _, _ in index.search("testing", group_key="co")] == ["co1"]
+
+        index.replace_group("co", [("co2", "Retail delivery rules", {"section": "44-10-601"})])
+        assert index.search("testing", group_key="co") == []
+        assert [doc_id for doc_id, _, _ in index.search("delivery")] == ["co2"]
+
+
+def test_index_persists_across_instances():
+    """A reopened index serves results without re-indexing"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "index.db")
+        build_index(db_path).close()
+
+        reopened = BM25Index(db_path)
+        assert [doc_id for doc_id, _, _ in reopened.search("packaging")] == ["ca2"]
+        assert reopened.get_statistics()["total_documents"] == 3
+
+
+def test_tokenize_skips_short_words():
+    assert tokenize("The THC of a product") == ["the", "thc", "product"]
+
+
+def test_group_prefix_and_snippet():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = BM25Index(str(Path(tmp_dir) / "index.db"))
+        index.replace_group("co/rules.pdf", [("co/rules.pdf#page=1", "Testing rules", {})])
+        index.replace_group("ca/rules.pdf", [("ca/rules.pdf#page=1", "Testing rules", {})])
+        assert [doc_id for doc_id, _, _ in index.search("testing", group_prefix="co/")] == ["co/rules.pdf#page=1"]
+
+    snippet, position = highlight_snippet("Retail stores must submit testing results.", "testing results", width=30)
+    assert snippet == "...must submit **testing** **results**."
+    assert position == 26
+
+
+if __name__ == "__main__":
+    test_ranks_by_bm25()
+    test_group_filter_and_replace()
+    test_index_persists_across_instances()
+    test_tokenize_skips_short_words()
+    test_group_prefix_and_snippet()
+    print("BM25 index tests passed!")
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test ComplianceIntegration resource cleanup
+"""
+import sys
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from compliance_integration import ComplianceIntegration
+
+
+def test_context_manager_shuts_down_search_threads():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        (Path(tmp_dir) / "state_sources.json").write_text(json.dumps({"cannabis_legal_states": {}}))
+        threads_before = threading.active_count()
+
+        with ComplianceIntegration(tmp_dir) as integration:
+            integration.search_executor.submit(lambda: None).result()
+            integration.search_executor.submit(lambda: None).result()
+            assert threading.active_count() > threads_before
+
+        try:
+            integration.search_executor.submit(lambda: None)
+            raise AssertionError("Expected the executor to be shut down")
+        except RuntimeError:
+            pass
+        assert threading.active_count() == threads_before
+
+
+if __name__ == "__main__":
+    test_context_manager_shuts_down_search_threads()
+    print("Compliance integration tests passed!")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Test concurrent multi-state collection: per-state counters and the in-flight request cap
+"""
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from collect_compliance_data import ComplianceDataCollector
+
+PAGES = {
+    "/co/index.html": ["/co/a.pdf", "/co/b.pdf"],
+    "/co/rules.html": ["/co/c.pdf"],
+    "/wa/index.html": ["/wa/a.pdf", "/wa/broken.pdf"],
+    "/wa/rules.html": [],
+    "/or/index.html": ["/or/a.pdf"],
+    "/or/rules.html": [],
+}
+
+
+class StateSiteHandler(BaseHTTPRequestHandler):
+    """Serves small state sites slowly, recording how many requests (and states) are in flight"""
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    active_states = {}
+    max_active_states = 0
+    failing_paths = set()
+
+    @classmethod
+    def reset(cls):
+        cls.in_flight = cls.max_in_flight = cls.max_active_states = 0
+        cls.active_states = {}
+        cls.failing_paths = set()
+
+    def do_GET(self):
+        cls = type(self)
+        state = self.path.split("/")[1]
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            cls.active_states[state] = cls.active_states.get(state, 0) + 1
+            cls.max_active_states = max(cls.max_active_states, len(cls.active_states))
+        try:
+            time.sleep(0.05)
+            self.respond()
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+                cls.active_states[state] -= 1
+                if not cls.active_states[state]:
+                    del cls.active_states[state]
+
+    def respond(self):
+        if self.path in type(self).failing_paths:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        elif self.path in PAGES:
+            links = "".join(f'<a href="{link}">{link}</a>' for link in PAGES[self.path])
+            body = f"<html><head><title>Rules</title></head><body>{links}</body></html>".encode()
+            content_type = "text/html"
+        elif self.path == "/wa/broken.pdf":
+            # Connection drops mid-body
+            self.send_response(200)
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            self.wfile.write(b"%PDF-1.4")
+            self.close_connection = True
+            return
+        elif self.path.endswith(".pdf"):
+            body = b"%PDF-1.4 " + self.path.encode()
+            content_type = "application/pdf"
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def state_sources(base_url):
+    return {"cannabis_legal_states": {
+        state: {
+            "state_name": name,
+            "status": status,
+            "main_url": f"{base_url}/{state}/index.html",
+            "regulations_url": f"{base_url}/{state}/rules.html"
+        }
+        for state, name, status in [("co", "Colorado", "legal_adult_use"),
+                                    ("wa", "Washington", "legal_adult_use"),
+                                    ("or", "Oregon", "medical_only")]
+    }}
+
+
+def test_concurrent_states_keep_their_own_counts_within_in_flight_cap():
+    StateSiteHandler.reset()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StateSiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            (Path(tmp_dir) / "state_sources.json").write_text(json.dumps(state_sources(base_url)))
+            collector = ComplianceDataCollector(tmp_dir, max_in_flight=2)
+            # One test host stands in for many state sites: only the global cap applies
+            collector.engine.respect_robots = False
+            collector.engine.per_host_delay = 0
+            collector.engine.per_host_concurrency = 10
+            collector.engine.max_retries = 0
+
+            asyncio.run(collector.collect_all_states())
+
+            assert StateSiteHandler.max_in_flight == 2
+
+            states = collector.collection_status["states"]
+            counts = {state: (status["pages_collected"], status["pdfs_collected"], status["errors"])
+                      for state, status in states.items()}
+            assert counts == {"co": (2, 3, 0), "wa": (2, 1, 1), "or": (2, 1, 0)}
+
+            status = json.loads((Path(tmp_dir) / "collection_status.json").read_text())
+            assert (status["total_pages"], status["total_pdfs"], status["total_errors"]) == (6, 5, 1)
+            assert (collector.page_count, collector.pdf_count, collector.error_count) == (6, 5, 1)
+
+            metadata = json.loads((Path(tmp_dir) / "states" / "wa" / "metadata.json").read_text())
+            assert metadata["status"] == "completed" and metadata["errors"] == 1
+            assert sorted(p.name for p in (Path(tmp_dir) / "states" / "co" / "pdfs").iterdir()) == \
+                ["a.pdf", "b.pdf", "c.pdf"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_max_parallel_states_limits_states_not_requests():
+    StateSiteHandler.reset()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StateSiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            (Path(tmp_dir) / "state_sources.json").write_text(json.dumps(state_sources(base_url)))
+            collector = ComplianceDataCollector(tmp_dir, max_in_flight=8)
+            collector.engine.respect_robots = False
+            collector.engine.per_host_delay = 0
+            collector.engine.per_host_concurrency = 10
+            collector.engine.max_retries = 0
+
+            asyncio.run(collector.collect_all_states(max_parallel_states=1))
+
+            # One state at a time, which still fetches its own pages in parallel
+            assert StateSiteHandler.max_active_states == 1
+            assert StateSiteHandler.max_in_flight > 1
+            assert collector.collection_status["total_pdfs"] == 5
+            assert all(status["status"] == "completed" for status in collector.collection_status["states"].values())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_failed_page_is_retried_on_resume():
+    StateSiteHandler.reset()
+    StateSiteHandler.failing_paths = {"/or/rules.html"}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StateSiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def collect(tmp_dir, resume):
+        collector = ComplianceDataCollector(tmp_dir, resume=resume)
+        collector.engine.respect_robots = False
+        collector.engine.per_host_delay = 0
+        collector.engine.per_host_concurrency = 10
+        collector.engine.max_retries = 0
+        asyncio.run(collector.collect_all_states())
+        return collector.collection_status["states"]["or"]
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            (Path(tmp_dir) / "state_sources.json").write_text(json.dumps(state_sources(base_url)))
+
+            first = collect(tmp_dir, resume=False)
+            assert (first["pages_collected"], first["errors"]) == (1, 1)
+
+            # The site recovers: resuming fetches only the failed page
+            StateSiteHandler.failing_paths = set()
+            second = collect(tmp_dir, resume=True)
+            assert (second["pages_collected"], second["pdfs_collected"], second["errors"]) == (1, 0, 0)
+            assert len(list((Path(tmp_dir) / "states" / "or" / "regulations").glob("*.html"))) == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_concurrent_states_keep_their_own_counts_within_in_flight_cap()
+    test_max_parallel_states_limits_states_not_requests()
+    test_failed_page_is_retried_on_resume()
+    print("Concurrent collection tests passed!")
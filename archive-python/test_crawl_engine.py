@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Test the shared crawl engine against a local HTTP server
+"""
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from crawl_engine import CrawlEngine, CrawlFrontier, normalize_url
+
+PAGES = {
+    "/": '<a href="/rules">Rules</a> <a href="/rules#top">Top</a> <a href="/private/x">X</a>',
+    "/rules": '<a href="/">Home</a> <a href="/rules/testing.pdf">Testing</a>',
+}
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Small site with a robots.txt and a page that fails once with 503"""
+    hits = []
+    flaky_failures = 0
+
+    def do_GET(self):
+        type(self).hits.append((self.path, time.monotonic()))
+
+        if self.path == "/robots.txt":
+            return self._send(200, "User-agent: *\nDisallow: /private/\n")
+        if self.path == "/flaky" and type(self).flaky_failures < 1:
+            type(self).flaky_failures += 1
+            return self._send(503, "busy")
+        if self.path == "/flaky":
+            return self._send(200, "ok")
+        if self.path == "/search?b=2&a=1":
+            # Parameter order matters to this server
+            return self._send(200, "results")
+        if self.path in PAGES:
+            return self._send(200, PAGES[self.path])
+        if self.path.endswith(".pdf"):
+            return self._send(200, "%PDF-1.4")
+        return self._send(404, "missing")
+
+    def _send(self, status, text):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_with_server(test):
+    SiteHandler.hits = []
+    SiteHandler.flaky_failures = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(test(f"http://127.0.0.1:{server.server_address[1]}"))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.GOV:443/a//b?z=1&a=2#frag") == "https://example.gov/a/b?a=2&z=1"
+    assert normalize_url("../rules", "http://example.gov/cannabis/index.html") == "http://example.gov/rules"
+    assert normalize_url("http://example.gov") == "http://example.gov/"
+
+
+def test_frontier_dedups_and_resumes():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "frontier.db")
+        frontier = CrawlFrontier(db_path)
+        assert frontier.add_many(["http://a.gov/x", "http://A.gov/x#top", "http://a.gov/y"]) == 2
+
+        claimed = frontier.claim(1)
+        assert [entry.url for entry in claimed] == ["http://a.gov/x"]
+        frontier.close()
+
+        # Interrupted before finishing: the claimed URL is pending again
+        reopened = CrawlFrontier(db_path)
+        assert reopened.counts()["pending"] == 2
+        assert not reopened.add("http://a.gov/y")
+
+
+def test_fetch_retries_and_respects_robots():
+    async def check(base_url):
+        async with CrawlEngine(per_host_delay=0, backoff_base=0.01) as engine:
+            flaky = await engine.fetch(f"{base_url}/flaky")
+            assert flaky.ok and flaky.attempts == 2 and flaky.text() == "ok"
+
+            blocked = await engine.fetch(f"{base_url}/private/x")
+            assert not blocked.ok and "robots" in blocked.error
+
+            missing = await engine.fetch(f"{base_url}/nowhere")
+            assert missing.status == 404 and missing.attempts == 1
+
+        paths = [path for path, _ in SiteHandler.hits]
+        assert paths.count("/robots.txt") == 1
+        assert "/private/x" not in paths
+
+    run_with_server(check)
+
+
+def test_per_host_delay_spaces_requests():
+    async def check(base_url):
+        async with CrawlEngine(per_host_delay=0.2, respect_robots=False) as engine:
+            await engine.fetch_all([f"{base_url}/", f"{base_url}/rules", f"{base_url}/flaky"])
+
+        times = sorted(when for _, when in SiteHandler.hits)
+        assert all(later - earlier >= 0.18 for earlier, later in zip(times, times[1:]))
+
+    run_with_server(check)
+
+
+def test_crawl_follows_links_once():
+    async def check(base_url):
+        frontier = CrawlFrontier()
+        frontier.add(f"{base_url}/")
+
+        async def handler(entry):
+            result = await engine.fetch(entry.url)
+            result.raise_for_status()
+            if entry.depth >= 2:
+                return []
+            text = result.text()
+            return [normalize_url(href, entry.url) for href in
+                    [part.split('"')[0] for part in text.split('href="')[1:]]]
+
+        async with CrawlEngine(per_host_delay=0) as engine:
+            stats = await engine.crawl(frontier, handler)
+
+        # /, /rules and the PDF succeed; /private/x is blocked by robots.txt
+        assert stats["processed"] == 3 and stats["failed"] == 1
+        assert stats["frontier_pending"] == 0
+        paths = [path for path, _ in SiteHandler.hits]
+        assert paths.count("/") == 1 and paths.count("/rules") == 1
+
+    run_with_server(check)
+
+
+def test_crawl_fetches_original_url():
+    async def check(base_url):
+        frontier = CrawlFrontier()
+        assert frontier.add(f"{base_url}/search?b=2&a=1#results")
+        assert not frontier.add(f"{base_url}/search?a=1&b=2")  # Same page by its normalized form
+
+        async def handler(entry):
+            (await engine.fetch(entry.url)).raise_for_status()
+
+        async with CrawlEngine(per_host_delay=0, respect_robots=False) as engine:
+            stats = await engine.crawl(frontier, handler)
+
+        assert stats["processed"] == 1 and stats["failed"] == 0
+        assert [path for path, _ in SiteHandler.hits] == ["/search?b=2&a=1"]
+
+    run_with_server(check)
+
+
+def test_frontier_retries_failed_entries():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "frontier.db")
+        frontier = CrawlFrontier(db_path)
+        frontier.add("http://a.gov/Rules//2024?z=1&a=2")
+        entry = frontier.claim(1)[0]
+        frontier.mark_failed(entry.url, "HTTP 503")
+        frontier.close()
+
+        reopened = CrawlFrontier(db_path)
+        assert reopened.counts()["failed"] == 1
+        assert reopened.retry_failed() == 1
+        assert [entry.url for entry in reopened.claim(5)] == ["http://a.gov/Rules//2024?z=1&a=2"]
+
+
+if __name__ == "__main__":
+    test_normalize_url()
+    test_frontier_dedups_and_resumes()
+    test_fetch_retries_and_respects_robots()
+    test_per_host_delay_spaces_requests()
+    test_crawl_follows_links_once()
+    test_crawl_fetches_original_url()
+    test_frontier_retries_failed_entries()
+    print("Crawl engine tests passed!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test the single-pass document checks in ComplianceDataValidator
+"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from data_validator import ComplianceDataValidator
+
+
+def write_documents(base_dir: Path):
+    (base_dir / "state_sources.json").write_text(json.dumps({
+        "cannabis_legal_states": {"co": {"main_url": "https://example.gov", "regulations_url": "https://example.gov/rules"}}
+    }))
+    state_dir = base_dir / "states" / "co"
+    for name in ("regulations", "pdfs", "processed", "logs"):
+        (state_dir / name).mkdir(parents=True)
+    (state_dir / "metadata.json").write_text(json.dumps({"urls_processed": ["https://example.gov"]}))
+
+    documents = {
+        "retail_rules": ["Retail license application and renewal", "Track the chain of", "custody of products"],
+        "statute": ["Colorado statute on excise tax"],
+        "statute_copy": ["Colorado statute on excise tax"],
+    }
+    for name, pages in documents.items():
+        (state_dir / "processed" / f"{name}_extracted.json").write_text(json.dumps({
+            "filename": f"{name}.pdf",
+            "success": True,
+            "extraction_method": "pdfplumber",
+            "file_hash": "statute" if name.startswith("statute") else name,
+            "total_characters": sum(len(text) for text in pages),
+            "text_content": [{"page": page + 1, "text": text} for page, text in enumerate(pages)]
+        }))
+    (state_dir / "processed" / "broken_extracted.json").write_text("{")
+
+
+def test_single_pass_report():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_documents(Path(tmp_dir))
+        validator = ComplianceDataValidator(tmp_dir)
+
+        report = validator.validate_single_state("co")
+        validations = report["validations"]
+
+        # Phrases are matched across page boundaries, as over the joined text
+        assert "chain of custody" in validations["content_coverage"]["topic_coverage"]["transportation"]["matched_keywords"]
+        assert validations["content_coverage"]["total_documents"] == 3
+        assert validations["data_quality"]["duplicate_detection"]["total_duplicates"] == 1
+        assert validations["data_quality"]["processing_success_rate"] == 75.0
+        assert validations["regulatory_completeness"]["regulatory_categories"]["statutes"]
+        assert validations["regulatory_completeness"]["url_coverage"] == 50.0
+
+        assert set(report["timings"]) == {"structure", "read_documents", "content_coverage",
+                                          "data_quality", "regulatory_completeness"}
+        assert (Path(tmp_dir) / "states" / "co" / "validation_report.json").exists()
+
+        # Individual validators give the same sections
+        assert validator.validate_data_quality("co") == validations["data_quality"]
+        assert validator.validate_content_coverage("co") == validations["content_coverage"]
+
+
+if __name__ == "__main__":
+    test_single_pass_report()
+    print("Data validator tests passed!")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test batched, deduplicated and cached embedding generation with a deterministic fake embedder
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from embedding_utils import BatchedEmbedder, EmbeddingCache, content_hash
+
+
+class FakeEmbedder:
+    """Deterministic embedder that records every batch it receives"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97)] for text in texts]
+
+
+def test_batches_and_deduplicates():
+    """Duplicate texts are embedded once and batches respect batch_size"""
+    fake = FakeEmbedder()
+    embedder = BatchedEmbedder(fake, batch_size=2)
+
+    texts = ["alpha", "beta", "alpha", "gamma", "beta"]
+    embeddings = embedder.embed(texts)
+
+    assert fake.batches == [["alpha", "beta"], ["gamma"]]
+    assert embeddings[0] == embeddings[2]
+    assert embeddings[1] == embeddings[4]
+    assert embeddings[3] == fake(["gamma"])[0]
+
+    stats = embedder.get_statistics()
+    assert stats["texts_requested"] == 5
+    assert stats["texts_embedded"] == 3
+    assert stats["embedding_calls"] == 2
+    assert stats["texts_deduplicated"] == 2
+
+
+def test_known_embeddings_skip_model_calls():
+    """Texts embedded by an earlier call are not sent to the model again"""
+    fake = FakeEmbedder()
+    embedder = BatchedEmbedder(fake, batch_size=10)
+
+    embedder.embed(["alpha", "beta"])
+    embedder.embed(["beta", "delta"])
+    assert fake.batches == [["alpha", "beta"], ["delta"]]
+
+    assert embedder.embed_one("alpha") == fake(["alpha"])[0]
+    assert len(fake.batches) == 3  # only the direct fake() call above
+
+
+def test_known_embeddings_are_bounded():
+    """The in-memory map keeps only the most recently used embeddings"""
+    fake = FakeEmbedder()
+    embedder = BatchedEmbedder(fake, batch_size=10, max_known=2)
+
+    embeddings = embedder.embed(["alpha", "beta", "gamma", "alpha"])
+    assert embeddings[0] == embeddings[3] == fake(["alpha"])[0]
+    assert len(embedder.known_embeddings) == 2
+    assert embedder.get_statistics()["known_embeddings"] == 2
+
+    # Using "beta" makes "gamma" the least recent, so "alpha" evicts it
+    fake.batches.clear()
+    embedder.embed(["beta"])
+    embedder.embed(["alpha"])
+    embedder.embed(["beta", "gamma"])
+    assert fake.batches == [["alpha"], ["gamma"]]
+
+
+def test_mismatched_embedding_count_raises():
+    """An embedder returning the wrong number of vectors is rejected"""
+    embedder = BatchedEmbedder(lambda texts: [[0.0]], batch_size=10)
+
+    try:
+        embedder.embed(["alpha", "beta"])
+    except ValueError:
+        return
+    raise AssertionError("Expected ValueError for mismatched embedding count")
+
+
+def test_content_hash_is_stable():
+    """Content hash depends only on text"""
+    assert content_hash("alpha") == content_hash("alpha")
+    assert content_hash("alpha") != content_hash("beta")
+
+
+def test_persistent_cache_survives_new_embedder():
+    """A fresh embedder reuses embeddings written to the on-disk cache"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = str(Path(tmp_dir) / "embeddings.db")
+
+        first = FakeEmbedder()
+        BatchedEmbedder(first, cache=EmbeddingCache(cache_path), model_name="fake").embed(["alpha", "beta"])
+
+        second = FakeEmbedder()
+        cache = EmbeddingCache(cache_path)
+        embedder = BatchedEmbedder(second, cache=cache, model_name="fake")
+        embeddings = embedder.embed(["alpha", "beta", "gamma"])
+
+        assert second.batches == [["gamma"]]
+        assert embeddings[0] == first(["alpha"])[0]
+        assert cache.get_statistics()["hits"] == 2
+        assert cache.get_statistics()["misses"] == 1
+
+        # Cache entries are scoped by model name
+        other = FakeEmbedder()
+        BatchedEmbedder(other, cache=cache, model_name="other").embed(["alpha"])
+        assert other.batches == [["alpha"]]
+
+
+if __name__ == "__main__":
+    test_batches_and_deduplicates()
+    test_known_embeddings_skip_model_calls()
+    test_known_embeddings_are_bounded()
+    test_mismatched_embedding_count_raises()
+    test_content_hash_is_stable()
+    test_persistent_cache_survives_new_embedder()
+    print("Embedding utility tests passed!")
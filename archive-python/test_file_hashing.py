@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test streaming file hashing and the size/mtime hash cache
+"""
+import os
+import sys
+import hashlib
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from file_hashing import FileHashCache, hash_file, new_hasher
+
+
+def test_streaming_hash_matches_whole_file_hash():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "statute.pdf"
+        data = os.urandom(300000)
+        path.write_bytes(data)
+
+        assert hash_file(path, "md5", chunk_size=4096) == hashlib.md5(data).hexdigest()
+        assert hash_file(path, "sha256") == hashlib.sha256(data).hexdigest()
+        assert hash_file(path, "blake2b") == hashlib.blake2b(data, digest_size=16).hexdigest()
+
+        try:
+            new_hasher("crc32")
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+def test_cache_skips_unchanged_files():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "rules.pdf"
+        path.write_bytes(b"%PDF-1.4 original")
+        cache = FileHashCache(Path(tmp_dir) / "hashes.db", algorithm="blake2b")
+
+        first = cache.get_hash(path)
+        assert cache.get_hash(path) == first
+        assert cache.stats["hashed"] == 1 and cache.stats["stat_hits"] == 1
+
+        # A new size or mtime forces a re-hash
+        path.write_bytes(b"%PDF-1.4 amended rules")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert cache.get_hash(path) != first
+        assert cache.stats["hashed"] == 2
+        cache.close()
+
+        # The stat shortcut survives a reopen
+        reopened = FileHashCache(Path(tmp_dir) / "hashes.db", algorithm="blake2b")
+        reopened.get_hash(path)
+        assert reopened.stats == {"stat_hits": 1, "hashed": 0, "bytes_hashed": 0}
+
+
+if __name__ == "__main__":
+    test_streaming_hash_matches_whole_file_hash()
+    test_cache_skips_unchanged_files()
+    print("File hashing tests passed!")
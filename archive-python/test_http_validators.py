@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test conditional GET (ETag / Last-Modified) against a local HTTP server
+"""
+import sys
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from http_validators import HTTPValidatorStore, conditional_get
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves /etag (ETag), /dated (Last-Modified) and /plain (no validators)"""
+    body = b"<html><title>Rules</title><body>Cannabis testing rules</body></html>"
+    full_responses = 0
+
+    def do_GET(self):
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            return self._not_modified()
+        if self.path == "/dated" and self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            return self._not_modified()
+
+        type(self).full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        if self.path == "/etag":
+            self.send_header("ETag", '"v1"')
+        elif self.path == "/dated":
+            self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def _not_modified(self):
+        self.send_response(304)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_with_server(test):
+    """Run an async test against a fresh fixture server and validator store"""
+    FixtureHandler.full_responses = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    async def run(store):
+        async with aiohttp.ClientSession() as session:
+            await test(session, base_url, store)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = HTTPValidatorStore(str(Path(tmp_dir) / "validators.db"))
+            asyncio.run(run(store))
+            store.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_etag_revalidation_returns_not_modified():
+    """A committed ETag is sent as If-None-Match and a 304 reports the page unchanged"""
+    async def check(session, base_url, store):
+        first = await conditional_get(session, f"{base_url}/etag", store)
+        assert first.status == 200 and first.changed
+        assert "Cannabis testing" in first.text()
+        assert first.etag == '"v1"'
+        store.commit(first)
+        assert store.get(f"{base_url}/etag")["etag"] == '"v1"'
+
+        second = await conditional_get(session, f"{base_url}/etag", store)
+        assert second.status == 304 and second.not_modified and not second.changed
+        assert second.body is None
+        assert FixtureHandler.full_responses == 1
+
+    run_with_server(check)
+
+
+def test_last_modified_revalidation_returns_not_modified():
+    """A committed Last-Modified is sent as If-Modified-Since"""
+    async def check(session, base_url, store):
+        store.commit(await conditional_get(session, f"{base_url}/dated", store))
+        second = await conditional_get(session, f"{base_url}/dated", store)
+        assert second.not_modified
+        assert store.get_statistics()["not_modified"] == 1
+
+    run_with_server(check)
+
+
+def test_body_hash_detects_unchanged_page_without_validators():
+    """Without validators, a body matching the committed hash is unchanged; conditional=False always downloads"""
+    async def check(session, base_url, store):
+        first = await conditional_get(session, f"{base_url}/plain", store)
+        store.commit(first)
+        second = await conditional_get(session, f"{base_url}/plain", store)
+        assert first.changed and not second.changed
+        assert second.status == 200 and second.content_hash == first.content_hash
+
+        store.commit(await conditional_get(session, f"{base_url}/etag", store))
+        forced = await conditional_get(session, f"{base_url}/etag", store, conditional=False)
+        assert forced.status == 200 and forced.changed
+
+    run_with_server(check)
+
+
+def test_uncommitted_fetch_is_fetched_again():
+    """Validators are not stored until commit, so a failed save is not mistaken for unchanged content"""
+    async def check(session, base_url, store):
+        first = await conditional_get(session, f"{base_url}/etag", store)
+        assert first.changed and store.get(f"{base_url}/etag") is None
+
+        # The caller failed to save: the next fetch downloads and reports a change again
+        retry = await conditional_get(session, f"{base_url}/etag", store)
+        assert retry.status == 200 and retry.changed
+        assert FixtureHandler.full_responses == 2
+
+        store.commit(retry)
+        assert (await conditional_get(session, f"{base_url}/etag", store)).not_modified
+
+    run_with_server(check)
+
+
+if __name__ == "__main__":
+    test_etag_revalidation_returns_not_modified()
+    test_last_modified_revalidation_returns_not_modified()
+    test_body_hash_detects_unchanged_page_without_validators()
+    test_uncommitted_fetch_is_fetched_again()
+    print("HTTP validator tests passed!")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test reciprocal rank fusion and token budgeting for hybrid compliance retrieval
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from hybrid_retrieval import reciprocal_rank_fusion, apply_token_budget, estimate_tokens
+
+
+def test_fusion_rewards_agreement_and_dedupes():
+    """Items found by both retrievers outrank items found by one"""
+    vector = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    keyword = [{"id": "c"}, {"id": "d"}, {"id": "c"}]
+
+    fused = reciprocal_rank_fusion({"vector": vector, "keyword": keyword}, id_key=lambda item: item["id"])
+
+    assert [entry["id"] for entry in fused] == ["c", "a", "b", "d"]
+    assert fused[0]["sources"] == ["vector", "keyword"]
+    assert fused[0]["ranks"] == {"vector": 3, "keyword": 1}
+    assert abs(fused[0]["fusion_score"] - (1 / 63 + 1 / 61)) < 1e-12
+
+
+def test_token_budget_keeps_order_and_first_item():
+    """Budget trims trailing items but never returns an empty context"""
+    items = [{"text": "x" * 400}, {"text": "y" * 400}, {"text": "z" * 400}]
+
+    selected = apply_token_budget(items, lambda item: item["text"], token_budget=200)
+    assert [item["text"][0] for item in selected] == ["x", "y"]
+
+    assert len(apply_token_budget(items, lambda item: item["text"], token_budget=10)) == 1
+    assert len(apply_token_budget(items, lambda item: item["text"], token_budget=10_000, max_items=2)) == 2
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+if __name__ == "__main__":
+    test_fusion_rewards_agreement_and_dedupes()
+    test_token_budget_keeps_order_and_first_item()
+    test_estimate_tokens()
+    print("Hybrid retrieval tests passed!")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test process-pool PDF extraction and the page text cache
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pdf_processor import PDFProcessor, library_version
+
+
+def write_pdf(path: Path, pages):
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def write_mixed_pdf(path: Path):
+    """Digital page, scanned (image-only) page, blank page"""
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Colorado Revised Statutes 44-10-101 retail marijuana code")
+    scan = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    scan.clear_with(200)
+    doc.new_page().insert_image(fitz.Rect(72, 72, 300, 300), pixmap=scan)
+    doc.new_page()
+    doc.save(str(path))
+    doc.close()
+
+
+def make_state(base_dir: Path, state_key: str = "co") -> Path:
+    state_dir = base_dir / "states" / state_key
+    (state_dir / "pdfs").mkdir(parents=True)
+    (state_dir / "processed").mkdir()
+    write_pdf(state_dir / "pdfs" / "rules.pdf", ["Retail marijuana testing rules", "Packaging rules"])
+    write_pdf(state_dir / "pdfs" / "statute.pdf", ["Colorado Revised Statutes 44-10-101"])
+    return state_dir
+
+
+def test_rerun_is_served_from_page_cache():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_dir = make_state(Path(tmp_dir))
+
+        first = PDFProcessor(tmp_dir, use_processes=True, max_workers=2).process_state_pdfs("co")
+        assert first["processed_successfully"] == 2 and first["served_from_cache"] == 0
+        assert first["total_pages"] == 3
+
+        # One new PDF: only it is extracted, the others come from the cache
+        write_pdf(state_dir / "pdfs" / "bulletin.pdf", ["Enforcement bulletin"])
+        second = PDFProcessor(tmp_dir, use_processes=False).process_state_pdfs("co")
+        assert second["processed_successfully"] == 3 and second["served_from_cache"] == 2
+        assert second["total_characters"] > first["total_characters"]
+
+
+def test_cache_keys_on_file_content():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_dir = make_state(Path(tmp_dir))
+        processor = PDFProcessor(tmp_dir, use_processes=False)
+        processor.process_state_pdfs("co")
+
+        write_pdf(state_dir / "pdfs" / "rules.pdf", ["Amended testing rules"])
+        result = processor.process_pdf(state_dir / "pdfs" / "rules.pdf", state_dir)
+        assert not result.get("from_cache")
+        assert "Amended" in result["text_content"][0]["text"]
+
+
+def test_only_image_pages_are_ocred():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = Path(tmp_dir) / "mixed.pdf"
+        write_mixed_pdf(pdf_path)
+
+        ocr_calls = []
+
+        def fake_ocr(page):
+            ocr_calls.append(page.number + 1)
+            return "Scanned enforcement bulletin on packaging and labeling requirements"
+
+        processor = PDFProcessor(tmp_dir, use_processes=False)
+        processor.ocr_page = fake_ocr
+        result = processor.extract_pdf(pdf_path)
+
+        assert result["success"] and result["extraction_method"] == "pdfplumber"
+        assert ocr_calls == [2]
+        assert result["page_extractors"] == {"1": "pdfplumber", "2": "ocr"}
+        assert result["metadata"]["ocr_pages"] == [2]
+
+        # OCR text is cached per page
+        rerun = processor.extract_pdf(pdf_path)
+        assert ocr_calls == [2] and rerun["page_extractors"] == result["page_extractors"]
+
+
+def test_only_current_failures_are_cached():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        processor = PDFProcessor(tmp_dir, use_processes=False)
+        pdf_path = Path(tmp_dir) / "broken.pdf"
+        pdf_path.write_bytes(b"not a pdf")
+        calls = []
+
+        def extract_with_pdfplumber(path):
+            calls.append(path)
+            raise ValueError("damaged xref table")
+
+        try:
+            processor._extract_with_cache(extract_with_pdfplumber, pdf_path, "hash")
+            raise AssertionError("Expected the extractor error to propagate")
+        except ValueError:
+            pass
+
+        # The failure is reused while it is current
+        assert processor._extract_with_cache(extract_with_pdfplumber, pdf_path, "hash") is None
+        assert len(calls) == 1
+        cached = processor.page_cache.get_document("hash", "extract_with_pdfplumber",
+                                                   library_version("extract_with_pdfplumber"))
+        assert cached == {"success": False, "error": "ValueError"}
+
+        # ...but not after a library upgrade or once it expires
+        assert processor.page_cache.get_document("hash", "extract_with_pdfplumber", "99.0") is None
+        processor.page_cache.failure_ttl = 0
+        try:
+            processor._extract_with_cache(extract_with_pdfplumber, pdf_path, "hash")
+        except ValueError:
+            pass
+        assert len(calls) == 2
+
+        # A run that succeeds without finding text is cached for good
+        def extract_with_pymupdf(path):
+            calls.append(path)
+            return {"text_content": [], "metadata": {"pages": 1, "method": "pymupdf"}, "success": True}
+
+        processor._extract_with_cache(extract_with_pymupdf, pdf_path, "hash")
+        cached = processor._extract_with_cache(extract_with_pymupdf, pdf_path, "hash")
+        assert cached["success"] and cached["from_cache"] and cached["text_content"] == []
+        assert len(calls) == 3
+
+        # Errors from a real unreadable file are reported in the result
+        result = processor.extract_pdf(pdf_path)
+        assert not result["success"]
+        assert any("extract_with_pypdf2" in error for error in result["errors"])
+
+
+def test_search_uses_incremental_index():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_dir = make_state(Path(tmp_dir))
+        processor = PDFProcessor(tmp_dir, use_processes=False)
+        processor.process_state_pdfs("co")
+
+        results = processor.search_text("packaging rules")
+        assert (results[0]["pdf_filename"], results[0]["page"]) == ("rules.pdf", 2)
+        assert "**Packaging**" in results[0]["match_context"]
+
+        # Reprocessing one PDF replaces only its pages
+        write_pdf(state_dir / "pdfs" / "rules.pdf", ["Amended testing rules"])
+        processor.process_pdf(state_dir / "pdfs" / "rules.pdf", state_dir)
+        assert not any(r["page"] == 2 for r in processor.search_text("packaging"))
+        assert processor.search_text("statutes", state_key="co")[0]["pdf_filename"] == "statute.pdf"
+        assert processor.search_text("statutes", state_key="ca") == []
+
+
+if __name__ == "__main__":
+    test_rerun_is_served_from_page_cache()
+    test_cache_keys_on_file_content()
+    test_only_image_pages_are_ocred()
+    test_only_current_failures_are_cached()
+    test_search_uses_incremental_index()
+    print("PDF processor tests passed!")
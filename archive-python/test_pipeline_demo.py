@@ -159,10 +159,17 @@ async def demo_unified_search():
     print(f"  Total vectors: {unified_index['total_vectors']}")
     print(f"  States included: {unified_index['states_included']}")
     
-    # Show some example data
-    if unified_index['citations']:
+    print(f"  Shards written: {len(unified_index['shards_written'])}, unchanged: {len(unified_index['shards_unchanged'])}")
+    
+    # Show some example data (shards load lazily, one state at a time)
+    example_citations = []
+    for citation in manager.search_index.iter_citations():
+        example_citations.append(citation)
+        if len(example_citations) == 3:
+            break
+    if example_citations:
         print(f"  Example citations:")
-        for i, citation in enumerate(unified_index['citations'][:3]):
+        for i, citation in enumerate(example_citations):
             print(f"    {i+1}. {citation['state'].upper()}: {citation['section']}")
     
     print()
@@ -171,7 +178,7 @@ async def demo_unified_search():
     aggregated_dir = Path("aggregated")
     if aggregated_dir.exists():
         print(f"✓ Aggregated directory: {aggregated_dir.absolute()}")
-        for file in aggregated_dir.glob("*.json"):
+        for file in list(aggregated_dir.glob("*.json")) + list(aggregated_dir.glob("unified_index/**/*.*")):
             print(f"  {file.name}: {file.stat().st_size} bytes")
     
     print()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test heading-anchored chunking of regulation text
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from regulation_chunker import RegulationChunker, diff_chunks
+
+
+def build_regulation(sections):
+    return "COLORADO MARIJUANA RULES\n\n" + "\n\n".join(
+        f"Section {number}. {title}\n\n" + "\n\n".join(
+            f"({chr(97 + i)}) A licensee shall comply with requirement {number}.{i} on {title.lower()}. " * 3
+            for i in range(paragraphs)
+        )
+        for number, title, paragraphs in sections
+    )
+
+
+SECTIONS = [
+    ("1.1", "Definitions", 2),
+    ("1.2", "Licensing", 8),
+    ("1.3", "Packaging and Labeling", 3),
+    ("1.4", "Transport", 2),
+]
+
+
+def test_sections_and_chunk_sizes():
+    chunker = RegulationChunker(max_chars=600, min_chars=150)
+    text = build_regulation(SECTIONS)
+
+    headings = [heading for heading, _ in chunker.split_sections(text)]
+    assert headings == ["", "Section 1.1. Definitions", "Section 1.2. Licensing",
+                        "Section 1.3. Packaging and Labeling", "Section 1.4. Transport"]
+
+    chunks = chunker.chunk(text, "co", "https://example.gov/rules")
+    assert all(len(chunk.content) <= 600 for chunk in chunks)
+    assert len({chunk.id for chunk in chunks}) == len(chunks)
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    # The long section is split; no chunk straddles two sections
+    assert sum(chunk.heading == "Section 1.2. Licensing" for chunk in chunks) > 1
+    assert all(chunk.content.count("Section 1.") <= 1 for chunk in chunks)
+
+
+def test_amendment_only_changes_its_section():
+    chunker = RegulationChunker(max_chars=600, min_chars=150)
+    original = chunker.chunk(build_regulation(SECTIONS), "co", "https://example.gov/rules")
+    stored = {chunk.id: chunk.content_hash for chunk in original}
+
+    # Amend one paragraph of section 1.3 and add a new section before 1.4
+    amended_text = build_regulation(SECTIONS[:3] + [("1.35", "Testing", 1)] + SECTIONS[3:]).replace(
+        "requirement 1.3.1 on", "amended requirement 1.3.1 on", 1)
+    amended = chunker.chunk(amended_text, "co", "https://example.gov/rules")
+
+    diff = diff_chunks(amended, stored)
+    assert {chunk.heading for chunk in diff["changed"]} == {"Section 1.3. Packaging and Labeling",
+                                                          "Section 1.35. Testing"}
+    assert len(diff["changed"]) == 2
+    assert diff["removed"] == []
+    assert len(diff["unchanged"]) == len(original) - 1
+
+    # Chunk IDs are scoped to the document
+    other = chunker.chunk(build_regulation(SECTIONS), "co", "https://example.gov/other")
+    assert not {chunk.id for chunk in other} & set(stored)
+
+
+if __name__ == "__main__":
+    test_sections_and_chunk_sizes()
+    test_amendment_only_changes_its_section()
+    print("Regulation chunker tests passed!")
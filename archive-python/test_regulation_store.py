@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test chunk upserts, filtered deletes and reconciliation against an in-memory collection
+"""
+import sys
+import copy
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from regulation_chunker import RegulationChunker
+from regulation_store import RegulationStore
+
+
+class InMemoryCollection:
+    """Stand-in for the astrapy collection methods RegulationStore uses"""
+
+    def __init__(self, delete_page_size: int = 20):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.delete_page_size = delete_page_size
+
+    def _value(self, document, path):
+        for key in path.split("."):
+            document = document.get(key) if isinstance(document, dict) else None
+        return document
+
+    def _matches(self, document, filter):
+        for path, condition in filter.items():
+            value = self._value(document, path)
+            if isinstance(condition, dict) and "$in" in condition:
+                if value not in condition["$in"]:
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    def paginated_find(self, filter=None, projection=None):
+        for document in list(self.documents.values()):
+            if self._matches(document, filter or {}):
+                fields = set(projection or document) | {"_id"}
+                yield {key: copy.deepcopy(value) for key, value in document.items() if key in fields}
+
+    def upsert(self, document):
+        self.documents[document["_id"]] = copy.deepcopy(document)
+        return document["_id"]
+
+    def delete_many(self, filter):
+        # Like the Data API, delete one page at a time and flag remaining matches
+        matching = [doc_id for doc_id, document in self.documents.items() if self._matches(document, filter)]
+        for doc_id in matching[:self.delete_page_size]:
+            del self.documents[doc_id]
+        return {"status": {"deletedCount": min(len(matching), self.delete_page_size),
+                           "moreData": len(matching) > self.delete_page_size}}
+
+
+@dataclass
+class Chunk:
+    id: str
+    content: str
+    metadata: Dict[str, Any]
+    content_hash: str
+
+
+def regulation_chunks(text, state="co", source_url="https://example.gov/rules"):
+    chunker = RegulationChunker(max_chars=400, min_chars=100)
+    return [Chunk(chunk.id, chunk.content, {"state": state, "source_url": source_url, "section_heading": chunk.heading},
+                  chunk.content_hash)
+            for chunk in chunker.chunk(text, state, source_url)]
+
+
+SECTIONS = ["1.1", "1.2", "1.3"]
+
+
+def regulation_text(licensing_fee="$5,000", sections=SECTIONS):
+    return "\n\n".join(
+        f"Section {number}. {title}\n\nA licensee shall {rule}."
+        for number, title, rule in [
+            ("1.1", "Licensing", f"pay an application fee of {licensing_fee}"),
+            ("1.2", "Packaging", "use child-resistant packaging"),
+            ("1.3", "Transport", "keep a transport manifest"),
+        ]
+        if number in sections
+    )
+
+
+def make_store():
+    embedded = []
+
+    def embed_documents(texts):
+        embedded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    collection = InMemoryCollection()
+    return RegulationStore(collection, embed_documents, batch_size=2), collection, embedded
+
+
+def test_upsert_replaces_in_place_and_skips_unchanged():
+    store, collection, embedded = make_store()
+
+    chunks = regulation_chunks(regulation_text())
+    assert store.upsert_chunks(chunks) == {"upserted": 3, "unchanged": 0}
+    assert len(embedded) == 3
+
+    # Re-ingesting the same files neither duplicates nor re-embeds
+    embedded.clear()
+    assert store.upsert_chunks(regulation_chunks(regulation_text())) == {"upserted": 0, "unchanged": 3}
+    assert embedded == [] and len(collection.documents) == 3
+
+    # An amended section is replaced under its existing ID
+    amended = regulation_chunks(regulation_text(licensing_fee="$7,500"))
+    assert store.upsert_chunks(amended) == {"upserted": 1, "unchanged": 2}
+    assert len(collection.documents) == 3
+    assert "$7,500" in collection.documents[amended[0].id]["content"]
+    assert collection.documents[amended[0].id]["$vector"] == [float(len(amended[0].content)), 1.0]
+
+
+def test_sync_deletes_chunks_of_removed_sections():
+    store, collection, embedded = make_store()
+    store.sync_chunks(regulation_chunks(regulation_text()) +
+                      regulation_chunks(regulation_text(), source_url="https://example.gov/bulletin"))
+    assert len(collection.documents) == 6
+
+    # Section 1.3 is repealed from one document: its chunk goes, the other document is untouched
+    embedded.clear()
+    current = regulation_chunks(regulation_text(licensing_fee="$7,500", sections=["1.1", "1.2"]))
+    assert store.sync_chunks(current) == {"upserted": 1, "unchanged": 1, "removed": 1}
+    assert len(embedded) == 1
+    rules = {doc_id for doc_id, document in collection.documents.items()
+             if document["metadata"]["source_url"] == "https://example.gov/rules"}
+    assert rules == {chunk.id for chunk in current}
+    assert len(collection.documents) == 5
+
+
+def test_delete_by_state_pages_through_matches():
+    store, collection, _ = make_store()
+    for i in range(45):
+        collection.upsert({"_id": f"co-{i}", "content": "rule", "metadata": {"state": "co"}})
+    collection.upsert({"_id": "wa-1", "content": "rule", "metadata": {"state": "wa"}})
+
+    assert store.delete_where({"metadata.state": "co"}) == 45
+    assert list(collection.documents) == ["wa-1"]
+
+
+def test_reconcile_reports_and_removes_orphans_and_duplicates():
+    store, collection, _ = make_store()
+    chunks = regulation_chunks(regulation_text())
+    store.upsert_chunks(chunks)
+
+    # A legacy copy of one chunk under a random ID, and a chunk whose section no longer exists
+    collection.upsert({"_id": str(uuid.uuid4()), "content": chunks[1].content,
+                       "metadata": {"state": "co", "source_url": "https://example.gov/rules"}})
+    collection.upsert({"_id": "repealed", "content": "Section 9.9. Repealed rule",
+                       "metadata": {"state": "co", "source_url": "https://example.gov/rules"}})
+    collection.upsert({"_id": "wa-1", "content": "rule", "metadata": {"state": "wa"}})
+
+    current = regulation_chunks(regulation_text(licensing_fee="$7,500"))
+    report = store.reconcile("co", current)
+    assert report["stored"] == 5 and report["expected"] == 3
+    assert report["orphans"] == ["repealed"]
+    assert len(report["duplicates"]) == 1 and report["duplicates"][0] not in {chunk.id for chunk in chunks}
+    assert report["missing"] == [] and report["stale"] == [current[0].id]
+    assert len(collection.documents) == 6
+
+    report = store.reconcile("co", current, apply=True)
+    assert report["deleted"] == 2 and report["upserted"] == 1
+    assert store.reconcile("co", current)["stored"] == 3
+    assert set(collection.documents) == {chunk.id for chunk in current} | {"wa-1"}
+
+
+if __name__ == "__main__":
+    test_upsert_replaces_in_place_and_skips_unchanged()
+    test_sync_deletes_chunks_of_removed_sections()
+    test_delete_by_state_pages_through_matches()
+    test_reconcile_reports_and_removes_orphans_and_duplicates()
+    print("Regulation store tests passed!")
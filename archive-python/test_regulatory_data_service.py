@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test the regulatory data service's connection pool, full-text search and incremental fetching
+"""
+import os
+import sys
+import asyncio
+import sqlite3
+import tempfile
+import threading
+import importlib.util
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def load_service_module():
+    """Import regulatory-data-service.py (its module-level singleton writes under the working directory)"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            spec = importlib.util.spec_from_file_location(
+                "regulatory_data_service", Path(__file__).parent / "regulatory-data-service.py")
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        finally:
+            os.chdir(cwd)
+    return module
+
+
+service_module = load_service_module()
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_connections_stay_bounded_across_threads():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = service_module.RegulatoryDataService(tmp_dir, pool_size=4)
+        service.get_statistics()
+        fds_before = open_fds()
+
+        errors = []
+
+        def request():
+            try:
+                service.get_statistics()
+                service.get_state_regulations("CO")
+            except Exception as e:
+                errors.append(e)
+
+        # One thread per request, as the threaded Flask server does
+        for _ in range(10):
+            threads = [threading.Thread(target=request) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert errors == []
+        assert service._opened <= 4
+        assert open_fds() - fds_before <= 3 * 4  # db, -wal and -shm per pooled connection
+
+        service.close_connections()
+        service.validators.close()
+        assert service._opened == 0
+
+
+def test_nested_use_reuses_the_borrowed_connection():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = service_module.RegulatoryDataService(tmp_dir, pool_size=1)
+        with service.get_db_connection() as outer:
+            with service.get_db_connection() as inner:
+                assert inner is outer
+        with service.get_db_connection() as conn:
+            assert conn is outer
+        service.close_connections()
+        service.validators.close()
+
+
+def make_regulation(state_code, title, content, url):
+    return service_module.StateRegulation(
+        state=state_code, state_code=state_code, title=title, url=url,
+        last_updated="2024-01-01", content=content, content_hash=str(hash(content)),
+        version="1", category="retail")
+
+
+def test_fts_query_escapes_user_input():
+    build = service_module.RegulatoryDataService._build_fts_query
+    assert build('age "child resistant" licens*') == '"age" "child resistant" "licens"*'
+    # FTS5 operators and syntax characters are matched as plain words
+    assert build("edibles OR NOT beverages") == '"edibles" "OR" "NOT" "beverages"'
+    assert build("NEAR(packaging) co-op's") == '"NEAR" "packaging" "co" "op" "s"'
+    assert build('"unterminated phrase') == '"unterminated" "phrase"'
+    assert build('*** "" -') == ''
+
+
+def test_ranked_search_weights_titles_and_filters_by_state():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = service_module.RegulatoryDataService(tmp_dir)
+        asyncio.run(service._save_regulations([
+            make_regulation("CO", "General Provisions",
+                            "Licensees shall use child resistant packaging for edibles.", "https://co.gov/1"),
+            make_regulation("CO", "Packaging and Labeling",
+                            "Containers shall be opaque and child resistant.", "https://co.gov/2"),
+            make_regulation("WA", "Packaging Rules",
+                            "Marijuana products require child resistant packaging.", "https://wa.gov/1"),
+        ]))
+
+        results = service.search_regulations_ranked("packaging", state_code="CO")
+        assert [result["regulation"].title for result in results] == ["Packaging and Labeling",
+                                                                       "General Provisions"]
+        assert results[0]["score"] <= results[1]["score"]
+        assert "[packaging]" in results[1]["snippet"]
+
+        assert len(service.search_regulations_ranked('"child resistant" packag*')) == 3
+        assert service.search_regulations_ranked('"resistant child"') == []
+        # Input that is invalid FTS5 syntax is searched as words instead of raising
+        assert len(service.search_regulations('edibles" (')) == 1
+        assert service.search_regulations_ranked("!!!") == []
+
+        # The index follows updates to a regulation's content
+        asyncio.run(service._save_regulations([
+            make_regulation("CO", "General Provisions", "Licensees shall verify purchaser age.", "https://co.gov/1")
+        ]))
+        assert service.search_regulations("edibles") == []
+        assert [r.title for r in service.search_regulations("purchaser")] == ["General Provisions"]
+
+        service.close_connections()
+        service.validators.close()
+
+
+class RegulationPageHandler(BaseHTTPRequestHandler):
+    """Serves one regulation page with an ETag"""
+    body = b"<html><body>Retail licensees shall verify purchaser age.</body></html>"
+    full_responses = 0
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"rules-v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        type(self).full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"rules-v1"')
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_failed_save_is_refetched():
+    RegulationPageHandler.full_responses = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RegulationPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/rules"
+    sources = service_module.STATE_REGULATION_SOURCES
+    sources["ZZ"] = {"name": "Testland", "sources": [{"url": url, "category": "retail", "title": "Retail Rules"}]}
+
+    async def failing_save(regulations):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def run(service):
+        try:
+            return await service.download_state_regulations("ZZ")
+        finally:
+            await service.session.close()
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            service = service_module.RegulatoryDataService(tmp_dir)
+
+            save = service._save_regulations
+            service._save_regulations = failing_save
+            try:
+                asyncio.run(run(service))
+                assert False, "expected the save to fail"
+            except sqlite3.OperationalError:
+                pass
+            service._save_regulations = save
+
+            # The failed save did not commit the ETag, so the page is fetched and saved again
+            regulations = asyncio.run(run(service))
+            assert RegulationPageHandler.full_responses == 2
+            assert "purchaser age" in service.get_state_regulations("ZZ")[0].content
+
+            # Now the page is revalidated with a 304 and the stored regulation is reused
+            regulations = asyncio.run(run(service))
+            assert RegulationPageHandler.full_responses == 2
+            assert regulations[0].title == "Retail Rules"
+
+            service.close_connections()
+            service.validators.close()
+    finally:
+        sources.pop("ZZ", None)
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_connections_stay_bounded_across_threads()
+    test_nested_use_reuses_the_borrowed_connection()
+    test_fts_query_escapes_user_input()
+    test_ranked_search_weights_titles_and_filters_by_state()
+    test_failed_save_is_refetched()
+    print("Regulatory data service tests passed!")
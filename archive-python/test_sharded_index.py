@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the sharded unified search index
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sharded_index import ShardedSearchIndex
+
+
+def state_data(state, sections):
+    citations = [{"state": state, "section": section, "hash_id": f"{state}-{section}"} for section in sections]
+    vectors = [{"citation_id": f"{state}-{section}", "state": state, "section": section,
+                "embedding": [1.0, float(i), 0.0]} for i, section in enumerate(sections)]
+    return citations, vectors
+
+
+def test_shards_load_lazily_and_search():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ShardedSearchIndex(tmp_dir)
+        index.write_shard("co", *state_data("co", ["44-10-501", "44-10-502"]))
+        index.write_shard("ca", *state_data("ca", ["26001"]))
+
+        reader = ShardedSearchIndex(tmp_dir)
+        assert reader.states() == ["ca", "co"]
+        assert reader.get_statistics()["total_citations"] == 3
+
+        results = reader.search([0.0, 1.0, 0.0], k=1, states=["co"])
+        assert results[0]["section"] == "44-10-502" and results[0]["score"] > 0.7
+        assert reader.get_statistics()["loaded_shards"] == ["co"]
+
+        assert [c["section"] for c in reader.iter_citations(["ca"])] == ["26001"]
+
+
+def test_rewrites_only_changed_shard():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ShardedSearchIndex(tmp_dir)
+        assert index.write_shard("co", *state_data("co", ["44-10-501"]))
+        assert index.write_shard("ca", *state_data("ca", ["26001"]))
+        ca_files = sorted(p.name for p in index.shards_dir.glob("ca-*"))
+
+        # Identical content is not rewritten
+        assert not index.write_shard("co", *state_data("co", ["44-10-501"]))
+
+        # A changed state replaces its own files; other shards are untouched, and
+        # the old files outlive the manifest swap until the next write
+        assert index.write_shard("co", *state_data("co", ["44-10-501", "44-10-601"]))
+        assert sorted(p.name for p in index.shards_dir.glob("ca-*")) == ca_files
+        assert len(list(index.shards_dir.glob("co-*"))) == 4  # old and new .json + .npy
+        assert not list(index.shards_dir.glob(".*.tmp"))
+
+        assert index.remove_shard("ca")
+        assert index.states() == ["co"]
+        assert len(list(index.shards_dir.glob("co-*"))) == 2
+        assert sorted(p.name for p in index.shards_dir.glob("ca-*")) == ca_files
+
+        assert index.write_shard("wa", *state_data("wa", ["314-55"]))
+        assert not list(index.shards_dir.glob("ca-*"))
+
+
+def test_readers_follow_rewritten_shards():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = ShardedSearchIndex(tmp_dir)
+        reader = ShardedSearchIndex(tmp_dir)
+        original = state_data("co", ["44-10-501"])
+        writer.write_shard("co", *original)
+        assert [c["section"] for c in reader.iter_citations(["co"])] == ["44-10-501"]
+
+        # The reader's cached shard is keyed on content, so another writer's update is seen
+        writer.write_shard("co", *state_data("co", ["44-10-501", "44-10-601"]))
+        assert [c["section"] for c in reader.iter_citations(["co"])] == ["44-10-501", "44-10-601"]
+        assert reader.get_statistics()["loaded_shards"] == ["co"]
+
+        # Returning to earlier content keeps its files live through later writes
+        writer.write_shard("co", *original)
+        writer.write_shard("ca", *state_data("ca", ["26001"]))
+        writer.write_shard("wa", *state_data("wa", ["314-55"]))
+        assert [c["section"] for c in ShardedSearchIndex(tmp_dir).iter_citations(["co"])] == ["44-10-501"]
+        assert len(list(writer.shards_dir.glob("co-*"))) == 2
+
+
+if __name__ == "__main__":
+    test_shards_load_lazily_and_search()
+    test_rewrites_only_changed_shard()
+    test_readers_follow_rewritten_shards()
+    print("Sharded index tests passed!")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test StatePipeline phase checkpoints and the embedding phase with a pluggable embedder
+"""
+import sys
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import state_pipeline
+from embedding_utils import Embedder
+from state_pipeline import MultiStatePipelineManager
+
+
+class CountingEmbedder(Embedder):
+    """Deterministic 8-dimensional embedder that records every batch"""
+    model_name = "test-counting-embedder"
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] + [float(ord(ch)) for ch in text[:7].ljust(7)] for text in texts]
+
+
+def make_state(base_dir: Path, pages: int = 1, state: str = "co"):
+    sources_file = base_dir / "state_sources.json"
+    sources = json.loads(sources_file.read_text()) if sources_file.exists() else {"cannabis_legal_states": {}}
+    sources["cannabis_legal_states"][state] = {}
+    sources_file.write_text(json.dumps(sources))
+    mirrors_dir = base_dir / "states" / state / "mirrors"
+    mirrors_dir.mkdir(parents=True)
+    for i in range(pages):
+        (mirrors_dir / f"rules_{i}.html").write_text(
+            f"<html><style>p {{}}</style><p>See Section 44-10-{500 + i} on retail testing "
+            f"and Rule 2-{200 + i} on packaging.</p></html>"
+        )
+
+
+def test_embeds_every_chunk():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(tmp_dir)
+        make_state(base_dir, pages=12)  # More than the old 10-file cap
+        embedder = CountingEmbedder()
+
+        manager = MultiStatePipelineManager(str(base_dir), embedder=embedder, use_embedding_cache=False)
+        result = asyncio.run(manager.process_states_parallel(["co"]))
+        assert result["state_results"]["co"]["status"] == "completed"
+
+        vector_data = json.loads((base_dir / "states" / "co" / "vectors" / "vectors.json").read_text())
+        assert vector_data["total_vectors"] == 24
+        assert vector_data["embedding_dimension"] == 8
+        assert vector_data["model_name"] == "test-counting-embedder"
+        assert vector_data["chunks_per_second"] > 0
+
+        # Chunks are the citation's page text, without markup
+        embedded_texts = [text for batch in embedder.batches for text in batch]
+        assert "Section 44-10-500 on retail testing and Rule 2-200 on packaging." in embedded_texts
+        assert not any("<" in text for text in embedded_texts)
+
+        assert result["embedding_throughput"]["chunks"] == 24
+
+
+def test_skips_completed_phases():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(tmp_dir)
+        make_state(base_dir)
+
+        def run():
+            manager = MultiStatePipelineManager(str(base_dir), embedder=CountingEmbedder(), use_embedding_cache=False)
+            return asyncio.run(manager.process_states_parallel(["co"]))["state_results"]["co"]
+
+        first = run()
+        assert first["status"] == "completed"
+        assert first["final_metrics"]["citations_extracted"] == 2
+
+        # Lost vector output: only vectorization and validation run again
+        (base_dir / "states" / "co" / "vectors" / "vectors.json").unlink()
+        result = run()
+        assert result["status"] == "completed"
+        assert result["skipped_phases"] == ["mirroring", "citation_extraction"]
+        assert result["final_metrics"]["citations_extracted"] == 2
+        assert result["phase_results"]["validation"]["validation_metrics"]["citations_extracted"] == 2
+
+
+def test_refreshes_mirrors_after_max_age():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(tmp_dir)
+        make_state(base_dir)
+
+        def run(mirror_max_age_days=7):
+            manager = MultiStatePipelineManager(str(base_dir), embedder=CountingEmbedder(), use_embedding_cache=False,
+                                                mirror_max_age_days=mirror_max_age_days)
+            return asyncio.run(manager.process_states_parallel(["co"]))["state_results"]["co"]
+
+        run()
+        assert run()["skipped_phases"] == ["mirroring", "citation_extraction", "vectorization", "validation"]
+
+        # A week later the mirrors are stale and are fetched again
+        real_time = state_pipeline.time.time
+        state_pipeline.time.time = lambda: real_time() + 7 * 86400
+        try:
+            result = run()
+        finally:
+            state_pipeline.time.time = real_time
+        assert "mirroring" not in result["skipped_phases"]
+
+        # Without a max age, mirrors are only refreshed when forced
+        run(mirror_max_age_days=None)
+        assert "mirroring" in run(mirror_max_age_days=None)["skipped_phases"]
+
+
+def test_unified_index_rewrites_only_changed_states():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(tmp_dir)
+        make_state(base_dir, state="co")
+        make_state(base_dir, state="wa")
+
+        manager = MultiStatePipelineManager(str(base_dir), embedder=CountingEmbedder(), use_embedding_cache=False)
+        asyncio.run(manager.process_states_parallel(["co", "wa"]))
+
+        first = manager.create_unified_search_index()
+        assert sorted(first["shards_written"]) == ["co", "wa"]
+        assert first["total_vectors"] == 4 and first["states_included"] == 2
+
+        # Re-extract one state: only its shard is rewritten
+        (base_dir / "states" / "wa" / "mirrors" / "rules_0.html").write_text("<p>Section 314-55-010 licensing</p>")
+        asyncio.run(manager.process_states_parallel(["co", "wa"]))
+        second = manager.create_unified_search_index()
+        assert second["shards_written"] == ["wa"] and second["shards_unchanged"] == ["co"]
+        assert second["total_vectors"] == 3
+        assert not (base_dir / "aggregated" / "unified_index.json").exists()
+
+
+if __name__ == "__main__":
+    test_embeds_every_chunk()
+    test_skips_completed_phases()
+    test_refreshes_mirrors_after_max_age()
+    test_unified_index_rewrites_only_changed_states()
+    print("State pipeline tests passed!")
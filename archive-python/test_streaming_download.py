@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test streaming, size-limited and resumable downloads in ComplianceDataCollector
+"""
+import re
+import sys
+import json
+import asyncio
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from collect_compliance_data import ComplianceDataCollector
+
+BODY = bytes(range(256)) * 4096  # 1 MiB
+ETAG = '"statutes-v1"'
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves body at /statutes.pdf with Range and If-Range support"""
+    range_requests = []
+    if_range_headers = []
+    body = BODY
+    etag = ETAG
+
+    def do_GET(self):
+        if self.path != "/statutes.pdf":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = type(self).body
+        if_range = self.headers.get("If-Range")
+        match = re.match(r'bytes=(\d+)-', self.headers.get("Range", ""))
+        if match and if_range is not None and if_range != type(self).etag:
+            match = None  # Resource changed: ignore the range and send it whole
+        start = int(match.group(1)) if match else 0
+        type(self).range_requests.append(self.headers.get("Range"))
+        type(self).if_range_headers.append(if_range)
+
+        self.send_response(206 if match else 200)
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("ETag", type(self).etag)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        self.wfile.write(body[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_download(prepare=None, **settings):
+    """Download /statutes.pdf with a fresh collector; returns (ok, file bytes, leftover .part files, state status)"""
+    RangeHandler.range_requests = []
+    RangeHandler.if_range_headers = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/statutes.pdf"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        (Path(tmp_dir) / "state_sources.json").write_text(json.dumps({"cannabis_legal_states": {}}))
+        collector = ComplianceDataCollector(tmp_dir)
+        collector.engine.respect_robots = False
+        for name, value in settings.items():
+            setattr(collector, name, value)
+
+        target = Path(tmp_dir) / "pdfs" / "statutes.pdf"
+        if prepare:
+            prepare(target)
+        status = {"pages_collected": 0, "pdfs_collected": 0, "errors": 0}
+
+        async def download():
+            try:
+                session = await collector.engine.get_session()
+                return await collector.download_file(session, url, target, "pdf", status)
+            finally:
+                await collector.engine.close()
+
+        try:
+            ok = asyncio.run(download())
+            content = target.read_bytes() if target.exists() else None
+            leftovers = list(target.parent.glob("*.part*")) if target.parent.exists() else []
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return ok, content, leftovers, status
+
+
+def test_streams_to_file_with_hash():
+    ok, content, leftovers, status = run_download(download_chunk_size=4096)
+    assert ok and content == BODY and leftovers == []
+    assert status["file_hashes"]["statutes.pdf"] == hashlib.sha256(BODY).hexdigest()
+    assert RangeHandler.range_requests == [None]
+
+
+def leave_partial(partial: bytes, validator=None):
+    """prepare() that leaves an interrupted download (and its If-Range validator)"""
+    def prepare(target):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.with_name("statutes.pdf.part").write_bytes(partial)
+        if validator:
+            target.with_name("statutes.pdf.part.validator").write_text(validator)
+    return prepare
+
+
+def test_resumes_partial_download_with_range():
+    ok, content, leftovers, status = run_download(prepare=leave_partial(BODY[:300000], ETAG))
+    assert ok and content == BODY and leftovers == []
+    assert RangeHandler.range_requests == ["bytes=300000-"]
+    assert RangeHandler.if_range_headers == [ETAG]
+    assert status["file_hashes"]["statutes.pdf"] == hashlib.sha256(BODY).hexdigest()
+
+
+def test_changed_file_is_refetched_whole():
+    # The partial file belongs to an older revision of the PDF
+    old_body = bytes(reversed(BODY))
+    ok, content, leftovers, _ = run_download(prepare=leave_partial(old_body[:300000], '"statutes-v0"'))
+    assert ok and content == BODY and leftovers == []
+    assert RangeHandler.range_requests == ["bytes=300000-"]
+
+
+def test_partial_without_validator_is_not_resumed():
+    ok, content, _, _ = run_download(prepare=leave_partial(b"stale bytes"))
+    assert ok and content == BODY
+    assert RangeHandler.range_requests == [None]
+
+
+def test_rejects_files_over_max_size():
+    ok, content, leftovers, status = run_download(max_download_bytes=1000)
+    assert not ok and content is None and leftovers == []
+    assert status["pdfs_collected"] == 0
+
+
+if __name__ == "__main__":
+    test_streams_to_file_with_hash()
+    test_resumes_partial_download_with_range()
+    test_changed_file_is_refetched_whole()
+    test_partial_without_validator_is_not_resumed()
+    test_rejects_files_over_max_size()
+    print("Streaming download tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the resumable task graph
+"""
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from task_graph import CheckpointStore, PipelineTask, TaskGraph
+
+
+def build_graph(tmp_dir: Path, runs, fail=(), max_concurrency=4):
+    """Two independent three-step chains writing one file per step"""
+    checkpoints = CheckpointStore(str(tmp_dir / "checkpoints.db"))
+    graph = TaskGraph(checkpoints, max_concurrency=max_concurrency)
+
+    for chain in ("a", "b"):
+        for step in (1, 2, 3):
+            key = f"{chain}/{step}"
+            output = tmp_dir / f"{chain}{step}.txt"
+
+            async def run(key=key, output=output):
+                runs.append(key)
+                await asyncio.sleep(0.01)
+                if key in fail:
+                    return {"status": "failed", "error": "boom"}
+                output.write_text(key)
+                return {"written": str(output)}
+
+            graph.add(PipelineTask(key, run, deps=[f"{chain}/{step - 1}"] if step > 1 else [],
+                                   outputs=[output]))
+    return graph, checkpoints
+
+
+def test_resumes_at_failed_step():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+
+        runs = []
+        graph, checkpoints = build_graph(tmp_dir, runs, fail={"b/2"})
+        outcomes = asyncio.run(graph.run())
+        assert {key: outcome.status for key, outcome in outcomes.items()} == {
+            "a/1": "completed", "a/2": "completed", "a/3": "completed",
+            "b/1": "completed", "b/2": "failed", "b/3": "blocked"
+        }
+        checkpoints.close()
+
+        # Rerun: only the failed step and its dependents run
+        runs = []
+        graph, checkpoints = build_graph(tmp_dir, runs)
+        outcomes = asyncio.run(graph.run())
+        assert sorted(runs) == ["b/2", "b/3"]
+        assert all(outcome.ok for outcome in outcomes.values())
+
+        # A tampered output re-runs its producer; the rewritten output matches, so a/3 stays skipped
+        (tmp_dir / "a2.txt").write_text("edited by hand")
+        runs.clear()
+        asyncio.run(graph.run())
+        assert runs == ["a/2"]
+
+        # Forcing a step re-runs it; an identical output leaves dependents skipped
+        runs.clear()
+        asyncio.run(graph.run(force=["a/1"]))
+        assert runs == ["a/1"]
+
+
+def test_independent_chains_run_concurrently():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        in_flight = []
+        peak = []
+        checkpoints = CheckpointStore(str(Path(tmp_dir) / "checkpoints.db"))
+        graph = TaskGraph(checkpoints, max_concurrency=2)
+
+        for key in ("co/extract", "ca/extract", "wa/extract"):
+            async def run(key=key):
+                in_flight.append(key)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.05)
+                in_flight.remove(key)
+                return {}
+            graph.add(PipelineTask(key, run))
+
+        asyncio.run(graph.run())
+        assert max(peak) == 2
+
+
+if __name__ == "__main__":
+    test_resumes_at_failed_step()
+    test_independent_chains_run_concurrently()
+    print("Task graph tests passed!")
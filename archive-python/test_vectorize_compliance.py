@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test FAISS index maintenance in ComplianceVectorizer
+"""
+import sys
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from vectorize_compliance import ComplianceVectorizer
+
+DIMENSION = 16
+
+
+class HashingModel:
+    """Deterministic stand-in for a SentenceTransformer"""
+
+    def encode(self, texts, **kwargs):
+        vectors = []
+        for text in texts:
+            seed = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+            vectors.append(np.random.default_rng(seed).standard_normal(DIMENSION))
+        return np.array(vectors, dtype='float32')
+
+
+def citation_text(state, i):
+    return f"{state} licensees shall keep inventory record {i}"
+
+
+def write_citations(base_dir: Path, state: str, count: int, start: int = 0):
+    citations_dir = base_dir / "citations"
+    citations_dir.mkdir(parents=True, exist_ok=True)
+    citations = [
+        {"hash_id": f"{state}-{i}", "document_type": "regulation", "title": "Rules",
+         "section": str(i), "text_content": citation_text(state, i)}
+        for i in range(start, start + count)
+    ]
+    (citations_dir / f"{state}_citations.json").write_text(json.dumps({"citations": citations}))
+
+
+def make_vectorizer(base_dir: Path, index_type: str = "flat") -> ComplianceVectorizer:
+    vectorizer = ComplianceVectorizer(str(base_dir), use_embedding_cache=False, index_type=index_type)
+    vectorizer.embedding_model = HashingModel()
+    vectorizer.embedding_dimension = DIMENSION
+    return vectorizer
+
+
+def query_text(state, i):
+    return f"regulation Rules Section {i} {citation_text(state, i)}"
+
+
+def states_found(vectorizer, query, k=20):
+    return {result["state"] for result in vectorizer.search_similar_citations(query, k=k)}
+
+
+def check_remove_state(index_type: str, expected_method: str):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(tmp_dir)
+        write_citations(base_dir, "co", 40)
+        write_citations(base_dir, "wa", 40)
+        vectorizer = make_vectorizer(base_dir, index_type)
+        vectorizer.vectorize_all_states()
+        assert "wa" in states_found(vectorizer, query_text("wa", 3))
+        # A reader that has already built the wa sub-index
+        other_reader = make_vectorizer(base_dir, index_type)
+        assert len(other_reader.search_similar_citations(query_text("wa", 3), k=3, state_filter="wa")) == 3
+
+        result = vectorizer.remove_state_from_index("wa")
+        assert result["status"] == "completed" and result["method"] == expected_method
+        assert result["total_vectors"] == 40
+
+        # Neither this instance nor a fresh reader of the persisted index returns the removed state
+        assert states_found(vectorizer, query_text("wa", 3)) == {"co"}
+        reader = make_vectorizer(base_dir, index_type)
+        assert states_found(reader, query_text("wa", 3)) == {"co"}
+        assert "wa" not in json.loads((base_dir / "vectors" / "vector_database.json").read_text())["states"]
+        assert not list((base_dir / "vectors").glob("wa_vectors.*"))
+
+        # State-filtered searches no longer find the removed state either
+        for searcher in (vectorizer, reader, other_reader):
+            assert searcher.search_similar_citations(query_text("wa", 3), k=3, state_filter="wa") == []
+        assert {r["state"] for r in reader.search_similar_citations(query_text("co", 3), k=3, state_filter="co")} == {"co"}
+
+        # Removing the last state leaves nothing to search
+        assert vectorizer.remove_state_from_index("co")["status"] == "completed"
+        assert make_vectorizer(base_dir, index_type).search_similar_citations(query_text("co", 3)) == []
+
+
+def test_remove_state_from_flat_index():
+    check_remove_state("flat", "remove_ids")
+
+
+def test_remove_state_from_ivf_index():
+    check_remove_state("ivf", "remove_ids")
+
+
+def test_remove_state_from_hnsw_index_rebuilds():
+    check_remove_state("hnsw", "rebuild")
+
+
+def test_update_state_index_replaces_only_changed_vectors():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(tmp_dir)
+        write_citations(base_dir, "co", 40)
+        write_citations(base_dir, "wa", 40)
+        vectorizer = make_vectorizer(base_dir)
+        vectorizer.vectorize_all_states()
+        manifest_file = base_dir / "vectors" / "index_manifest.json"
+        co_entries = json.loads(manifest_file.read_text())["states"]["co"]
+
+        # wa-0..4 are repealed, wa-40..44 are new and wa-5 is amended
+        write_citations(base_dir, "wa", 40, start=5)
+        citations_file = base_dir / "citations" / "wa_citations.json"
+        data = json.loads(citations_file.read_text())
+        data["citations"][0]["text_content"] = "wa licensees shall keep amended inventory records"
+        citations_file.write_text(json.dumps(data))
+
+        updater = make_vectorizer(base_dir)
+        updater.vectorize_state_citations("wa")
+        result = updater.update_state_index("wa")
+        assert result["status"] == "completed"
+        assert (result["added"], result["removed"], result["unchanged"]) == (6, 6, 34)
+        assert result["total_vectors"] == 80
+
+        # The manifest tracks the new wa IDs and leaves co alone
+        manifest = json.loads(manifest_file.read_text())
+        wa_ids = {str(ComplianceVectorizer.citation_vector_id("wa", f"wa-{i}")) for i in range(5, 45)}
+        assert set(manifest["states"]["wa"]) == wa_ids
+        assert manifest["states"]["co"] == co_entries
+
+        reader = make_vectorizer(base_dir)
+        assert reader.search_similar_citations(query_text("wa", 42), k=1)[0]["citation_id"] == "wa-42"
+        assert all(result["citation_id"] != "wa-0"
+                   for result in reader.search_similar_citations(query_text("wa", 0), k=80))
+
+        # Updating again without changes touches nothing
+        result = updater.update_state_index("wa")
+        assert (result["added"], result["removed"], result["unchanged"]) == (0, 0, 40)
+
+
+def test_update_state_index_builds_when_no_index_exists():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(tmp_dir)
+        write_citations(base_dir, "co", 10)
+        vectorizer = make_vectorizer(base_dir)
+        vectorizer.vectorize_state_citations("co")
+        assert vectorizer.update_state_index("co")["status"] == "completed"
+        assert (base_dir / "vectors" / "index_manifest.json").exists()
+        assert states_found(make_vectorizer(base_dir), query_text("co", 1)) == {"co"}
+
+
+def test_state_filter_searches_only_that_state():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(tmp_dir)
+        write_citations(base_dir, "co", 200)
+        write_citations(base_dir, "wa", 3)
+        make_vectorizer(base_dir, "ivf").vectorize_all_states()
+
+        # A query close to co citations still gets k wa results, without loading the global index
+        reader = make_vectorizer(base_dir, "ivf")
+        results = reader.search_similar_citations(query_text("co", 1), k=3, state_filter="wa")
+        assert sorted(result["citation_id"] for result in results) == ["wa-0", "wa-1", "wa-2"]
+        assert reader.faiss_index is None
+        assert set(reader.state_indexes) == {"wa"}
+
+        # Asking for more than the state has returns all of it; unknown states return nothing
+        assert len(reader.search_similar_citations(query_text("wa", 1), k=10, state_filter="wa")) == 3
+        assert reader.search_similar_citations(query_text("co", 1), k=3, state_filter="or") == []
+
+        # An index update drops the cached sub-index so the next search sees new citations
+        write_citations(base_dir, "wa", 4)
+        reader.vectorize_state_citations("wa")
+        reader.update_state_index("wa")
+        assert "wa" not in reader.state_indexes
+        results = reader.search_similar_citations(query_text("wa", 3), k=1, state_filter="wa")
+        assert results[0]["citation_id"] == "wa-3"
+
+
+if __name__ == "__main__":
+    test_remove_state_from_flat_index()
+    test_remove_state_from_ivf_index()
+    test_remove_state_from_hnsw_index_rebuilds()
+    test_update_state_index_replaces_only_changed_vectors()
+    test_update_state_index_builds_when_no_index_exists()
+    test_state_filter_searches_only_that_state()
+    print("Vectorizer index tests passed!")
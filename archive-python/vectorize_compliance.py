@@ -6,6 +6,7 @@ Creates vector embeddings for regulatory citations and documents to enable
 semantic search and precise regulatory reference retrieval for LLMs.
 """
 
+import os
 import json
 import logging
 import numpy as np
@@ -29,6 +30,9 @@ except ImportError as e:
     print("Install with: pip install faiss-cpu sentence-transformers torch transformers")
     exit(1)
 
+from embedding_utils import DEFAULT_MODEL_NAME, BatchedEmbedder, get_shared_embedding_cache
+from faiss_index_utils import INDEX_TYPES, create_faiss_index, evaluate_index_types, set_search_params, supports_remove
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -56,6 +60,12 @@ class VectorizedCitation:
         data['embedding'] = self.embedding.tolist()  # Convert numpy array to list
         return data
     
+    def to_metadata_dict(self) -> Dict:
+        """Convert to dictionary without the embedding (stored separately as binary)"""
+        data = asdict(self)
+        del data['embedding']
+        return data
+    
     @classmethod
     def from_dict(cls, data: Dict) -> 'VectorizedCitation':
         """Create from dictionary"""
@@ -65,7 +75,8 @@ class VectorizedCitation:
 class ComplianceVectorizer:
     """Main vectorization system for compliance data"""
     
-    def __init__(self, base_dir: str = "compliance_data"):
+    def __init__(self, base_dir: str = "compliance_data", use_embedding_cache: bool = True,
+                 index_type: str = "flat"):
         self.base_dir = Path(base_dir)
         self.citations_dir = self.base_dir / "citations"
         self.vectors_dir = self.base_dir / "vectors"
@@ -74,11 +85,19 @@ class ComplianceVectorizer:
         # Initialize embedding model
         self.embedding_model = None
         self.embedding_dimension = None
-        self.model_name = "sentence-transformers/all-MiniLM-L6-v2"  # Fast, good quality
-        
-        # FAISS index
+        self.model_name = DEFAULT_MODEL_NAME  # Fast, good quality
+        
+        # FAISS index ("flat" exact search, or approximate "ivf" / "hnsw")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}. Expected one of {INDEX_TYPES}")
+        self.index_type = index_type
+        self.ivf_nprobe = 16
+        self.hnsw_ef_search = 64
         self.faiss_index = None
-        self.citation_metadata = {}  # Maps index position to citation metadata
+        self.citation_metadata = {}  # Maps FAISS vector ID to citation metadata
+        self.index_manifest = {"model_name": self.model_name, "states": {}}  # Indexed content hashes per state
+        self.state_indexes = {}  # Lazily built per-state sub-indexes for state-scoped search
+        self._indexed_states_cache = (None, set())  # (manifest file stat, states in the manifest)
         
         # Vector database
         self.vector_db = {
@@ -95,6 +114,15 @@ class ComplianceVectorizer:
         # Batch processing
         self.batch_size = 100
         self.max_text_length = 512  # Token limit for embeddings
+        
+        # Embeddings are cached on disk by (model, content hash) so reruns
+        # only embed new or changed citations
+        self.embedder = BatchedEmbedder(
+            self._encode_batch,
+            batch_size=self.batch_size,
+            cache=get_shared_embedding_cache() if use_embedding_cache else None,
+            model_name=self.model_name
+        )
 
     def initialize_embedding_model(self):
         """Initialize the sentence transformer model"""
@@ -124,23 +152,27 @@ class ComplianceVectorizer:
         
         return text
 
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode a batch of preprocessed texts with the embedding model"""
+        return self.embedding_model.encode(
+            texts,
+            batch_size=self.batch_size,
+            show_progress_bar=len(texts) > self.batch_size,
+            convert_to_numpy=True
+        )
+
     def create_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Create embeddings for a list of texts"""
+        """Create embeddings for a list of texts, reusing cached embeddings"""
         if not self.embedding_model:
             self.initialize_embedding_model()
         
         # Preprocess texts
         processed_texts = [self.preprocess_text(text) for text in texts]
         
-        # Create embeddings
-        embeddings = self.embedding_model.encode(
-            processed_texts,
-            batch_size=self.batch_size,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        )
+        # Create embeddings (only uncached texts reach the model)
+        embeddings = self.embedder.embed(processed_texts)
         
-        return embeddings
+        return np.array(embeddings, dtype='float32').reshape(len(processed_texts), self.embedding_dimension)
 
     def vectorize_state_citations(self, state_key: str) -> Dict:
         """Vectorize all citations for a single state"""
@@ -200,28 +232,14 @@ class ComplianceVectorizer:
             
             vectorized_citations.append(vectorized_citation)
         
-        # Save vectorized citations
-        state_vectors_file = self.vectors_dir / f"{state_key}_vectors.json"
-        
-        # Convert to serializable format
-        serializable_citations = [citation.to_dict() for citation in vectorized_citations]
-        
-        state_vector_data = {
-            "state": state_key,
-            "total_citations": len(vectorized_citations),
-            "model_name": self.model_name,
-            "embedding_dimension": self.embedding_dimension,
-            "vectorized_citations": serializable_citations,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        with open(state_vectors_file, 'w', encoding='utf-8') as f:
-            json.dump(state_vector_data, f, indent=2, ensure_ascii=False)
+        # Save vectorized citations: float32 matrix plus JSON metadata sidecar
+        state_vectors_file = self.save_state_vectors(state_key, vectorized_citations)
         
         # Update vector database
         self.vector_db["states"][state_key] = {
             "total_vectors": len(vectorized_citations),
             "vectors_file": str(state_vectors_file),
+            "embeddings_file": str(state_vectors_file.with_suffix(".npy")),
             "processed_at": datetime.now().isoformat()
         }
         
@@ -234,90 +252,440 @@ class ComplianceVectorizer:
             "vectorized_citations": vectorized_citations
         }
 
+    def save_state_vectors(self, state_key: str, vectorized_citations: List[VectorizedCitation]) -> Path:
+        """
+        Save a state's vectors as a float32 .npy matrix with a JSON metadata sidecar
+        
+        Row i of the matrix is the embedding of vectorized_citations[i] in the sidecar.
+        """
+        state_vectors_file = self.vectors_dir / f"{state_key}_vectors.json"
+        embeddings_file = self.vectors_dir / f"{state_key}_vectors.npy"
+        
+        if vectorized_citations:
+            embeddings_matrix = np.stack([citation.embedding for citation in vectorized_citations]).astype('float32')
+        else:
+            embeddings_matrix = np.zeros((0, self.embedding_dimension or 0), dtype='float32')
+        
+        # Write to temp files and rename so readers never see a partial state
+        tmp_embeddings_file = embeddings_file.with_suffix(".tmp.npy")
+        np.save(tmp_embeddings_file, embeddings_matrix)
+        tmp_embeddings_file.replace(embeddings_file)
+        
+        state_vector_data = {
+            "state": state_key,
+            "total_citations": len(vectorized_citations),
+            "model_name": self.model_name,
+            "embedding_dimension": self.embedding_dimension,
+            "embeddings_file": embeddings_file.name,
+            "embeddings_dtype": "float32",
+            "vectorized_citations": [citation.to_metadata_dict() for citation in vectorized_citations],
+            "created_at": datetime.now().isoformat()
+        }
+        
+        tmp_vectors_file = state_vectors_file.with_suffix(".json.tmp")
+        with open(tmp_vectors_file, 'w', encoding='utf-8') as f:
+            json.dump(state_vector_data, f, ensure_ascii=False)
+        tmp_vectors_file.replace(state_vectors_file)
+        
+        # Any cached sub-index for this state is now stale
+        self.state_indexes.pop(state_key, None)
+        
+        return state_vectors_file
+
+    def load_state_vectors(self, vectors_file: Path) -> Tuple[np.ndarray, List[Dict]]:
+        """
+        Load a state's embedding matrix and citation metadata
+        
+        The matrix is memory-mapped from the .npy file. Older vector files that
+        embed JSON float lists inline are still supported.
+        """
+        with open(vectors_file, 'r', encoding='utf-8') as f:
+            state_data = json.load(f)
+        
+        citations = state_data.get("vectorized_citations", [])
+        embeddings_file = state_data.get("embeddings_file")
+        
+        if embeddings_file:
+            embeddings = np.load(vectors_file.parent / embeddings_file, mmap_mode='r')
+        else:
+            # Legacy format: embeddings stored as JSON lists
+            embeddings = np.array([citation.pop("embedding") for citation in citations], dtype='float32')
+        
+        if len(embeddings) != len(citations):
+            raise ValueError(f"Embedding count mismatch in {vectors_file}: "
+                             f"{len(embeddings)} vectors for {len(citations)} citations")
+        
+        return embeddings, citations
+
+    @staticmethod
+    def citation_vector_id(state_key: str, citation_id: str) -> int:
+        """Stable 63-bit FAISS ID for a state's citation"""
+        digest = hashlib.sha256(f"{state_key}:{citation_id}".encode()).hexdigest()
+        return int(digest[:15], 16)
+
+    def _citation_index_metadata(self, citation_data: Dict) -> Dict:
+        """Truncated citation metadata stored alongside the FAISS index"""
+        text_content = citation_data["text_content"]
+        return {
+            "citation_id": citation_data["citation_id"],
+            "state": citation_data["state"],
+            "citation_string": citation_data["citation_string"],
+            "section": citation_data["section"],
+            "document_type": citation_data["document_type"],
+            "title": citation_data["title"],
+            "text_content": text_content[:500] + "..." if len(text_content) > 500 else text_content
+        }
+
+    def _load_state_index_entries(self, state_key: str, vectors_file: Path) -> Tuple[np.ndarray, np.ndarray, List[Dict], Dict[str, str]]:
+        """
+        Load a state's vectors keyed by stable IDs
+        
+        Returns (embeddings, ids, metadata, manifest entries) where the
+        manifest maps each ID to the content hash of its embedding.
+        """
+        embeddings, citations = self.load_state_vectors(vectors_file)
+        
+        rows = []
+        ids = []
+        metadata = []
+        manifest_entries = {}
+        
+        for row, citation_data in enumerate(citations):
+            vector_id = self.citation_vector_id(state_key, citation_data["citation_id"])
+            if str(vector_id) in manifest_entries:
+                continue  # Duplicate citation within the state
+            
+            rows.append(row)
+            ids.append(vector_id)
+            metadata.append(self._citation_index_metadata(citation_data))
+            manifest_entries[str(vector_id)] = citation_data["embedding_hash"]
+        
+        embeddings_matrix = np.asarray(embeddings, dtype='float32')[rows]
+        faiss.normalize_L2(embeddings_matrix)
+        
+        return embeddings_matrix, np.array(ids, dtype='int64'), metadata, manifest_entries
+
+    def _new_faiss_index(self, dimension: int, index_type: str = "flat",
+                         training_vectors: Optional[np.ndarray] = None):
+        """Create an empty ID-mapped inner-product index of the given type"""
+        index = create_faiss_index(index_type, dimension, training_vectors=training_vectors)
+        set_search_params(index, nprobe=self.ivf_nprobe, ef_search=self.hnsw_ef_search)
+        return faiss.IndexIDMap2(index)
+
+    def _save_faiss_index(self):
+        """Persist FAISS index, citation metadata and index manifest"""
+        faiss_index_file = self.vectors_dir / "compliance_faiss.index"
+        faiss.write_index(self.faiss_index, str(faiss_index_file))
+        
+        metadata_file = self.vectors_dir / "citation_metadata.json"
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(self.citation_metadata, f, ensure_ascii=False)
+        
+        manifest_file = self.vectors_dir / "index_manifest.json"
+        self.index_manifest["updated_at"] = datetime.now().isoformat()
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index_manifest, f)
+        
+        self.vector_db["total_vectors"] = int(self.faiss_index.ntotal)
+        self.vector_db["faiss_index_file"] = str(faiss_index_file)
+        self.vector_db["metadata_file"] = str(metadata_file)
+        self.vector_db["index_manifest_file"] = str(manifest_file)
+        
+        return faiss_index_file
+
     def build_faiss_index(self) -> Dict:
         """Build FAISS index from all vectorized citations"""
         logger.info("Building FAISS index from vectorized citations")
         
-        if not self.embedding_dimension:
-            self.initialize_embedding_model()
+        self.faiss_index = None
+        self.citation_metadata = {}
+        self.index_manifest = {"model_name": self.model_name, "index_type": self.index_type, "states": {}}
+        self.state_indexes = {}
         
-        # Collect all embeddings and metadata
-        all_embeddings = []
-        all_metadata = []
+        embedding_matrices = []
+        id_arrays = []
         
         # Load all state vectors
         for state_key, state_info in self.vector_db["states"].items():
             vectors_file = Path(state_info["vectors_file"])
             
-            if vectors_file.exists():
-                with open(vectors_file, 'r', encoding='utf-8') as f:
-                    state_data = json.load(f)
-                
-                for citation_data in state_data.get("vectorized_citations", []):
-                    embedding = np.array(citation_data["embedding"])
-                    all_embeddings.append(embedding)
-                    
-                    # Store metadata
-                    metadata = {
-                        "citation_id": citation_data["citation_id"],
-                        "state": citation_data["state"],
-                        "citation_string": citation_data["citation_string"],
-                        "section": citation_data["section"],
-                        "document_type": citation_data["document_type"],
-                        "title": citation_data["title"],
-                        "text_content": citation_data["text_content"][:500] + "..." if len(citation_data["text_content"]) > 500 else citation_data["text_content"]
-                    }
-                    all_metadata.append(metadata)
-        
-        if not all_embeddings:
+            if not vectors_file.exists():
+                continue
+            
+            embeddings, ids, metadata, manifest_entries = self._load_state_index_entries(state_key, vectors_file)
+            if len(ids) == 0:
+                continue
+            
+            embedding_matrices.append(embeddings)
+            id_arrays.append(ids)
+            self.citation_metadata.update(zip(ids.tolist(), metadata))
+            self.index_manifest["states"][state_key] = manifest_entries
+        
+        if not embedding_matrices:
             logger.warning("No embeddings found for FAISS index")
             return {"status": "no_embeddings"}
         
-        # Convert to numpy array
-        embeddings_matrix = np.array(all_embeddings).astype('float32')
+        embeddings_matrix = np.concatenate(embedding_matrices)
+        all_ids = np.concatenate(id_arrays)
         
-        logger.info(f"Building FAISS index with {len(all_embeddings)} vectors")
+        # Dimension comes from the stored vectors, so the model need not be loaded
+        self.embedding_dimension = int(embeddings_matrix.shape[1])
         
-        # Create FAISS index
-        self.faiss_index = faiss.IndexFlatIP(self.embedding_dimension)  # Inner product for similarity
+        logger.info(f"Building {self.index_type} FAISS index with {len(all_ids)} vectors")
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(embeddings_matrix)
+        # IVF quantizers are trained on the full corpus
+        self.faiss_index = self._new_faiss_index(self.embedding_dimension, self.index_type,
+                                                 training_vectors=embeddings_matrix)
+        self.faiss_index.add_with_ids(embeddings_matrix, all_ids)
         
-        # Add to index
-        self.faiss_index.add(embeddings_matrix)
+        total_vectors = int(self.faiss_index.ntotal)
+        faiss_index_file = self._save_faiss_index()
         
-        # Store metadata
-        self.citation_metadata = {i: metadata for i, metadata in enumerate(all_metadata)}
+        logger.info(f"FAISS index built with {total_vectors} vectors")
         
-        # Save FAISS index
-        faiss_index_file = self.vectors_dir / "compliance_faiss.index"
-        faiss.write_index(self.faiss_index, str(faiss_index_file))
+        return {
+            "status": "completed",
+            "total_vectors": total_vectors,
+            "embedding_dimension": self.embedding_dimension,
+            "index_type": self.index_type,
+            "index_file": str(faiss_index_file)
+        }
+
+    def _load_index_for_update(self) -> bool:
+        """Load the persisted ID-mapped index and manifest for incremental updates"""
+        manifest_file = self.vectors_dir / "index_manifest.json"
+        if not manifest_file.exists() or not self.load_faiss_index():
+            return False
         
-        # Save metadata
-        metadata_file = self.vectors_dir / "citation_metadata.json"
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(self.citation_metadata, f, indent=2, ensure_ascii=False)
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            self.index_manifest = json.load(f)
         
-        # Update vector database
-        self.vector_db["total_vectors"] = len(all_embeddings)
-        self.vector_db["faiss_index_file"] = str(faiss_index_file)
-        self.vector_db["metadata_file"] = str(metadata_file)
+        if self.index_manifest.get("model_name") != self.model_name:
+            logger.warning("Index manifest was built with a different model")
+            return False
         
-        logger.info(f"FAISS index built with {len(all_embeddings)} vectors")
+        if self.index_manifest.get("index_type", "flat") != self.index_type:
+            logger.info("Index manifest was built with a different index type")
+            return False
+        
+        # HNSW graphs cannot remove vectors in place
+        if not supports_remove(self.faiss_index):
+            return False
+        
+        return True
+
+    def update_state_index(self, state_key: str) -> Dict:
+        """
+        Incrementally add, replace or remove one state's vectors in the persisted index
+        
+        Only vectors whose embedding changed are replaced; unchanged citations
+        are left in place. Falls back to a full build when no compatible index exists.
+        """
+        logger.info(f"Updating FAISS index for {state_key}")
+        
+        self.state_indexes.pop(state_key, None)
+        self.load_vector_database()
+        
+        if not self._load_index_for_update():
+            logger.info("No incremental index available, building full index")
+            result = self.build_faiss_index()
+            self.save_vector_database()
+            return result
+        
+        indexed_entries = self.index_manifest["states"].get(state_key, {})
+        
+        vectors_file = self.vectors_dir / f"{state_key}_vectors.json"
+        if vectors_file.exists():
+            embeddings, ids, metadata, new_entries = self._load_state_index_entries(state_key, vectors_file)
+        else:
+            embeddings, ids, metadata, new_entries = None, np.array([], dtype='int64'), [], {}
+        
+        # Remove vectors that disappeared or whose content changed
+        stale_ids = [
+            int(vector_id) for vector_id, content_hash in indexed_entries.items()
+            if new_entries.get(vector_id) != content_hash
+        ]
+        if stale_ids:
+            self.faiss_index.remove_ids(np.array(stale_ids, dtype='int64'))
+            for vector_id in stale_ids:
+                self.citation_metadata.pop(vector_id, None)
+        
+        # Add vectors that are new or changed
+        add_rows = [
+            row for row, vector_id in enumerate(ids.tolist())
+            if indexed_entries.get(str(vector_id)) != new_entries[str(vector_id)]
+        ]
+        if add_rows:
+            self.faiss_index.add_with_ids(embeddings[add_rows], ids[add_rows])
+            for row in add_rows:
+                self.citation_metadata[int(ids[row])] = metadata[row]
+        
+        if new_entries:
+            self.index_manifest["states"][state_key] = new_entries
+        else:
+            self.index_manifest["states"].pop(state_key, None)
+        
+        faiss_index_file = self._save_faiss_index()
+        self.save_vector_database()
+        
+        logger.info(f"Index update for {state_key}: {len(add_rows)} added, {len(stale_ids)} removed, "
+                    f"{len(ids) - len(add_rows)} unchanged")
         
         return {
             "status": "completed",
-            "total_vectors": len(all_embeddings),
-            "embedding_dimension": self.embedding_dimension,
+            "state": state_key,
+            "added": len(add_rows),
+            "removed": len(stale_ids),
+            "unchanged": len(ids) - len(add_rows),
+            "total_vectors": int(self.faiss_index.ntotal),
             "index_file": str(faiss_index_file)
         }
 
+    def remove_state_from_index(self, state_key: str) -> Dict:
+        """
+        Remove all of one state's vectors from the persisted index
+        
+        Vectors are removed in place where the index supports it; otherwise
+        (HNSW, or an index built with another model or index type) the index
+        is rebuilt from the remaining states' saved vectors.
+        """
+        self.state_indexes.pop(state_key, None)
+        
+        self.load_vector_database()
+        self.vector_db["states"].pop(state_key, None)
+        
+        faiss_index_file = self.vectors_dir / "compliance_faiss.index"
+        if not faiss_index_file.exists():
+            self.save_vector_database()
+            self._remove_state_vectors(state_key)
+            return {"status": "no_index", "state": state_key}
+        
+        if self._load_index_for_update():
+            indexed_ids = [int(vector_id) for vector_id in self.index_manifest["states"].pop(state_key, {})]
+            if indexed_ids:
+                self.faiss_index.remove_ids(np.array(indexed_ids, dtype='int64'))
+                for vector_id in indexed_ids:
+                    self.citation_metadata.pop(vector_id, None)
+            
+            self._save_faiss_index()
+            self.save_vector_database()
+            self._remove_state_vectors(state_key)
+            logger.info(f"Removed {len(indexed_ids)} vectors for {state_key} from index")
+            
+            return {
+                "status": "completed",
+                "state": state_key,
+                "method": "remove_ids",
+                "removed": len(indexed_ids),
+                "total_vectors": int(self.faiss_index.ntotal)
+            }
+        
+        logger.info(f"Index cannot remove vectors in place, rebuilding without {state_key}")
+        result = self.build_faiss_index()
+        
+        if result["status"] == "no_embeddings":
+            # No state is left to index: drop the index rather than keep serving the removed state
+            for index_file in ("compliance_faiss.index", "citation_metadata.json", "index_manifest.json"):
+                (self.vectors_dir / index_file).unlink(missing_ok=True)
+            self.faiss_index = None
+            self.vector_db["total_vectors"] = 0
+        elif result["status"] != "completed":
+            return {"status": "failed", "state": state_key, "error": f"Index rebuild failed: {result}"}
+        
+        self.save_vector_database()
+        self._remove_state_vectors(state_key)
+        logger.info(f"Rebuilt index without {state_key}")
+        
+        return {
+            "status": "completed",
+            "state": state_key,
+            "method": "rebuild",
+            "total_vectors": result.get("total_vectors", 0)
+        }
+
+    def _remove_state_vectors(self, state_key: str):
+        """Delete a removed state's saved vectors and drop its sub-index"""
+        vectors_file = self.vectors_dir / f"{state_key}_vectors.json"
+        vectors_file.unlink(missing_ok=True)
+        vectors_file.with_suffix(".npy").unlink(missing_ok=True)
+        with self.lock:
+            self.state_indexes.pop(state_key, None)
+
+    def _indexed_states(self) -> set:
+        """States in the persisted index manifest (re-read only when the manifest file changes)"""
+        manifest_file = self.vectors_dir / "index_manifest.json"
+        try:
+            stat = manifest_file.stat()
+        except FileNotFoundError:
+            return set()
+        
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._indexed_states_cache[0] != key:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                states = set(json.load(f).get("states", {}))
+            self._indexed_states_cache = (key, states)
+        return self._indexed_states_cache[1]
+
+    def _get_state_index(self, state_key: str) -> Optional[Tuple]:
+        """
+        Get the in-memory sub-index for one state, building it from the state's vectors on first use
+        
+        Returns (index, metadata by vector ID), or None if the state has no vectors
+        or is not in the index (e.g. it was removed by another process).
+        """
+        if state_key not in self._indexed_states():
+            with self.lock:
+                self.state_indexes.pop(state_key, None)
+            return None
+        
+        with self.lock:
+            if state_key in self.state_indexes:
+                return self.state_indexes[state_key]
+        
+        vectors_file = self.vectors_dir / f"{state_key}_vectors.json"
+        if not vectors_file.exists():
+            return None
+        
+        embeddings, ids, metadata, _ = self._load_state_index_entries(state_key, vectors_file)
+        if len(ids) == 0:
+            return None
+        
+        # Single-state sub-indexes are small enough for exact search
+        state_index = self._new_faiss_index(int(embeddings.shape[1]))
+        state_index.add_with_ids(embeddings, ids)
+        state_entry = (state_index, dict(zip(ids.tolist(), metadata)))
+        
+        with self.lock:
+            self.state_indexes[state_key] = state_entry
+        return state_entry
+
+    def _format_search_result(self, rank: int, similarity: float, metadata: Dict) -> Dict:
+        """Format a FAISS hit as a citation search result"""
+        return {
+            "rank": rank,
+            "similarity_score": float(similarity),
+            "citation_id": metadata.get("citation_id", ""),
+            "state": metadata.get("state", ""),
+            "citation_string": metadata.get("citation_string", ""),
+            "section": metadata.get("section", ""),
+            "document_type": metadata.get("document_type", ""),
+            "title": metadata.get("title", ""),
+            "text_content": metadata.get("text_content", ""),
+            "relevance": "high" if similarity > 0.8 else "medium" if similarity > 0.6 else "low"
+        }
+
     def search_similar_citations(self, query: str, k: int = 10, state_filter: Optional[str] = None) -> List[Dict]:
-        """Search for similar citations using vector similarity"""
+        """
+        Search for similar citations using vector similarity
+        
+        State-scoped queries search only that state's sub-index, so they
+        return k results whenever the state has at least k citations.
+        """
         logger.info(f"Searching for similar citations: '{query}'")
         
-        if not self.faiss_index:
+        state_entry = self._get_state_index(state_filter) if state_filter else None
+        
+        if not state_entry and not self.faiss_index:
             self.load_faiss_index()
         
         if not self.embedding_model:
@@ -328,43 +696,55 @@ class ComplianceVectorizer:
         query_embedding = query_embedding.astype('float32')
         faiss.normalize_L2(query_embedding)
         
-        # Search FAISS index
-        similarities, indices = self.faiss_index.search(query_embedding, k * 2)  # Get more results for filtering
-        
-        # Process results
-        results = []
-        
-        for i, (similarity, index) in enumerate(zip(similarities[0], indices[0])):
-            if index < 0:  # Invalid index
-                continue
-            
-            metadata = self.citation_metadata.get(index, {})
-            
-            # Apply state filter if specified
-            if state_filter and metadata.get("state") != state_filter:
-                continue
-            
-            result = {
-                "rank": len(results) + 1,
-                "similarity_score": float(similarity),
-                "citation_id": metadata.get("citation_id", ""),
-                "state": metadata.get("state", ""),
-                "citation_string": metadata.get("citation_string", ""),
-                "section": metadata.get("section", ""),
-                "document_type": metadata.get("document_type", ""),
-                "title": metadata.get("title", ""),
-                "text_content": metadata.get("text_content", ""),
-                "relevance": "high" if similarity > 0.8 else "medium" if similarity > 0.6 else "low"
-            }
-            
-            results.append(result)
-            
-            if len(results) >= k:
-                break
+        if state_entry:
+            # Pre-filtered: only this state's vectors are scanned
+            state_index, state_metadata = state_entry
+            similarities, indices = state_index.search(query_embedding, k)
+            hits = [
+                (similarity, state_metadata.get(int(index), {}))
+                for similarity, index in zip(similarities[0], indices[0]) if index >= 0
+            ]
+        elif self.faiss_index:
+            hits = self._search_global_index(query_embedding, k, state_filter)
+        else:
+            hits = []
+        
+        results = [
+            self._format_search_result(rank, similarity, metadata)
+            for rank, (similarity, metadata) in enumerate(hits[:k], 1)
+        ]
         
         logger.info(f"Found {len(results)} similar citations")
         return results
 
+    def _search_global_index(self, query_embedding: np.ndarray, k: int,
+                             state_filter: Optional[str] = None) -> List[Tuple[float, Dict]]:
+        """Search the global index, widening the search until k state matches are found"""
+        total = int(self.faiss_index.ntotal)
+        if total == 0 or k <= 0:
+            return []
+        search_k = k * 2 if state_filter else k
+        
+        while True:
+            similarities, indices = self.faiss_index.search(query_embedding, min(search_k, total))
+            
+            hits = []
+            for similarity, index in zip(similarities[0], indices[0]):
+                if index < 0:  # Invalid index
+                    continue
+                
+                metadata = self.citation_metadata.get(int(index), {})
+                
+                # Apply state filter if specified
+                if state_filter and metadata.get("state") != state_filter:
+                    continue
+                
+                hits.append((similarity, metadata))
+            
+            if len(hits) >= k or search_k >= total:
+                return hits
+            search_k *= 4
+
     def load_faiss_index(self):
         """Load existing FAISS index"""
         faiss_index_file = self.vectors_dir / "compliance_faiss.index"
@@ -381,6 +761,7 @@ class ComplianceVectorizer:
         try:
             # Load FAISS index
             self.faiss_index = faiss.read_index(str(faiss_index_file))
+            set_search_params(self.faiss_index, nprobe=self.ivf_nprobe, ef_search=self.hnsw_ef_search)
             
             # Load metadata
             with open(metadata_file, 'r', encoding='utf-8') as f:
@@ -396,15 +777,63 @@ class ComplianceVectorizer:
             logger.error(f"Error loading FAISS index: {e}")
             return False
 
-    def vectorize_all_states(self) -> Dict:
-        """Vectorize citations for all states"""
-        logger.info("Vectorizing citations for all states")
+    def evaluate_index_types(self, k: int = 10, num_queries: int = 200, seed: int = 42) -> Dict:
+        """
+        Measure recall@k and query latency of each index type against flat search
         
-        # Load existing vector database if available
+        Queries are sampled from the stored citation vectors, so neither the
+        embedding model nor an existing index is needed.
+        """
+        self.load_vector_database()
+        
+        embedding_matrices = []
+        for state_key, state_info in self.vector_db["states"].items():
+            vectors_file = Path(state_info["vectors_file"])
+            if vectors_file.exists():
+                embeddings, ids, _, _ = self._load_state_index_entries(state_key, vectors_file)
+                if len(ids):
+                    embedding_matrices.append(embeddings)
+        
+        if not embedding_matrices:
+            logger.warning("No embeddings found for index evaluation")
+            return {"status": "no_embeddings"}
+        
+        vectors = np.concatenate(embedding_matrices)
+        rng = np.random.default_rng(seed)
+        query_rows = rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)
+        
+        logger.info(f"Evaluating index types on {len(vectors)} vectors with {len(query_rows)} queries")
+        
+        report = evaluate_index_types(
+            vectors, vectors[query_rows], k=k,
+            nprobe=self.ivf_nprobe, ef_search=self.hnsw_ef_search
+        )
+        
+        return {"status": "completed", "index_types": report}
+
+    def load_vector_database(self):
+        """Load existing vector database if available, keeping states vectorized in this run"""
         vector_db_file = self.vectors_dir / "vector_database.json"
         if vector_db_file.exists():
+            current_states = self.vector_db.get("states", {})
             with open(vector_db_file, 'r') as f:
                 self.vector_db = json.load(f)
+            self.vector_db.setdefault("states", {}).update(current_states)
+
+    def save_vector_database(self):
+        """Save vector database"""
+        vector_db_file = self.vectors_dir / "vector_database.json"
+        self.vector_db["built_at"] = datetime.now().isoformat()
+        
+        with open(vector_db_file, 'w') as f:
+            json.dump(self.vector_db, f, indent=2)
+
+    def vectorize_all_states(self) -> Dict:
+        """Vectorize citations for all states"""
+        logger.info("Vectorizing citations for all states")
+        
+        # Load existing vector database if available
+        self.load_vector_database()
         
         # Get all citation files
         citation_files = list(self.citations_dir.glob("*_citations.json"))
@@ -431,18 +860,19 @@ class ComplianceVectorizer:
         faiss_result = self.build_faiss_index()
         
         # Save vector database
-        self.vector_db["built_at"] = datetime.now().isoformat()
-        
-        with open(vector_db_file, 'w') as f:
-            json.dump(self.vector_db, f, indent=2)
+        self.save_vector_database()
         
+        embedding_stats = self.embedder.get_statistics()
         logger.info("Vectorization completed for all states")
+        logger.info(f"Embedding stats: {embedding_stats['texts_embedded']} embedded, "
+                    f"{embedding_stats['texts_deduplicated']} reused")
         
         return {
             "status": "completed",
             "states_processed": len(results),
             "total_vectors": self.vector_db["total_vectors"],
             "faiss_index": faiss_result,
+            "embedding_stats": embedding_stats,
             "results": results
         }
 
@@ -510,6 +940,13 @@ def main():
     parser.add_argument('--state', help='Vectorize specific state only')
     parser.add_argument('--all', action='store_true', help='Vectorize all states')
     parser.add_argument('--build-index', action='store_true', help='Build FAISS index')
+    parser.add_argument('--update-index', action='store_true',
+                        help='With --state, update that state in the existing index instead of rebuilding')
+    parser.add_argument('--remove-state', help='Remove a state from the existing FAISS index')
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default='flat',
+                        help='FAISS index type: exact flat search or approximate IVF / HNSW')
+    parser.add_argument('--evaluate-index', action='store_true',
+                        help='Compare recall and latency of each index type against flat search')
     parser.add_argument('--search', help='Search for similar citations')
     parser.add_argument('--search-state', help='Limit search to specific state')
     parser.add_argument('--k', type=int, default=10, help='Number of results to return')
@@ -519,18 +956,31 @@ def main():
     # Change to compliance_data directory
     os.chdir(Path(__file__).parent.parent)
     
-    vectorizer = ComplianceVectorizer()
+    vectorizer = ComplianceVectorizer(index_type=args.index_type)
     
-    if args.search:
+    if args.evaluate_index:
+        result = vectorizer.evaluate_index_types(k=args.k)
+        for index_type, metrics in result.get("index_types", {}).items():
+            print(f"{index_type:>5}: recall@{metrics['k']}={metrics['recall_at_k']:.3f} "
+                  f"query={metrics['mean_query_ms']:.3f}ms build={metrics['build_seconds']:.2f}s")
+        if result["status"] != "completed":
+            print(f"Index evaluation result: {result}")
+    elif args.search:
         results = vectorizer.search_similar_citations(args.search, args.k, args.search_state)
         print(f"\nFound {len(results)} similar citations for '{args.search}':")
         for result in results:
             print(f"\n{result['rank']}. {result['citation_string']} (Score: {result['similarity_score']:.3f})")
             print(f"   State: {result['state']} | Type: {result['document_type']} | Relevance: {result['relevance']}")
             print(f"   Content: {result['text_content'][:200]}...")
+    elif args.remove_state:
+        result = vectorizer.remove_state_from_index(args.remove_state)
+        print(f"Index update result: {result}")
     elif args.state:
         result = vectorizer.vectorize_state_citations(args.state)
         print(f"Vectorization result: {result}")
+        if args.update_index:
+            index_result = vectorizer.update_state_index(args.state)
+            print(f"Index update result: {index_result}")
     elif args.all:
         result = vectorizer.vectorize_all_states()
         print(f"Vectorization result: {result}")